@@ -1,15 +1,29 @@
 from SprelfPkmn.Objects import *
-from SprelfPkmn.Calculations.Stats import get_stat_value_from_info
+from SprelfPkmn.Objects.DamageModifier import DamageModifier, DamageModifierType
+from SprelfPkmn.Calculations.Stats import get_stat_value_from_info, get_stat_values_batch, apply_stat_stage, \
+    get_stat_stage_multiplier, get_stat_stage_multipliers
 
-from typing import Iterable
+from typing import Iterable, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+RANDOM_FACTORS = np.arange(85, 101) / 100
+
+# Damage modifiers in the games are fixed-point values, where 4096 represents a multiplier of 1
+MODIFIER_SCALE = 4096
+CRITICAL_MODIFIER = 6144
+STAB_MODIFIER = 6144
 
 
 def calculate_damage(attacker: Pokemon, defender: Pokemon, move: DamagingMove, critical: bool = False) -> Iterable[int]:
     o_stat = get_stat_value_from_info(attacker.stats, move.offense_stat)
     d_stat = get_stat_value_from_info(defender.stats, move.defense_stat)
 
-    o_stat *= attacker.stats.get_modifier(stat=move.offense_stat, minimum=0 if critical else None).multiplier
-    d_stat *= defender.stats.get_modifier(stat=move.defense_stat, maximum=0 if critical else None).multiplier
+    o_stat *= get_stat_stage_multiplier(move.offense_stat,
+                                        attacker.stats.get_stage(move.offense_stat, minimum=0 if critical else None))
+    d_stat *= get_stat_stage_multiplier(move.defense_stat,
+                                        defender.stats.get_stage(move.defense_stat, maximum=0 if critical else None))
 
     damage_ratio = o_stat / d_stat
 
@@ -47,6 +61,208 @@ def calculate_damage(attacker: Pokemon, defender: Pokemon, move: DamagingMove, c
         yield value
 
 
+#
+
+
+def calculate_damage_batch(attackers: Sequence[Pokemon], defenders: Sequence[Pokemon], moves: Sequence[DamagingMove],
+                           critical: bool | ArrayLike = False) -> np.ndarray:
+    """
+    Calculates the damage rolls for many attacks at once.  The attacker, defender and move at each index make up
+    a single attack, and the results are identical to calling calculate_damage() for each attack individually.
+
+    :param attackers: The attacking Pokémon for each attack
+    :param defenders: The defending Pokémon for each attack
+    :param moves: The move used in each attack
+    :param critical: Whether each attack is a critical hit, either for all attacks or per attack
+    :return: An integer array of shape (N, 16) with the damage for each of the random rolls of each of the N attacks
+    """
+    n = len(attackers)
+    if len(defenders) != n or len(moves) != n:
+        raise ValueError(f"Mismatched number of attackers ({n}), defenders ({len(defenders)}) "
+                         f"and moves ({len(moves)})")
+    critical = np.broadcast_to(np.asarray(critical, dtype=bool), (n,))
+
+    offense = _get_stat_values(attackers, [m.offense_stat for m in moves])
+    defense = _get_stat_values(defenders, [m.defense_stat for m in moves])
+    offense = offense * get_stat_stage_multipliers(np.fromiter(
+        (a.stats.get_stage(m.offense_stat, minimum=0 if crit else None)
+         for a, m, crit in zip(attackers, moves, critical)), dtype=np.int64, count=n))
+    defense = defense * get_stat_stage_multipliers(np.fromiter(
+        (d.stats.get_stage(m.defense_stat, maximum=0 if crit else None)
+         for d, m, crit in zip(defenders, moves, critical)), dtype=np.int64, count=n))
+
+    effectiveness_cache: dict[tuple[Type, Typing], float] = dict()
+
+    def _get_effectiveness(move: DamagingMove, defender: Pokemon) -> float:
+        key = (move.type, defender.data.typing)
+        if key not in effectiveness_cache:
+            effectiveness_cache[key] = Type.get_damage_multiplier(move.type, defender.data.typing)
+        return effectiveness_cache[key]
+
+    return calculate_damage_from_arrays(
+        levels=np.fromiter((a.stats.level for a in attackers), dtype=np.int64, count=n),
+        base_powers=np.fromiter((m.base_power for m in moves), dtype=np.int64, count=n),
+        offense=offense,
+        defense=defense,
+        stab=np.fromiter((m.type in a.data.typing for a, m in zip(attackers, moves)), dtype=bool, count=n),
+        effectiveness=np.fromiter((_get_effectiveness(m, d) for d, m in zip(defenders, moves)),
+                                  dtype=np.float64, count=n),
+        critical=critical)
+
+
+def calculate_damage_from_arrays(levels: ArrayLike, base_powers: ArrayLike, offense: ArrayLike, defense: ArrayLike,
+                                 stab: ArrayLike, effectiveness: ArrayLike, critical: ArrayLike = False) -> np.ndarray:
+    """
+    Calculates the damage rolls for many attacks at once, from the numbers that the damage formula depends on.
+    All of the given arrays are broadcast against each other into a single dimension of N attacks.
+
+    :param levels: The levels of the attacking Pokémon
+    :param base_powers: The base powers of the moves
+    :param offense: The offensive stat values of the attackers, with stat modifiers already applied
+    :param defense: The defensive stat values of the defenders, with stat modifiers already applied
+    :param stab: Whether each attack receives the same-type attack bonus
+    :param effectiveness: The type effectiveness multipliers of each attack
+    :param critical: Whether each attack is a critical hit
+    :return: An integer array of shape (N, 16) with the damage for each of the random rolls of each of the N attacks
+    """
+    levels, base_powers, offense, defense, stab, effectiveness, critical = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=t)) for a, t in ((levels, np.float64), (base_powers, np.float64),
+                                                             (offense, np.float64), (defense, np.float64),
+                                                             (stab, bool), (effectiveness, np.float64),
+                                                             (critical, bool))))
+
+    # The order of operations matches calculate_damage() exactly, so that the floating point results are identical
+    damage_ratio = offense / defense
+    base_value = (((((2 * levels) / 5) + 2) * base_powers * damage_ratio) / 50) + 2
+
+    # Multi-target and weather multipliers are not implemented, but are still rounded down
+    base_value = np.trunc(base_value)
+
+    # Critical
+    base_value = np.trunc(base_value * np.where(critical, 1.5, 1))
+
+    # Random factors
+    values = np.trunc(base_value[:, np.newaxis] * RANDOM_FACTORS)
+
+    # STAB
+    values = np.where(stab[:, np.newaxis], _rounding_mult_batch(values, 1.5), values)
+
+    # Type effectiveness
+    values = _rounding_mult_batch(values, effectiveness[:, np.newaxis])
+
+    return values.astype(np.int64)
+
+
+def _get_stat_values(pokemon: Sequence[Pokemon], stats: Sequence[Stat]) -> np.ndarray:
+    n = len(pokemon)
+    stats = np.array(stats, dtype=object)
+    bases = np.fromiter((p.stats.base.get_stat(s) for p, s in zip(pokemon, stats)), dtype=np.int64, count=n)
+    evs = np.fromiter((p.stats.get_ev(s) for p, s in zip(pokemon, stats)), dtype=np.int64, count=n)
+    ivs = np.fromiter((p.stats.get_iv(s) for p, s in zip(pokemon, stats)), dtype=np.int64, count=n)
+    levels = np.fromiter((p.stats.level for p in pokemon), dtype=np.int64, count=n)
+    nature_mods = np.fromiter((p.stats.nature.get_modifier(s) for p, s in zip(pokemon, stats)),
+                              dtype=np.float64, count=n)
+
+    # HP is the only stat with a different formula
+    is_hp = stats == Stat.HP
+    values = np.empty(n, dtype=np.int64)
+    for stat, mask in ((Stat.HP, is_hp), (Stat.ATTACK, ~is_hp)):
+        if mask.any():
+            values[mask] = get_stat_values_batch(stat, bases[mask], evs[mask], ivs[mask], levels[mask],
+                                                 nature_mods[mask])
+    return values
+
+
+def _rounding_mult_batch(v1: np.ndarray, v2: ArrayLike) -> np.ndarray:
+    """
+    The equivalent of rounding_mult() (without hard rounding) for arrays of non-negative values
+    """
+    new_value = v1 * v2
+    as_int = np.trunc(new_value)
+    return np.where(new_value - as_int <= 0.5, as_int, as_int + 1)
+
+
+#
+
+
+def calculate_damage_fixed_point(attacker: Pokemon, defender: Pokemon, move: DamagingMove, critical: bool = False,
+                                 modifiers: Iterable[DamageModifier] = ()) -> Iterable[int]:
+    """
+    Calculates the damage rolls of an attack using only integer arithmetic, with every modifier applied as a
+    4096-scaled fixed-point value the way the games do.  Unlike calculate_damage(), this rounds exactly as the
+    games do, and so may occasionally differ from it by a point of damage.
+
+    :param attacker: The attacking Pokémon
+    :param defender: The defending Pokémon
+    :param move: The move being used
+    :param critical: Whether the attack is a critical hit
+    :param modifiers: Additional damage modifiers, whose values are multipliers (eg. 1.5, 0.75).  Multiple modifiers
+    of the same type are chained together.  Critical hits are determined only by the critical parameter, so
+    CRITICAL modifiers are ignored.
+    :return: The damage for each of the 16 random rolls
+    """
+    chained = {t: chain_modifiers(to_fixed_point(m.value) for m in modifiers if m.type == t)
+               for t in DamageModifierType}
+
+    o_stat = apply_stat_stage(move.offense_stat, get_stat_value_from_info(attacker.stats, move.offense_stat),
+                              attacker.stats.get_stage(move.offense_stat, minimum=0 if critical else None))
+    d_stat = apply_stat_stage(move.defense_stat, get_stat_value_from_info(defender.stats, move.defense_stat),
+                              defender.stats.get_stage(move.defense_stat, maximum=0 if critical else None))
+    o_stat = max(1, poke_round(o_stat, chained[DamageModifierType.OFFENSE_MULTIPLIER]))
+    d_stat = max(1, poke_round(d_stat, chained[DamageModifierType.DEFENSE_MULTIPLIER]))
+
+    base_value = ((2 * attacker.stats.level) // 5 + 2) * move.base_power * o_stat // d_stat // 50 + 2
+    base_value = poke_round(base_value, chained[DamageModifierType.BASE_DAMAGE])
+    base_value = poke_round(base_value, chained[DamageModifierType.MULTI_TARGET])
+    base_value = poke_round(base_value, chained[DamageModifierType.WEATHER])
+    if critical:
+        base_value = poke_round(base_value, CRITICAL_MODIFIER)
+
+    stab = move.type in attacker.data.typing
+    numerator, denominator = Type.get_damage_multiplier(move.type, defender.data.typing).as_integer_ratio()
+
+    for r in range(85, 101):
+        value = base_value * r // 100
+        if stab:
+            value = poke_round(value, STAB_MODIFIER)
+
+        # Type effectiveness doubles or halves (rounding down) the damage for each matchup
+        value = value * numerator // denominator
+
+        value = poke_round(value, chained[DamageModifierType.STATUS])
+        value = poke_round(value, chained[DamageModifierType.OTHER])
+
+        # Damage that isn't prevented entirely by an immunity is always at least 1
+        yield max(1, value) if numerator > 0 else 0
+
+
+def to_fixed_point(multiplier: float) -> int:
+    """
+    Converts the given multiplier into a 4096-scaled fixed-point modifier
+    """
+    return round(multiplier * MODIFIER_SCALE)
+
+
+def poke_round(value: int, modifier: int) -> int:
+    """
+    Applies the given 4096-scaled fixed-point modifier to the given value, rounding half down
+    """
+    return (value * modifier + MODIFIER_SCALE // 2 - 1) // MODIFIER_SCALE
+
+
+def chain_modifiers(modifiers: Iterable[int]) -> int:
+    """
+    Combines the given 4096-scaled fixed-point modifiers into a single modifier, rounding half up at each step
+    """
+    chained = MODIFIER_SCALE
+    for modifier in modifiers:
+        chained = (chained * modifier + MODIFIER_SCALE // 2) // MODIFIER_SCALE
+    return chained
+
+
+#
+
+
 def rounding_mult(v1: float, v2: float, hard_round: bool = False) -> int:
     new_value = v1 * v2
     as_int = int(new_value)
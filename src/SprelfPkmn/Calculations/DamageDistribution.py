@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from SprelfPkmn.Objects import Pokemon, DamagingMove, Stats, Stat, StatError, CRITICAL_STAGE_MAX
+from SprelfPkmn.Objects.Stats import CRITICAL_STAGE_RATIOS
+from SprelfPkmn.Calculations.Stats import get_stat_value_from_info
+from SprelfPkmn.Calculations.Damage import calculate_damage
+from SprelfPkmn.Utils.CacheUtils import LRUCache, CacheInfo
+
+from typing import Iterable
+
+import numpy as np
+
+
+def get_critical_hit_chance(stage: int = 0) -> float:
+    """
+    The chance of a critical hit at the given critical hit stage, from 0 to +3
+
+    :raises StatError: Raises an error if the stage is out of bounds
+    """
+    if not 0 <= stage <= CRITICAL_STAGE_MAX:
+        raise StatError(f"Invalid stat modifier: {Stat.CRITICAL} | {stage}")
+    numerator, denominator = CRITICAL_STAGE_RATIOS[stage]
+    return numerator / denominator
+
+
+# The chance of a critical hit without any critical hit stage boosts
+CRITICAL_HIT_CHANCE = get_critical_hit_chance(0)
+
+
+class DamageDistribution:
+    """
+    A probability distribution of damage values, stored as a histogram of probabilities from the minimum possible
+    damage value to the maximum.  Distributions of independent hits can be added together to get the distribution
+    of their total damage.
+    """
+    __slots__ = ("offset", "probabilities", "_tail", "_repeats")
+
+    def __init__(self, offset: int, probabilities: np.ndarray):
+        """
+        :param offset: The damage value represented by the first probability
+        :param probabilities: The probability of each consecutive damage value, starting from the offset
+        """
+        self.offset = offset
+        self.probabilities = probabilities
+        self._tail: np.ndarray | None = None
+        self._repeats: dict[int, DamageDistribution] = {1: self}
+
+    @classmethod
+    def from_rolls(cls, rolls: Iterable[int]) -> DamageDistribution:
+        """
+        Builds a damage distribution from equally likely damage values (eg. the 16 random damage rolls)
+        """
+        rolls = np.fromiter(rolls, dtype=np.int64)
+        offset = int(rolls.min())
+        counts = np.bincount(rolls - offset)
+        return cls(offset, counts / len(rolls))
+
+    @property
+    def min_damage(self) -> int:
+        return self.offset
+
+    @property
+    def max_damage(self) -> int:
+        return self.offset + len(self.probabilities) - 1
+
+    def mean(self) -> float:
+        return float(np.dot(np.arange(self.offset, self.max_damage + 1), self.probabilities))
+
+    def __add__(self, other: DamageDistribution) -> DamageDistribution:
+        return self.convolve(other)
+
+    def convolve(self, other: DamageDistribution) -> DamageDistribution:
+        """
+        The distribution of the total damage of a hit from this distribution and a hit from the given distribution
+        """
+        return DamageDistribution(self.offset + other.offset, np.convolve(self.probabilities, other.probabilities))
+
+    def mix(self, other: DamageDistribution, chance: float) -> DamageDistribution:
+        """
+        The distribution of a hit that follows the given distribution with the given chance, and this distribution
+        otherwise (eg. mixing in critical hits).
+        """
+        offset = min(self.offset, other.offset)
+        probabilities = np.zeros(max(self.max_damage, other.max_damage) - offset + 1)
+        probabilities[self.offset - offset:self.max_damage - offset + 1] += self.probabilities * (1 - chance)
+        probabilities[other.offset - offset:other.max_damage - offset + 1] += other.probabilities * chance
+        return DamageDistribution(offset, probabilities)
+
+    def repeat(self, hits: int) -> DamageDistribution:
+        """
+        The distribution of the total damage of the given number of independent hits from this distribution.
+        Results are cached on this distribution.
+        """
+        if hits < 1:
+            raise ValueError(f"Invalid number of hits: {hits}")
+        if hits not in self._repeats:
+            half = self.repeat(hits // 2)
+            result = half + half
+            self._repeats[hits] = result + self if hits % 2 else result
+        return self._repeats[hits]
+
+    def probability_at_least(self, damage: int) -> float:
+        """
+        The probability that the damage is at least the given value (eg. the chance to KO with the given HP)
+        """
+        if self._tail is None:
+            self._tail = np.cumsum(self.probabilities[::-1])[::-1]
+        index = damage - self.offset
+        if index <= 0:
+            return 1.0
+        if index >= len(self._tail):
+            return 0.0
+        return float(self._tail[index])
+
+
+#
+
+
+def get_damage_distribution(attacker: Pokemon, defender: Pokemon, move: DamagingMove,
+                            critical_chance: float = CRITICAL_HIT_CHANCE) -> DamageDistribution:
+    """
+    Calculates the distribution of damage for a single hit of the given move, including both the random damage
+    rolls and the chance of a critical hit.  Distributions are cached by the stat information and typing that
+    the damage depends on, unless the damage distribution cache is disabled.
+
+    :param attacker: The attacking Pokémon
+    :param defender: The defending Pokémon
+    :param move: The move being used
+    :param critical_chance: The chance of a critical hit
+    :return: The distribution of damage of a single hit
+    """
+    key = (_get_stats_key(attacker.stats, move.offense_stat), attacker.data.typing,
+           _get_stats_key(defender.stats, move.defense_stat), defender.data.typing,
+           move.type, move.base_power, critical_chance)
+    cache = _distribution_cache
+    distribution = cache.get(key) if cache is not None else None
+    if distribution is None:
+        distribution = DamageDistribution.from_rolls(calculate_damage(attacker, defender, move))
+        if critical_chance > 0:
+            critical = DamageDistribution.from_rolls(calculate_damage(attacker, defender, move, critical=True))
+            distribution = distribution.mix(critical, critical_chance)
+        if cache is not None:
+            cache.put(key, distribution)
+    return distribution
+
+
+def get_ko_chance(attacker: Pokemon, defender: Pokemon, move: DamagingMove, hits: int = 1,
+                  critical_chance: float = CRITICAL_HIT_CHANCE, hp: int | None = None) -> float:
+    """
+    Calculates the chance that the given number of hits of the given move knocks out the defender.
+
+    :param attacker: The attacking Pokémon
+    :param defender: The defending Pokémon
+    :param move: The move being used
+    :param hits: The number of hits of the move (eg. 2 for the chance to 2HKO)
+    :param critical_chance: The chance of a critical hit on each hit
+    :param hp: Optional.  The remaining HP of the defender.  Defaults to the defender's full HP.
+    :return: The chance that the total damage of the hits is at least the defender's HP
+    """
+    if hp is None:
+        hp = get_stat_value_from_info(defender.stats, Stat.HP)
+    return get_damage_distribution(attacker, defender, move, critical_chance).repeat(hits).probability_at_least(hp)
+
+
+#
+
+
+DEFAULT_DISTRIBUTION_CACHE_SIZE = 1 << 12
+
+_distribution_cache: LRUCache[DamageDistribution] | None = LRUCache(DEFAULT_DISTRIBUTION_CACHE_SIZE)
+
+
+def enable_damage_distribution_cache(max_size: int = DEFAULT_DISTRIBUTION_CACHE_SIZE):
+    """
+    Turns on caching of the distributions calculated by get_damage_distribution(), replacing any existing damage
+    distribution cache.  Caching is on by default, with the default size.
+
+    :param max_size: The maximum number of distributions to keep before evicting the least recently used
+    :raises ValueError: Raises an error if the maximum size is not positive
+    """
+    global _distribution_cache
+    _distribution_cache = LRUCache(max_size)
+
+
+def disable_damage_distribution_cache():
+    """
+    Turns off caching of damage distributions, discarding the damage distribution cache
+    """
+    global _distribution_cache
+    _distribution_cache = None
+
+
+def clear_damage_distribution_cache():
+    if _distribution_cache is not None:
+        _distribution_cache.clear()
+
+
+def get_damage_distribution_cache_info() -> CacheInfo | None:
+    """
+    Gets the current counters of the damage distribution cache, or None if it is not enabled
+    """
+    return _distribution_cache.info() if _distribution_cache is not None else None
+
+
+def _get_stats_key(stats: Stats, stat: Stat) -> tuple:
+    return (stats.base.get_stat(stat), stats.get_ev(stat), stats.get_iv(stat), stats.level,
+            stats.nature.get_modifier_tenths(stat), stats.get_stage(stat))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from SprelfPkmn.Objects import PokemonData, Pokemon, Stats, Stat, Nature, MoveSet, DamagingMove, Type, \
+    ORDERED_NUMBER_STATS
+from SprelfPkmn.Calculations.Stats import get_stat_value_from_info, get_stat_stage_multiplier
+from SprelfPkmn.Calculations.Damage import calculate_damage_from_arrays
+
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from typing import Iterable, Callable, NamedTuple, Sequence
+import json
+import os
+
+import numpy as np
+
+_IDS_FILE = "ids.json"
+_PERCENTAGES_FILE = "percentages.npy"
+_MOVES_FILE = "moves.npy"
+_PROGRESS_FILE = "progress.npy"
+
+
+class Matchup(NamedTuple):
+    """
+    The best damaging move of one Pokémon against another, with the minimum and maximum damage rolls of that move
+    as percentages of the defender's HP.  The move is given as an index amongst the attacker's damaging moves,
+    or -1 if the attacker has none.
+    """
+    move_index: int
+    min_percentage: float
+    max_percentage: float
+
+    def get_move(self, attacker: PokemonData) -> DamagingMove | None:
+        return _get_damaging_moves(attacker)[self.move_index] if self.move_index >= 0 else None
+
+
+class MatchupMatrix:
+    """
+    The best damaging move of every Pokémon against every other Pokémon, stored in memory-mapped arrays in a
+    directory.  Rows represent attackers and columns represent defenders, both in the order of the IDs.
+
+    - percentages: A float array of shape (N, N, 2), with the minimum and maximum damage rolls of the best move as
+      percentages of the defender's HP
+    - moves: An integer array of shape (N, N), with the index of the best move amongst the attacker's damaging moves,
+      or -1 if the attacker has no damaging moves
+    - progress: A boolean array of shape (N,), marking which rows have been completely built
+    """
+
+    def __init__(self, path: str | PathLike, ids: list[str], percentages: np.ndarray, moves: np.ndarray,
+                 progress: np.ndarray):
+        self.path = path
+        self.ids = ids
+        self.id_index: dict[str, int] = {name_id: i for i, name_id in enumerate(ids)}
+        self.percentages = percentages
+        self.moves = moves
+        self.progress = progress
+
+    @classmethod
+    def load(cls, path: str | PathLike, mode: str = "r") -> MatchupMatrix:
+        """
+        Memory-maps a matchup matrix from the given directory.
+
+        :param path: The directory the matchup matrix was built in
+        :param mode: The memory-map mode to open the arrays with (eg. "r" or "r+")
+        :return: The memory-mapped matchup matrix
+        """
+        with open(os.path.join(path, _IDS_FILE), "r") as f:
+            ids = json.load(f)
+        return cls(path, ids,
+                   percentages=np.load(os.path.join(path, _PERCENTAGES_FILE), mmap_mode=mode),
+                   moves=np.load(os.path.join(path, _MOVES_FILE), mmap_mode=mode),
+                   progress=np.load(os.path.join(path, _PROGRESS_FILE), mmap_mode=mode))
+
+    def is_complete(self) -> bool:
+        return bool(self.progress.all())
+
+    def get_matchup(self, attacker: PokemonData | str, defender: PokemonData | str) -> Matchup:
+        """
+        Looks up the best damaging move of the given attacker against the given defender.
+
+        :param attacker: The attacking Pokémon, or its ID
+        :param defender: The defending Pokémon, or its ID
+        :return: The matchup between the two Pokémon
+        """
+        row = self.id_index[attacker if isinstance(attacker, str) else get_matchup_id(attacker)]
+        col = self.id_index[defender if isinstance(defender, str) else get_matchup_id(defender)]
+        return Matchup(int(self.moves[row, col]), float(self.percentages[row, col, 0]),
+                       float(self.percentages[row, col, 1]))
+
+    def flush(self):
+        for array in (self.percentages, self.moves, self.progress):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+
+#
+
+
+def build_matchup_matrix(data: Iterable[PokemonData], path: str | PathLike, level: int = 50,
+                         pokemon_builder: Callable[[PokemonData, int], Pokemon] | None = None,
+                         max_workers: int | None = None, rows_per_task: int = 8,
+                         resume: bool = True) -> MatchupMatrix:
+    """
+    Calculates the best damaging move of every given Pokémon against every given Pokémon, by the maximum damage
+    roll, and writes the results into memory-mapped arrays in the given directory.  Rows are written as they are
+    completed, so that an interrupted build can be resumed.
+
+    :param data: The Pokémon to build the matchup matrix for (eg. a PokemonDataMap)
+    :param path: The directory to write the matchup matrix into
+    :param level: The level to build each Pokémon at
+    :param pokemon_builder: Optional.  A function that builds each Pokémon (including its stat spread) from its data
+    and level.  This must be picklable if max_workers is given.  Defaults to neutral natures, no EVs and max IVs.
+    :param max_workers: Optional.  If given, rows of attackers are split up and calculated in parallel across a pool
+    of this many processes.  Defaults to calculating everything in the current process.
+    :param rows_per_task: The number of attacker rows calculated in each task
+    :param resume: If True, and the directory already contains a partially built matchup matrix for the same
+    Pokémon, only the remaining rows are calculated.  Otherwise, the matchup matrix is built from scratch.
+    :return: The completed matchup matrix
+    :raises ValueError: Raises an error if resuming a matchup matrix that was built for different Pokémon
+    """
+    data = list(data)
+    ids = [get_matchup_id(d) for d in data]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Pokémon IDs for the matchup matrix are not unique")
+    pokemon_builder = pokemon_builder or build_default_pokemon
+
+    matrix = _open_matrix(path, ids, resume)
+    remaining = [int(i) for i in np.flatnonzero(~matrix.progress)]
+    tasks = [remaining[i:i + rows_per_task] for i in range(0, len(remaining), rows_per_task)]
+
+    if max_workers is None:
+        _init_worker(data, level, pokemon_builder)
+        try:
+            _write_rows(matrix, map(_calculate_rows, tasks))
+        finally:
+            _init_worker([], level, pokemon_builder)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(data, level, pokemon_builder)) as executor:
+            _write_rows(matrix, executor.map(_calculate_rows, tasks))
+    return matrix
+
+
+def build_default_pokemon(data: PokemonData, level: int) -> Pokemon:
+    """
+    Builds a Pokémon with a neutral nature, no EVs and max IVs
+    """
+    return Pokemon(data=data, moveset=MoveSet(), ability=data.abilities.primary, item="",
+                   stats=Stats.of(base=data.stats, evs=[], ivs=[], nature=Nature.build_neutral(), level=level))
+
+
+def get_matchup_id(data: PokemonData) -> str:
+    return data.name_id if isinstance(data.name_id, str) else str(data.name)
+
+
+#
+
+
+def _open_matrix(path: str | PathLike, ids: list[str], resume: bool) -> MatchupMatrix:
+    if resume and os.path.exists(os.path.join(path, _PROGRESS_FILE)):
+        matrix = MatchupMatrix.load(path, mode="r+")
+        if matrix.ids != ids:
+            raise ValueError(f"Cannot resume matchup matrix at {path}, as it was built for different Pokémon")
+        return matrix
+
+    os.makedirs(path, exist_ok=True)
+    n = len(ids)
+    # The progress file is written last, so that a matrix is only resumed once all of its files exist
+    with open(os.path.join(path, _IDS_FILE), "w") as f:
+        json.dump(ids, f)
+    percentages = np.lib.format.open_memmap(os.path.join(path, _PERCENTAGES_FILE), mode="w+",
+                                            dtype=np.float32, shape=(n, n, 2))
+    moves = np.lib.format.open_memmap(os.path.join(path, _MOVES_FILE), mode="w+", dtype=np.int16, shape=(n, n))
+    progress = np.lib.format.open_memmap(os.path.join(path, _PROGRESS_FILE), mode="w+", dtype=bool, shape=(n,))
+    return MatchupMatrix(path, ids, percentages, moves, progress)
+
+
+def _write_rows(matrix: MatchupMatrix, results: Iterable[list[tuple[int, np.ndarray, np.ndarray]]]):
+    for rows in results:
+        for row, percentages, moves in rows:
+            matrix.percentages[row] = percentages
+            matrix.moves[row] = moves
+        # Rows are only marked as complete once their results are safely written
+        matrix.percentages.flush()
+        matrix.moves.flush()
+        for row, _, _ in rows:
+            matrix.progress[row] = True
+        matrix.progress.flush()
+
+
+#
+
+# Per-process state, set up once per worker so that the Pokémon are not sent along with every task.  Each
+# Pokémon's stats (with stat modifiers applied) are stored in the order of ORDERED_NUMBER_STATS.
+_worker_pokemon: list[Pokemon] = []
+_worker_moves: list[Sequence[DamagingMove]] = []
+_worker_stats: np.ndarray = np.empty((0, len(ORDERED_NUMBER_STATS)))
+_worker_hp: np.ndarray = np.empty(0)
+
+
+def _init_worker(data: list[PokemonData], level: int, pokemon_builder: Callable[[PokemonData, int], Pokemon]):
+    global _worker_pokemon, _worker_moves, _worker_stats, _worker_hp
+    _worker_pokemon = [pokemon_builder(d, level) for d in data]
+    _worker_moves = [_get_damaging_moves(d) for d in data]
+    _worker_stats = np.array([[get_stat_value_from_info(p.stats, stat) *
+                               get_stat_stage_multiplier(stat, p.stats.get_stage(stat))
+                               if stat != Stat.HP else get_stat_value_from_info(p.stats, stat)
+                               for stat in ORDERED_NUMBER_STATS]
+                              for p in _worker_pokemon], dtype=np.float64).reshape(-1, len(ORDERED_NUMBER_STATS))
+    _worker_hp = _worker_stats[:, ORDERED_NUMBER_STATS.index(Stat.HP)]
+
+
+def _calculate_rows(rows: list[int]) -> list[tuple[int, np.ndarray, np.ndarray]]:
+    effectiveness_cache: dict[Type, np.ndarray] = dict()
+    return [(row, *_calculate_row(row, effectiveness_cache)) for row in rows]
+
+
+def _calculate_row(row: int, effectiveness_cache: dict[Type, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    n = len(_worker_pokemon)
+    moves = _worker_moves[row]
+    percentages = np.zeros((n, 2), dtype=np.float32)
+    best_moves = np.full(n, -1, dtype=np.int16)
+    if len(moves) == 0:
+        return percentages, best_moves
+
+    # Each move is calculated against every defender at once
+    attacker = _worker_pokemon[row]
+    rolls = np.empty((n, len(moves), 2), dtype=np.float64)
+    for i, move in enumerate(moves):
+        if move.type not in effectiveness_cache:
+            effectiveness_cache[move.type] = Type.get_damage_multipliers(move.type,
+                                                                         (p.data.typing for p in _worker_pokemon))
+        damage = calculate_damage_from_arrays(
+            levels=attacker.stats.level,
+            base_powers=move.base_power,
+            offense=_worker_stats[row, ORDERED_NUMBER_STATS.index(move.offense_stat)],
+            defense=_worker_stats[:, ORDERED_NUMBER_STATS.index(move.defense_stat)],
+            stab=move.type in attacker.data.typing,
+            effectiveness=effectiveness_cache[move.type])
+        rolls[:, i] = damage[:, (0, -1)] / _worker_hp[:, np.newaxis] * 100
+
+    # Prefer the highest maximum roll, and then the highest minimum roll
+    best = np.lexsort((rolls[:, :, 0], rolls[:, :, 1]), axis=-1)[:, -1]
+    percentages[:] = rolls[np.arange(n), best]
+    best_moves[:] = best
+    return percentages, best_moves
+
+
+def _get_damaging_moves(data: PokemonData) -> Sequence[DamagingMove]:
+    return [m for m in data.move_list.moves if isinstance(m, DamagingMove) and m.base_power > 0]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from SprelfPkmn.Objects import PokemonData, Stat, Stats, EV_MAX, IV_MAX
+from SprelfPkmn.Calculations.Stats import get_stat_values_batch, get_stat_value_from_info, apply_stat_stage
+from SprelfPkmn.Calculations.Damage import chain_modifiers, poke_round, MODIFIER_SCALE
+
+from bisect import bisect_left, bisect_right
+from enum import Enum
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+
+# Speed modifiers in the games are fixed-point values, where 4096 represents a multiplier of 1
+CHOICE_SCARF_MODIFIER = 6144
+TAILWIND_MODIFIER = 8192
+
+
+class SpreadPreset(Enum):
+    """
+    Standard speed investments, used to build speed tiers
+    """
+    MIN = "MIN"  # 0 EVs, 0 IVs and a hindering nature
+    NEUTRAL = "NEUTRAL"  # 0 EVs, max IVs and a neutral nature
+    MAX_NEUTRAL = "MAX_NEUTRAL"  # Max EVs, max IVs and a neutral nature
+    MAX_POSITIVE = "MAX_POSITIVE"  # Max EVs, max IVs and a boosting nature
+
+
+# The EVs, IVs and nature modifier of each spread preset
+PRESET_SPREADS: dict[SpreadPreset, tuple[int, int, float]] = {
+    SpreadPreset.MIN: (0, 0, 0.9),
+    SpreadPreset.NEUTRAL: (0, IV_MAX, 1),
+    SpreadPreset.MAX_NEUTRAL: (EV_MAX, IV_MAX, 1),
+    SpreadPreset.MAX_POSITIVE: (EV_MAX, IV_MAX, 1.1)
+}
+
+
+class SpeedModifiers(NamedTuple):
+    """
+    The in-battle effects on a Pokémon's speed
+    """
+    stage: int = 0
+    tailwind: bool = False
+    choice_scarf: bool = False
+
+    def apply(self, speed: int) -> int:
+        """
+        Applies these effects to the given speed stat, as the games do
+        """
+        speed = apply_stat_stage(Stat.SPEED, speed, self.stage)
+        modifier = self.modifier
+        return poke_round(speed, modifier) if modifier != MODIFIER_SCALE else speed
+
+    @property
+    def modifier(self) -> int:
+        """
+        The chained 4096-scaled fixed-point modifier of the effects besides the stat stage
+        """
+        return chain_modifiers(m for m, active in ((CHOICE_SCARF_MODIFIER, self.choice_scarf),
+                                                   (TAILWIND_MODIFIER, self.tailwind)) if active)
+
+
+class SpeedComparison(NamedTuple):
+    """
+    The Pokémon that move after (outsped), at the same time as (tied), or before (outspeeding) a Pokémon, each in
+    the order that they move.
+    """
+    outsped: list[PokemonData]
+    tied: list[PokemonData]
+    outspeeding: list[PokemonData]
+
+
+class SpeedTierIndex:
+    """
+    The speed stat of each Pokémon for each spread preset and level, sorted so that comparisons against them are
+    made in logarithmic time.
+    """
+
+    def __init__(self, data: Iterable[PokemonData], levels: Iterable[int] = (50, 100),
+                 presets: Iterable[SpreadPreset] = tuple(SpreadPreset)):
+        """
+        :param data: The Pokémon to index (eg. a PokemonDataMap)
+        :param levels: The levels to index the speed stats at
+        :param presets: The spread presets to index the speed stats with
+        """
+        self.data: list[PokemonData] = list(data)
+        bases = np.fromiter((d.stats.get_stat(Stat.SPEED) for d in self.data), dtype=np.int64, count=len(self.data))
+        # For each level and preset, the ascending speed stats, and the Pokémon with each of them
+        self.tiers: dict[tuple[int, SpreadPreset], tuple[list[int], list[PokemonData]]] = dict()
+        for level in levels:
+            for preset in presets:
+                ev, iv, nature_mod = PRESET_SPREADS[preset]
+                speeds = get_stat_values_batch(Stat.SPEED, bases, ev, iv, level, nature_mod)
+                order = np.argsort(speeds, kind="stable")
+                self.tiers[(level, preset)] = (speeds[order].tolist(), [self.data[i] for i in order.tolist()])
+
+    def get_tier(self, level: int = 50, preset: SpreadPreset = SpreadPreset.MAX_POSITIVE) \
+            -> tuple[Sequence[int], Sequence[PokemonData]]:
+        """
+        Gets the ascending speed stats of the indexed Pokémon with the given level and spread preset, along with the
+        Pokémon with each of them.
+
+        :raises ValueError: Raises an error if the level and spread preset were not indexed
+        """
+        try:
+            return self.tiers[(level, preset)]
+        except KeyError:
+            raise ValueError(f"Speed tiers are not indexed for level {level} with preset {preset}")
+
+    def compare(self, speed: int, level: int = 50, preset: SpreadPreset = SpreadPreset.MAX_POSITIVE,
+                modifiers: SpeedModifiers = SpeedModifiers(),
+                opponent_modifiers: SpeedModifiers = SpeedModifiers(),
+                trick_room: bool = False) -> SpeedComparison:
+        """
+        Compares the given speed stat against every indexed Pokémon with the given level and spread preset.
+
+        :param speed: The speed stat, before any in-battle effects
+        :param level: The level of the indexed Pokémon to compare against
+        :param preset: The spread preset of the indexed Pokémon to compare against
+        :param modifiers: The in-battle effects on the given speed stat
+        :param opponent_modifiers: The in-battle effects on the speed stats of all of the indexed Pokémon
+        :param trick_room: If True, slower Pokémon move first
+        :return: The indexed Pokémon that the given speed stat outspeeds, ties and is outsped by
+        :raises ValueError: Raises an error if the level and spread preset were not indexed
+        """
+        speeds, pokemon = self.get_tier(level, preset)
+        speed = modifiers.apply(speed)
+        # Effects on the opponents never change the order of their speeds, so they can still be searched in order
+        key = opponent_modifiers.apply if opponent_modifiers != SpeedModifiers() else None
+        low = bisect_left(speeds, speed, key=key)
+        high = bisect_right(speeds, speed, key=key, lo=low)
+        slower, tied, faster = pokemon[:low], pokemon[low:high], pokemon[high:]
+        if trick_room:
+            return SpeedComparison(outsped=faster, tied=tied, outspeeding=slower)
+        return SpeedComparison(outsped=slower[::-1], tied=tied, outspeeding=faster[::-1])
+
+    def compare_stats(self, stats: Stats, level: int = 50, preset: SpreadPreset = SpreadPreset.MAX_POSITIVE,
+                      modifiers: SpeedModifiers = SpeedModifiers(),
+                      opponent_modifiers: SpeedModifiers = SpeedModifiers(),
+                      trick_room: bool = False) -> SpeedComparison:
+        """
+        Compares the speed stat of the given stat information against every indexed Pokémon.  See compare().
+        """
+        return self.compare(get_stat_value_from_info(stats, Stat.SPEED), level=level, preset=preset,
+                            modifiers=modifiers, opponent_modifiers=opponent_modifiers, trick_room=trick_room)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+from SprelfPkmn.Calculations.Stats import get_evs_from_value, get_internal_sum_range
+from SprelfPkmn.Objects import Stat, Stats, BaseStats, Nature, EV, IV, StatError, StatTemplate, \
+    ORDERED_NUMBER_STATS, EV_MAX, EV_TOTAL_MAX, IV_MAX, NATURES
+
+from typing import Iterable, Iterator, NamedTuple
+
+_ALL_NATURES = (1 << len(NATURES)) - 1
+_EV_STEPS = EV_MAX // 4 + 1
+_ALL_EV_STEPS = (1 << _EV_STEPS) - 1
+
+
+class SpreadSolution(NamedTuple):
+    """
+    A single complete spread (nature, EVs and IVs) that is consistent with a set of observed stat values.
+    EVs and IVs are given in the order of ORDERED_NUMBER_STATS.
+    """
+    nature: Nature
+    evs: tuple[int, ...]
+    ivs: tuple[int, ...]
+
+    def get_ev(self, stat: Stat) -> int:
+        return self.evs[ORDERED_NUMBER_STATS.index(stat)]
+
+    def get_iv(self, stat: Stat) -> int:
+        return self.ivs[ORDERED_NUMBER_STATS.index(stat)]
+
+    def to_stats(self, base: BaseStats, level: int) -> Stats:
+        return Stats.from_values(base=base, evs=self.evs, ivs=self.ivs, level=level, nature=self.nature)
+
+
+class SpreadSolutionSet(NamedTuple):
+    """
+    All of the spreads consistent with a set of observed stat values for one particular nature, in compact form.
+    For each stat (in the order of ORDERED_NUMBER_STATS), the options are pairs of an IV value and the range of
+    EV values that are possible alongside that IV.  A spread is made by choosing one EV and IV for every stat, such
+    that the total EVs do not exceed the EV total.
+    """
+    nature: Nature
+    options: tuple[tuple[tuple[int, range], ...], ...]
+    ev_total: int = EV_TOTAL_MAX
+
+    def __iter__(self) -> Iterator[SpreadSolution]:
+        return iter(self.solutions())
+
+    def __contains__(self, solution: SpreadSolution) -> bool:
+        return isinstance(solution, SpreadSolution) and solution.nature == self.nature and \
+            sum(solution.evs) <= self.ev_total and \
+            all(any(iv == solution.ivs[i] and solution.evs[i] in evs for iv, evs in self.options[i])
+                for i in range(len(self.options)))
+
+    def get_ivs(self, stat: Stat) -> list[int]:
+        return [iv for iv, _ in self.options[ORDERED_NUMBER_STATS.index(stat)]]
+
+    def get_evs(self, stat: Stat) -> list[int]:
+        return sorted({ev for _, evs in self.options[ORDERED_NUMBER_STATS.index(stat)] for ev in evs})
+
+    def count(self) -> int:
+        """
+        The number of complete spreads in this solution set, counted without enumerating them.
+        """
+        # ways[n] is the number of ways to choose the stats seen so far using exactly n EV steps (EVs // 4)
+        ways = [1] + [0] * (self.ev_total // 4)
+        for option in self.options:
+            per_step = [0] * (EV_MAX // 4 + 1)
+            for _, evs in option:
+                for ev in evs:
+                    per_step[ev // 4] += 1
+            ways = [sum(ways[n - step] * c for step, c in enumerate(per_step) if c and step <= n)
+                    for n in range(len(ways))]
+        return sum(ways)
+
+    def solutions(self) -> Iterable[SpreadSolution]:
+        """
+        Lazily enumerates every complete spread in this solution set.
+        """
+        min_evs = [min(evs.start for _, evs in option) for option in self.options]
+        min_remaining = [sum(min_evs[i:]) for i in range(len(min_evs) + 1)]
+        for evs, ivs in _search_spreads(self.options, min_remaining, 0, self.ev_total):
+            yield SpreadSolution(nature=self.nature, evs=evs, ivs=ivs)
+
+    def to_stats(self, base: BaseStats, level: int) -> list[Stats]:
+        """
+        Builds the stats of every complete spread in this solution set.  The spreads are only ever built from
+        valid EV and IV ranges, so they are not validated again.
+        """
+        return [Stats.from_values(base=base, evs=solution.evs, ivs=solution.ivs, level=level, nature=self.nature,
+                                  validate=False)
+                for solution in self.solutions()]
+
+
+#
+
+
+def infer_spreads(values: dict[Stat, int], level: int, base: BaseStats | None = None,
+                  natures: Iterable[Nature] | None = None,
+                  ev_total: int = EV_TOTAL_MAX) -> Iterable[SpreadSolutionSet]:
+    """
+    Reverse engineer every spread (nature, EVs and IVs) that results in all six of the given observed
+    stat values at once.  The nature is shared across all stats, and the total number of EVs is capped.
+
+    Rather than enumerating every combination, each stat's formula is inverted into a range of EVs for each IV,
+    which is solved only once per nature modifier.  The EV cap is then propagated between stats, so that options
+    which cannot fit alongside the minimum investment of the other stats are pruned, as are natures for which any
+    stat has no remaining options.
+
+    :param values: The observed numerical values of all six stats
+    :param level: The level of the Pokémon
+    :param base: Optional.  The base stats of the Pokémon (eg. from PokemonData.stats).  If not given, each base
+    stat is treated as unknown, such that any EVs that are possible with some base stat value remain possible.
+    :param natures: Optional.  The natures to consider.  Defaults to all natures.
+    :param ev_total: Optional.  The maximum total number of EVs across all stats.  Defaults to EV_TOTAL_MAX.
+    :return: A lazy generator for one compact solution set per consistent nature.  Each of these can be
+    iterated for its individual spreads.
+    :raises StatError: Raises an error if any of the six stat values are missing, or if the level is invalid
+    """
+    if any(s not in values for s in ORDERED_NUMBER_STATS):
+        raise StatError(f"Observed values are required for all stats: {values}")
+    if not (1 <= level <= 100):
+        raise StatError(f"Invalid level: {level}")
+    natures = list(natures) if natures is not None else NATURES
+
+    # Every stat only depends on the nature through its modifier, so each stat's options are
+    # shared between all natures that modify it the same way
+    option_cache: dict[tuple[Stat, int], tuple[tuple[int, range], ...]] = dict()
+
+    def _get_options(stat: Stat, nature: Nature) -> tuple[tuple[int, range], ...]:
+        key = (stat, nature.get_modifier_tenths(stat))
+        if key not in option_cache:
+            option_cache[key] = tuple((iv, evs) for iv in range(0, IV_MAX + 1)
+                                      if len(evs := _get_evs(stat, base, iv, level, nature, values[stat])) > 0)
+        return option_cache[key]
+
+    for nature in natures:
+        options = [_get_options(stat, nature) for stat in ORDERED_NUMBER_STATS]
+        if any(len(o) == 0 for o in options):
+            continue
+
+        min_evs = [min(evs.start for _, evs in o) for o in options]
+        if sum(min_evs) > ev_total:
+            continue
+
+        yield SpreadSolutionSet(nature=nature,
+                                options=tuple(_cap_options(o, max_ev)
+                                              for o, max_ev in zip(options, _get_max_evs(min_evs, ev_total))),
+                                ev_total=ev_total)
+
+
+def _get_evs(stat: Stat, base: BaseStats | None, iv: int, level: int, nature: Nature, value: int) -> range:
+    if base is not None:
+        return get_evs_from_value(stat=stat, base=base.get_stat(stat), iv=iv, level=level, nature=nature,
+                                  value=value)
+
+    # With an unknown base stat, the EV steps (EVs // 4) only need to fit some base stat between 1 and 255
+    sums = get_internal_sum_range(stat, level, nature, value)
+    if len(sums) == 0:
+        return range(0)
+    lower = max(0, sums.start - 2 * 255 - iv)
+    upper = min(EV_MAX // 4, sums.stop - 1 - 2 - iv)
+    if len(sums) == 1:
+        # 2 * base is always even, so a single possible sum fixes the parity of the EV steps
+        lower += (sums.start - iv - lower) % 2
+        return range(lower * 4, (upper + 1) * 4, 8)
+    return range(lower * 4, (upper + 1) * 4, 4)
+
+
+def _get_max_evs(min_evs: list[int], ev_total: int) -> list[int]:
+    # Each stat can use at most whatever EVs the other stats leave over at their minimum
+    spare = ev_total - sum(min_evs)
+    return [min_ev + spare for min_ev in min_evs]
+
+
+def _cap_options(options: tuple[tuple[int, range], ...], max_ev: int) -> tuple[tuple[int, range], ...]:
+    return tuple((iv, evs[:(max_ev - evs.start) // evs.step + 1]) for iv, evs in options
+                 if evs.start <= max_ev)
+
+
+def _search_spreads(options: tuple[tuple[tuple[int, range], ...], ...], min_remaining: list[int], index: int,
+                    budget: int) -> Iterable[tuple[tuple[int, ...], tuple[int, ...]]]:
+    if index == len(options):
+        yield (), ()
+        return
+    limit = budget - min_remaining[index + 1]
+    for iv, evs in options[index]:
+        for ev in evs:
+            if ev > limit:
+                break
+            for rest_evs, rest_ivs in _search_spreads(options, min_remaining, index + 1, budget - ev):
+                yield (ev,) + rest_evs, (iv,) + rest_ivs
+
+
+#
+
+
+class SpreadInference:
+    """
+    Incrementally narrows down the possible spread (nature, EVs and IVs) of a single Pokémon with known base stats,
+    from stat values that are observed one at a time, potentially at different levels or across EV gains.
+
+    For every stat and every nature modifier on that stat, the possible EVs for each remaining IV are stored as a
+    bitmask of EV steps (EVs // 4), and the possible natures are stored as a bitmask as well.  Each observation
+    narrows these domains in place, at a cost proportional to the candidates that remain, and the nature and
+    total EV constraints are then propagated between stats.
+    """
+
+    def __init__(self, base: BaseStats, natures: Iterable[Nature] | None = None, ev_total: int = EV_TOTAL_MAX):
+        """
+        :param base: The base stats of the Pokémon (eg. from PokemonData.stats)
+        :param natures: Optional.  The natures to consider.  Defaults to all natures.
+        :param ev_total: Optional.  The maximum total number of EVs across all stats.  Defaults to EV_TOTAL_MAX.
+        """
+        self.base = base
+        self.ev_total = ev_total
+        natures = set(natures) if natures is not None else None
+        self._natures = _ALL_NATURES if natures is None else \
+            sum(1 << i for i, n in enumerate(NATURES) if n in natures)
+        self._domains: dict[Stat, dict[int, dict[int, int]]] = {
+            stat: {tenths: {iv: _ALL_EV_STEPS for iv in range(IV_MAX + 1)}
+                   for tenths in self._get_modifier_tenths(stat)}
+            for stat in ORDERED_NUMBER_STATS
+        }
+        self._propagate()
+
+    def observe(self, stat: Stat, value: int, level: int) -> SpreadInference:
+        """
+        Narrows the possible spreads down to those that result in the given stat value at the given level.
+
+        :param stat: The stat that was observed (eg. ATTACK, HP)
+        :param value: The observed numerical value of the stat
+        :param level: The level of the Pokémon at the time of the observation
+        :return: This object, for chaining
+        :raises StatError: Raises an error if the specified stat does not have a numerical value,
+        or if the level is invalid.
+        """
+        StatError.check_number_stat(stat)
+        if not (1 <= level <= 100):
+            raise StatError(f"Invalid level: {level}")
+        double_base = 2 * self.base.get_stat(stat)
+        for tenths, by_iv in self._domains[stat].items():
+            sums = get_internal_sum_range(stat, level, _get_representative_nature(stat, tenths), value)
+            for iv in list(by_iv.keys()):
+                steps = by_iv[iv] & _get_step_mask(sums.start - double_base - iv, sums.stop - 1 - double_base - iv)
+                if steps:
+                    by_iv[iv] = steps
+                else:
+                    del by_iv[iv]
+        self._propagate()
+        return self
+
+    def gain_evs(self, stat: Stat, amount: int | None = None) -> SpreadInference:
+        """
+        Accounts for the Pokémon having gained EVs in the given stat since the previous observations.
+
+        :param stat: The stat that EVs were gained in
+        :param amount: Optional.  The number of EVs gained.  If not given, the gain is treated as unknown,
+        such that any number of EVs at least as high as before remains possible.
+        :return: This object, for chaining
+        """
+        StatError.check_number_stat(stat)
+        for by_iv in self._domains[stat].values():
+            for iv, steps in by_iv.items():
+                by_iv[iv] = _shift_steps(steps, amount)
+        self._propagate()
+        return self
+
+    def is_consistent(self) -> bool:
+        """
+        Whether any spread remains that is consistent with every observation so far.
+        """
+        return self._natures != 0
+
+    def get_natures(self) -> list[Nature]:
+        return [n for i, n in enumerate(NATURES) if self._natures >> i & 1]
+
+    def get_ivs(self, stat: Stat) -> list[int]:
+        return sorted({iv for by_iv in self._domains[stat].values() for iv in by_iv.keys()})
+
+    def get_evs(self, stat: Stat) -> list[int]:
+        steps = 0
+        for by_iv in self._domains[stat].values():
+            for s in by_iv.values():
+                steps |= s
+        return [i * 4 for i in range(_EV_STEPS) if steps >> i & 1]
+
+    def to_stat_template(self, stat: Stat) -> StatTemplate:
+        """
+        Summarizes the remaining possibilities for the given stat as a StatTemplate.  Note that the template
+        treats each of its restrictions independently, so it may include combinations that were ruled out.
+        """
+        return StatTemplate(stat=stat, base=self.base.get_stat(stat), ev=self.get_evs(stat), iv=self.get_ivs(stat),
+                            nature=[n for n in self.get_natures()
+                                    if n.get_modifier_tenths(stat) in self._domains[stat]])
+
+    def _get_modifier_tenths(self, stat: Stat) -> set[int]:
+        return {n.get_modifier_tenths(stat) for i, n in enumerate(NATURES) if self._natures >> i & 1}
+
+    def _propagate(self):
+        changed = True
+        while changed:
+            changed = False
+
+            # A nature remains possible only while every stat has options left for that nature's modifier
+            for i, nature in enumerate(NATURES):
+                if self._natures >> i & 1 and \
+                        any(not self._domains[s].get(nature.get_modifier_tenths(s)) for s in ORDERED_NUMBER_STATS):
+                    self._natures &= ~(1 << i)
+            for stat, domain in self._domains.items():
+                remaining = self._get_modifier_tenths(stat)
+                for tenths in [t for t in domain.keys() if t not in remaining]:
+                    del domain[tenths]
+
+            if not self.is_consistent():
+                return
+
+            min_evs = [4 * min(_lowest_step(s) for by_iv in domain.values() for s in by_iv.values())
+                       for domain in self._domains.values()]
+            for domain, max_ev in zip(self._domains.values(), _get_max_evs(min_evs, self.ev_total)):
+                cap = _get_step_mask(0, max_ev // 4)
+                for by_iv in domain.values():
+                    for iv in list(by_iv.keys()):
+                        if by_iv[iv] & ~cap:
+                            changed = True
+                            if by_iv[iv] & cap:
+                                by_iv[iv] &= cap
+                            else:
+                                del by_iv[iv]
+
+
+def _get_representative_nature(stat: Stat, tenths: int) -> Nature:
+    return Nature.build_boosting(stat) if tenths > 10 else \
+        Nature.build_hindering(stat) if tenths < 10 else Nature.build_neutral()
+
+
+def _get_step_mask(lower: int, upper: int) -> int:
+    lower = max(0, lower)
+    upper = min(_EV_STEPS - 1, upper)
+    if upper < lower:
+        return 0
+    return ((1 << (upper + 1)) - 1) & ~((1 << lower) - 1)
+
+
+def _lowest_step(steps: int) -> int:
+    return (steps & -steps).bit_length() - 1
+
+
+def _shift_steps(steps: int, amount: int | None) -> int:
+    if amount is None:
+        return _ALL_EV_STEPS & ~((1 << _lowest_step(steps)) - 1)
+    shifted = steps << (amount // 4)
+    if amount % 4 != 0:
+        # The exact EVs within each step are unknown, so a partial step may or may not carry over
+        shifted |= shifted << 1
+    if shifted >> _EV_STEPS:
+        shifted = (shifted & _ALL_EV_STEPS) | (1 << (_EV_STEPS - 1))
+    return shifted
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from SprelfPkmn.Objects import Stat, Nature, StatError, EV_MAX, IV_MAX
+
+from os import PathLike
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# The stat formula only depends on the base stat, EVs and IVs through the sum (2 * base) + IV + (EV // 4)
+MAX_INTERNAL_SUM = 2 * 255 + IV_MAX + EV_MAX // 4
+MAX_LEVEL = 100
+_NATURE_TENTHS = (9, 10, 11)
+
+
+class StatTable:
+    """
+    A precomputed table of every possible numerical stat value, which can be saved to a binary file and then
+    memory-mapped, so that many processes can share the same table without rebuilding or parsing it.
+
+    Since the stat formula only depends on the base stat, EVs and IVs through their weighted sum
+    (2 * base) + IV + (EV // 4), the table is indexed by [is HP][level][nature modifier][sum] rather than by
+    each of those values separately.  Lookups are pure indexing, and since stat values are monotonic in the sum,
+    inverse lookups are binary searches over a single row.
+
+    Lookups only check that the level and the internal sum are within the table, so that out of bounds values fail
+    rather than wrapping around to the other end of the table.  They are otherwise only meaningful for stat
+    information within the valid bounds.
+    """
+    __slots__ = ("table",)
+
+    def __init__(self, table: np.ndarray):
+        expected_shape = (2, MAX_LEVEL, len(_NATURE_TENTHS), MAX_INTERNAL_SUM + 1)
+        if table.shape != expected_shape:
+            raise StatError(f"Invalid stat table shape: {table.shape}, expected {expected_shape}")
+        self.table = table
+
+    @classmethod
+    def build(cls, path: str | PathLike | None = None) -> StatTable:
+        """
+        Calculates the full stat table.
+
+        :param path: Optional.  If given, the table is written to this file (in .npy format), and the returned table
+        is memory-mapped from it.
+        :return: The calculated stat table
+        """
+        sums = np.arange(MAX_INTERNAL_SUM + 1, dtype=np.int32)
+        levels = np.arange(1, MAX_LEVEL + 1, dtype=np.int32)[:, np.newaxis]
+        internal = (sums * levels) // 100
+
+        table = np.empty((2, MAX_LEVEL, len(_NATURE_TENTHS), MAX_INTERNAL_SUM + 1), dtype=np.int16)
+        for i, tenths in enumerate(_NATURE_TENTHS):
+            # https://bulbapedia.bulbagarden.net/wiki/Statistic#Determination_of_stats
+            table[0, :, i] = ((internal + 5) * tenths) // 10
+            table[1, :, i] = internal + levels + 10
+
+        if path is None:
+            return cls(table)
+        np.save(path, table, allow_pickle=False)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str | PathLike) -> StatTable:
+        """
+        Memory-maps a stat table from a file written by build().  The file is not read until it is used.
+
+        :param path: The path of the stat table file
+        :return: The memory-mapped stat table
+        """
+        return cls(np.load(path, mmap_mode="r", allow_pickle=False))
+
+    #
+
+    def get_stat_value(self, stat: Stat, base: int, ev: int, iv: int, level: int, nature: Nature) -> int:
+        """
+        Looks up the numerical stat value of the specified stat based on the given stat information.
+        See Calculations.Stats.get_stat_value().
+        """
+        internal_sum = 2 * base + iv + ev // 4
+        _check_level(level)
+        if not 0 <= internal_sum <= MAX_INTERNAL_SUM:
+            raise StatError(f"Invalid stat information: base {base}, EVs {ev}, IVs {iv}")
+        return int(self.table[int(stat == Stat.HP), level - 1, _get_nature_index(stat, nature), internal_sum])
+
+    def get_stat_values(self, stat: Stat, bases: ArrayLike, evs: ArrayLike, ivs: ArrayLike, levels: ArrayLike,
+                        nature_tenths: ArrayLike) -> np.ndarray:
+        """
+        Looks up the numerical stat values of the specified stat for many combinations of stat information at once.
+        All of the given arrays are broadcast against each other.
+
+        :param stat: The stat to look up the values of (eg. ATTACK, HP)
+        :param bases: The base stat values for the specified stat
+        :param evs: The EVs invested into the specified stat
+        :param ivs: The IVs for the specified stat
+        :param levels: The levels of the Pokémon
+        :param nature_tenths: The nature modifiers for the specified stat, in tenths (9, 10 or 11)
+        :return: An integer array, in the broadcast shape of the given arrays, of the stat values
+        :raises StatError: Raises an error if any of the levels or internal sums are outside of the table
+        """
+        sums = np.asarray(bases) * 2 + np.asarray(ivs) + np.asarray(evs) // 4
+        levels = np.asarray(levels)
+        if sums.size and (sums.min() < 0 or sums.max() > MAX_INTERNAL_SUM):
+            raise StatError(f"Invalid stat information, with internal sums outside of [0, {MAX_INTERNAL_SUM}]")
+        if levels.size and (levels.min() < 1 or levels.max() > MAX_LEVEL):
+            raise StatError(f"Invalid levels, outside of [1, {MAX_LEVEL}]")
+        nature_index = np.asarray(nature_tenths) - 9 if stat != Stat.HP else 1
+        return self.table[int(stat == Stat.HP), levels - 1, nature_index, sums]
+
+    #
+
+    def get_internal_sum_range(self, stat: Stat, level: int, nature: Nature, value: int) -> range:
+        """
+        Looks up the possible values of (2 * base) + IV + (EV // 4) that result in the given numerical stat value,
+        based on the given level and nature.
+        """
+        _check_level(level)
+        row = self.table[int(stat == Stat.HP), level - 1, _get_nature_index(stat, nature)]
+        return range(int(np.searchsorted(row, value, side="left")),
+                     int(np.searchsorted(row, value, side="right")))
+
+    def get_base_stat_from_value(self, stat: Stat, ev: int, iv: int, level: int, nature: Nature,
+                                 value: int) -> range:
+        """
+        Looks up the possible base stat values based on the given stat information and numerical stat value.
+        See Calculations.Stats.get_base_stat_from_value().
+        """
+        low, high = self._get_remaining_bounds(stat, level, nature, value, iv + ev // 4)
+        return range(max(1, -(-low // 2)), min(255, high // 2) + 1)
+
+    def get_evs_from_value(self, stat: Stat, base: int, iv: int, level: int, nature: Nature, value: int) -> range:
+        """
+        Looks up the possible EV values based on the given stat information and numerical stat value.
+        See Calculations.Stats.get_evs_from_value().
+        """
+        low, high = self._get_remaining_bounds(stat, level, nature, value, 2 * base + iv)
+        return range(max(0, low) * 4, (min(EV_MAX // 4, high) + 1) * 4, 4)
+
+    def get_ivs_from_value(self, stat: Stat, base: int, ev: int, level: int, nature: Nature, value: int) -> range:
+        """
+        Looks up the possible IV values based on the given stat information and numerical stat value.
+        See Calculations.Stats.get_ivs_from_value().
+        """
+        low, high = self._get_remaining_bounds(stat, level, nature, value, 2 * base + ev // 4)
+        return range(max(0, low), min(IV_MAX, high) + 1)
+
+    def _get_remaining_bounds(self, stat: Stat, level: int, nature: Nature, value: int,
+                              remainder: int) -> Tuple[int, int]:
+        sums = self.get_internal_sum_range(stat, level, nature, value)
+        if len(sums) == 0:
+            return 0, -1
+        return sums.start - remainder, sums.stop - 1 - remainder
+
+
+def _check_level(level: int):
+    if not 1 <= level <= MAX_LEVEL:
+        raise StatError(f"Invalid level: {level}")
+
+
+def _get_nature_index(stat: Stat, nature: Nature) -> int:
+    return nature.get_modifier_tenths(stat) - 9 if stat != Stat.HP else 1
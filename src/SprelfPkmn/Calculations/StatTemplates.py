@@ -1,68 +1,223 @@
-from SprelfPkmn.Calculations.Stats import get_evs_from_value, get_base_stat_from_value, get_stat_value, \
-    get_ivs_from_value
-from SprelfPkmn.Objects import StatTemplate, EV_MAX, IV_MAX, Nature
+from __future__ import annotations
 
-from typing import Iterable, Callable
+from SprelfPkmn.Calculations.Stats import get_internal_sum_range
+from SprelfPkmn.Objects import Stat, StatTemplate, EV_MAX, IV_MAX, Nature
+
+from typing import Iterable, Callable, NamedTuple, Sequence
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 import itertools
+import math
 
 
-def get_combinations_for_value(stats: StatTemplate, value: int) -> Iterable[StatTemplate]:
+class StatCombinationRange(NamedTuple):
+    """
+    A compact collection of complete stat combinations that all result in the same numerical stat value.  All of
+    the combinations share the same level and nature, and every combination of the given base stat, EV and IV
+    values is included.  At most one of the base stat, EV and IV values holds more than a single value.
+    """
+    stat: Stat
+    base: Sequence[int]
+    ev: Sequence[int]
+    iv: Sequence[int]
+    level: int
+    nature: Nature
+
+    def num_combinations(self) -> int:
+        return len(self.base) * len(self.ev) * len(self.iv)
+
+    def combinations(self) -> Iterable[StatTemplate]:
+        """
+        Lazily materializes each of the complete stat combinations in this range as a StatTemplate.
+        """
+        for base, ev, iv in itertools.product(self.base, self.ev, self.iv):
+            yield StatTemplate(stat=self.stat, base=base, ev=ev, iv=iv, level=self.level, nature=self.nature)
+
+    def to_stat_template(self) -> StatTemplate:
+        """
+        Represents this entire range of stat combinations as a single StatTemplate.
+        """
+        return StatTemplate(stat=self.stat, base=self.base, ev=self.ev, iv=self.iv, level=self.level,
+                            nature=self.nature)
+
+
+#
+
+
+def get_combinations_for_value(stats: StatTemplate, value: int,
+                               max_workers: int | None = None) -> Iterable[StatTemplate]:
     """
     Calculate all possible complete stat combinations that exist within the given stat template which result
     in the given numerical stat value.
 
     :param stats: The stat template to filter the set of all possible stat combinations by
     :param value: The numerical stat value to calculate stat template combinations for
+    :param max_workers: Optional.  If given, the search space is split up and solved in parallel across a pool
+    of this many processes.  Defaults to solving everything in the current process.
     :return: A lazy generator for all possible stat combinations that result in the given numerical stat value,
     restricted by the given stat template.  Stat combinations are represented by StatTemplate objects that are
     considered "complete".
     """
-    evs = stats.ev if stats.ev is not None else range(0, EV_MAX + 1, 4)
-    ivs = stats.iv if stats.iv is not None else range(0, IV_MAX + 1)
-    natures = stats.nature if stats.nature is not None else {Nature.build_boosting(stats.stat),
-                                                             Nature.build_neutral(),
-                                                             Nature.build_hindering(stats.stat)}
-    levels = stats.level if stats.level is not None else (50, 100)
-    bases = stats.base if stats.base is not None else range(0, 256)
-
-    combinations = set()
-
-    # Used to safely yield only when a stat template is unique, by using this in combination with 'yield from'
-    def _yield_unique(st: StatTemplate) -> Iterable[StatTemplate]:
-        if st in combinations:
-            return []
-        combinations.add(st)
-        return [st]
-
-    # Generalizes the reverse-engineering calculation for a particular missing value to calc
-    def _calc_all_combinations(to_calc: str, calc_func: Callable) -> Iterable[StatTemplate]:
-        # This weird stuff with known_keys is to ensure ordering, since dicts are unordered.
-        # There is probably a way to clean this up to be more intuitive.
-        known = {k: v for k, v in (("ev", evs), ("iv", ivs), ("nature", natures), ("level", levels), ("base", bases))
-                 if k != to_calc}
-        known_keys = list(known.keys())
-
-        # This creates a collection of all possible combinations of all of the values in all of the separate
-        # collections of values, as tuples... eg. (ev, iv, nature, level)
-        combos = itertools.product(*(known[k] for k in known_keys))
-        for combo in combos:
-            args = {known_keys[i]: combo_val for i, combo_val in enumerate(combo)}
-            for calc in calc_func(stat=stats.stat, value=value, **args):
-                yield from _yield_unique(StatTemplate(stat=stats.stat, **{**args, to_calc: calc}))
-
-    #
-    if stats.base is None:
-        yield from _calc_all_combinations(to_calc="base", calc_func=get_base_stat_from_value)
-    if stats.ev is None:
-        yield from _calc_all_combinations(to_calc="ev", calc_func=get_evs_from_value)
-    if stats.iv is None:
-        yield from _calc_all_combinations(to_calc="iv", calc_func=get_ivs_from_value)
-
-    if all(x is not None for x in (stats.base, stats.ev, stats.iv)):
-        for base, ev, iv, level, nature in itertools.product(bases, evs, ivs, levels, natures):
-            if get_stat_value(stats.stat, base, ev, iv, level, nature) == value:
-                yield from _yield_unique(StatTemplate(stat=stats.stat, base=base, ev=ev,
-                                                      iv=iv, level=level, nature=nature))
+    for combination_range in get_combination_ranges_for_value(stats, value, max_workers=max_workers):
+        yield from combination_range.combinations()
+
+
+def get_combination_ranges_for_value(stats: StatTemplate, value: int,
+                                     max_workers: int | None = None) -> Iterable[StatCombinationRange]:
+    """
+    Calculate all possible complete stat combinations that exist within the given stat template which result
+    in the given numerical stat value, grouped into compact ranges.  No StatTemplate objects are created.
+
+    :param stats: The stat template to filter the set of all possible stat combinations by
+    :param value: The numerical stat value to calculate stat template combinations for
+    :param max_workers: Optional.  If given, the search space is split up and solved in parallel across a pool
+    of this many processes.  Defaults to solving everything in the current process.
+    :return: A lazy generator for non-overlapping ranges of stat combinations that together include every
+    possible stat combination that results in the given numerical stat value, restricted by the given stat template.
+    """
+    for level, natures, fixed, ranged_values in _solve(stats, value, max_workers):
+        values = {**{k: (v,) for k, v in fixed}, ranged_values[0]: ranged_values[1]}
+        for nature in natures:
+            yield StatCombinationRange(stat=stats.stat, level=level, nature=nature, **values)
+
+
+def count_combinations_for_value(stats: StatTemplate, value: int, max_workers: int | None = None) -> int:
+    """
+    Count all possible complete stat combinations that exist within the given stat template which result
+    in the given numerical stat value, without creating any objects for the individual combinations.
+
+    :param stats: The stat template to filter the set of all possible stat combinations by
+    :param value: The numerical stat value to count stat template combinations for
+    :param max_workers: Optional.  If given, the search space is split up and solved in parallel across a pool
+    of this many processes.  Defaults to solving everything in the current process.
+    :return: The number of possible stat combinations that result in the given numerical stat value,
+    restricted by the given stat template.
+    """
+    return sum(len(natures) * len(ranged_values[1])
+               for _, natures, _, ranged_values in _solve(stats, value, max_workers))
+
+
+#
+
+
+# The weight of each value in the (2 * base) + IV + (EV // 4) sum that the stat formula depends on
+_WEIGHTS: dict[str, Callable[[int], int]] = {
+    "base": lambda b: 2 * b,
+    "ev": lambda e: e // 4,
+    "iv": lambda i: i
+}
+
+
+_Solution = tuple[int, list[Nature], tuple[tuple[str, int], ...], tuple[str, Sequence[int]]]
+
+
+def _solve(stats: StatTemplate, value: int, max_workers: int | None) -> Iterable[_Solution]:
+    if max_workers is None:
+        return _solve_combinations(stats, value)
+    return _solve_combinations_parallel(stats, value, max_workers)
+
+
+def _solve_combinations_parallel(stats: StatTemplate, value: int, max_workers: int) -> Iterable[_Solution]:
+    """
+    Splits the search space into disjoint partitions by level, nature modifier and (if that leaves fewer
+    partitions than workers) chunks of base stat values, and solves each partition in a process pool.
+    Results are streamed back in partition order while later partitions are still being solved.  If iteration
+    stops early, the pool is shut down without waiting for the partitions that are still running.
+    """
+    levels = _get_levels(stats)
+    natures_by_tenths = _get_natures_by_tenths(stats)
+    bases = _get_domain(stats.base, range(1, 256))
+    num_chunks = min(len(bases), math.ceil(max_workers / max(1, len(levels) * len(natures_by_tenths))))
+    chunk_size = max(1, math.ceil(len(bases) / max(1, num_chunks)))
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_solve_partition, stats.stat, value, list(bases[i:i + chunk_size]),
+                                   stats.ev, stats.iv, level, group)
+                   for level in levels
+                   for group in natures_by_tenths.values()
+                   for i in range(0, len(bases), chunk_size)]
+        for future in futures:
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _solve_partition(stat: Stat, value: int, base: list[int], ev: list[int] | None, iv: list[int] | None,
+                     level: int, natures: list[Nature]) -> list[_Solution]:
+    return list(_solve_combinations(StatTemplate(stat=stat, base=base, ev=ev, iv=iv, level=level, nature=natures),
+                                    value))
+
+
+def _solve_combinations(stats: StatTemplate, value: int) -> Iterable[_Solution]:
+    """
+    Finds all possible stat combinations as ranges.  For each level and nature modifier, the stat formula is
+    inverted into an interval of (2 * base) + IV + (EV // 4) sums.  The two smallest of the base stat, EV and IV
+    domains are iterated, with bounds propagated from the interval to skip values that cannot fit, and the
+    matching values of the largest domain are then found by bisection.
+
+    Yields tuples of the level, the natures, the fixed values of the two iterated domains, and the matching
+    values of the largest domain.
+    """
+    domains = {
+        "base": _get_domain(stats.base, range(1, 256)),
+        "ev": _get_domain(stats.ev, range(0, EV_MAX + 1, 4)),
+        "iv": _get_domain(stats.iv, range(0, IV_MAX + 1))
+    }
+    levels = _get_levels(stats)
+    natures_by_tenths = _get_natures_by_tenths(stats)
+
+    outer, inner, ranged = sorted(domains.keys(), key=lambda k: len(domains[k]))
+    if any(len(d) == 0 for d in domains.values()):
+        return
+    bounds = {k: (_WEIGHTS[k](d[0]), _WEIGHTS[k](d[-1])) for k, d in domains.items()}
+
+    for level in levels:
+        for group in natures_by_tenths.values():
+            sums = get_internal_sum_range(stats.stat, level, group[0], value)
+            if len(sums) == 0:
+                continue
+            low, high = sums.start, sums.stop - 1
+            for a in _get_matching(domains[outer], outer,
+                                   low - bounds[inner][1] - bounds[ranged][1],
+                                   high - bounds[inner][0] - bounds[ranged][0]):
+                weight_a = _WEIGHTS[outer](a)
+                for b in _get_matching(domains[inner], inner,
+                                       low - weight_a - bounds[ranged][1],
+                                       high - weight_a - bounds[ranged][0]):
+                    weight_ab = weight_a + _WEIGHTS[inner](b)
+                    matching = _get_matching(domains[ranged], ranged, low - weight_ab, high - weight_ab)
+                    if len(matching) > 0:
+                        yield level, group, ((outer, a), (inner, b)), (ranged, matching)
+
+
+def _get_levels(stats: StatTemplate) -> Sequence[int]:
+    return sorted(level for level in set(stats.level) if 1 <= level <= 100) if stats.level is not None else (50, 100)
+
+
+def _get_natures_by_tenths(stats: StatTemplate) -> dict[int, list[Nature]]:
+    natures = stats.nature if stats.nature is not None else (Nature.build_boosting(stats.stat),
+                                                              Nature.build_neutral(),
+                                                              Nature.build_hindering(stats.stat))
+
+    # The nature only affects the formula through its modifier on this stat
+    natures_by_tenths: dict[int, list[Nature]] = dict()
+    for nature in dict.fromkeys(natures):
+        natures_by_tenths.setdefault(nature.get_modifier_tenths(stats.stat), []).append(nature)
+    return natures_by_tenths
+
+
+def _get_domain(values: list[int] | None, default: range) -> Sequence[int]:
+    if values is None:
+        return default
+    return tuple(sorted(v for v in set(values) if default[0] <= v <= default[-1]))
+
+
+def _get_matching(domain: Sequence[int], key: str, low: int, high: int) -> Sequence[int]:
+    """
+    Selects the values in the given sorted domain whose weight in the stat formula falls within the given bounds
+    """
+    return domain[bisect_left(domain, low, key=_WEIGHTS[key]):bisect_right(domain, high, key=_WEIGHTS[key])]
 
 
 #
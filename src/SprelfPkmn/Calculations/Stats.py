@@ -1,32 +1,41 @@
 from SprelfPkmn.Objects import *
+from SprelfPkmn.Objects.Stats import NATURE_MODIFIERS, STAT_STAGE_RATIOS, ACCURACY_STAGE_RATIOS, \
+    get_stat_stage_ratio
+from SprelfPkmn.Utils.CacheUtils import LRUCache, CacheInfo
 
 import math
-from typing import Iterable, Tuple
+from typing import Iterable, Tuple, NamedTuple
 
+import numpy as np
+from numpy.typing import ArrayLike
 
-def get_stat_value_from_info(stat_info: Stats, stat: Stat) -> int:
+
+def get_stat_value_from_info(stat_info: Stats, stat: Stat, use_cache: bool = True) -> int:
     """
     Calculates the numerical stat value of the specified stat based on the given stat information, including
     base stats, level, EVs, IVs, and nature.
 
     :param stat_info: A collection of stat information to use as the basis for the calculation
     :param stat: The stat to calculate the value of (eg. ATTACK, HP)
+    :param use_cache: If False, the stat cache is bypassed even if it is enabled.  See enable_stat_cache().
     :return: The numerical value of the specified stat based on the given stat information
     :raises StatError: Raises an error if the specified stat does not have a numerical value
     """
     StatError.check_number_stat(stat)
     return get_stat_value(stat=stat,
                           base=stat_info.base.get_stat(stat),
-                          iv=stat_info.ivs[stat],
-                          ev=stat_info.evs[stat],
+                          iv=stat_info.get_iv(stat),
+                          ev=stat_info.get_ev(stat),
                           level=stat_info.level,
-                          nature=stat_info.nature)
+                          nature=stat_info.nature,
+                          use_cache=use_cache)
 
 
 #
 
 
-def get_stat_value(stat: Stat, base: int, ev: int, iv: int, level: int, nature: Nature) -> int:
+def get_stat_value(stat: Stat, base: int, ev: int, iv: int, level: int, nature: Nature,
+                   use_cache: bool = True) -> int:
     """
     Calculates the numerical stat value of the specified stat based on the given stat information
 
@@ -36,10 +45,23 @@ def get_stat_value(stat: Stat, base: int, ev: int, iv: int, level: int, nature:
     :param iv: The IVs for the specified stat
     :param level: The level of the Pokémon
     :param nature: The stat-modifying nature of the Pokémon
+    :param use_cache: If False, the stat cache is bypassed even if it is enabled.  See enable_stat_cache().
     :return: The numerical value of the specified stat based on the given stat information
     :raises StatError: Raises an error if the specified stat does not have a numerical value,
     or if any the given stat information is invalid.
     """
+    if use_cache and _stat_cache is not None:
+        # Only valid stat information is ever cached, so hits are not validated again
+        key = (STAT_INDEXES[stat], base, ev, iv, level, nature.ordinal)
+        value = _stat_cache.get(key)
+        if value is None:
+            value = _calculate_stat_value(stat, base, ev, iv, level, nature)
+            _stat_cache.put(key, value)
+        return value
+    return _calculate_stat_value(stat, base, ev, iv, level, nature)
+
+
+def _calculate_stat_value(stat: Stat, base: int, ev: int, iv: int, level: int, nature: Nature) -> int:
     StatError.check_number_stat(stat)
     if not (0 <= ev <= EV_MAX):
         raise StatError(f"Invalid EV value: {ev}")
@@ -63,8 +85,184 @@ def get_stat_value(stat: Stat, base: int, ev: int, iv: int, level: int, nature:
 #
 
 
+DEFAULT_STAT_CACHE_SIZE = 1 << 16
+
+_stat_cache: LRUCache[int] | None = None
+
+
+def enable_stat_cache(max_size: int = DEFAULT_STAT_CACHE_SIZE):
+    """
+    Turns on caching of the values calculated by get_stat_value() and get_stat_value_from_info(), replacing any
+    existing stat cache.  Caching is off by default.
+
+    :param max_size: The maximum number of stat values to keep before evicting the least recently used
+    :raises ValueError: Raises an error if the maximum size is not positive
+    """
+    global _stat_cache
+    _stat_cache = LRUCache(max_size)
+
+
+def disable_stat_cache():
+    """
+    Turns off caching of stat values, discarding the stat cache
+    """
+    global _stat_cache
+    _stat_cache = None
+
+
+def clear_stat_cache():
+    if _stat_cache is not None:
+        _stat_cache.clear()
+
+
+def get_stat_cache_info() -> CacheInfo | None:
+    """
+    Gets the current counters of the stat cache, or None if stat caching is not enabled
+    """
+    return _stat_cache.info() if _stat_cache is not None else None
+
+
+#
+
+
+def get_stat_values_batch(stat: Stat, bases: ArrayLike, evs: ArrayLike, ivs: ArrayLike, levels: ArrayLike,
+                          nature_mods: ArrayLike) -> np.ndarray:
+    """
+    Calculates the numerical stat values of the specified stat for many combinations of stat information at once.
+    All of the given arrays are broadcast against each other, and the results are identical to calling
+    get_stat_value() for each element individually.
+
+    :param stat: The stat to calculate the values of (eg. ATTACK, HP)
+    :param bases: The base stat values for the specified stat
+    :param evs: The EVs invested into the specified stat
+    :param ivs: The IVs for the specified stat
+    :param levels: The levels of the Pokémon
+    :param nature_mods: The nature modifiers (0.9, 1 or 1.1) for the specified stat.  These are ignored for HP,
+    which is never affected by nature.  See get_nature_modifiers().
+    :return: An integer array, in the broadcast shape of the given arrays, of the calculated stat values
+    :raises StatError: Raises an error if the specified stat does not have a numerical value,
+    or if any of the given stat information is invalid.
+    """
+    StatError.check_number_stat(stat)
+    bases, evs, ivs, levels = (np.asarray(a, dtype=np.int64) for a in (bases, evs, ivs, levels))
+    nature_mods = np.asarray(nature_mods, dtype=np.float64)
+    bases, evs, ivs, levels, nature_mods = np.broadcast_arrays(bases, evs, ivs, levels, nature_mods)
+
+    _check_batch_bounds(evs, 0, EV_MAX, "Invalid EV value")
+    _check_batch_bounds(ivs, 0, IV_MAX, "Invalid IV value")
+    _check_batch_bounds(levels, 1, 100, "Invalid level")
+    _check_batch_bounds(bases, 1, 255, "Invalid base stat")
+
+    internal = ((bases * 2 + ivs + evs // 4) * levels) // 100
+    if stat == Stat.HP:
+        return internal + levels + 10
+
+    invalid = ~np.isin(nature_mods, (0.9, 1, 1.1))
+    if invalid.any():
+        raise StatError(f"Invalid nature modifier: {nature_mods[invalid][0]}")
+    return np.floor((internal + 5) * nature_mods).astype(np.int64)
+
+
+def get_nature_modifiers(stat: Stat, natures: Iterable[Nature]) -> np.ndarray:
+    """
+    Builds an array of the modifiers that each of the given natures applies to the specified stat, suitable
+    for passing to get_stat_values_batch().
+
+    :param stat: The stat to get the nature modifiers for (eg. ATTACK, HP)
+    :param natures: The natures to get the modifiers of
+    :return: A float array with one modifier per given nature
+    """
+    ordinals = np.fromiter((n.ordinal for n in natures), dtype=np.intp)
+    if stat not in NUMBER_STATS:
+        return np.ones(len(ordinals), dtype=np.float64)
+    return NATURE_MODIFIERS[ordinals, ORDERED_NUMBER_STATS.index(stat)]
+
+
+def _check_batch_bounds(values: np.ndarray, minimum: int, maximum: int, message: str):
+    invalid = (values < minimum) | (values > maximum)
+    if invalid.any():
+        raise StatError(f"{message}: {values[invalid][0]}")
+
+
+#
+
+
+def apply_stat_stage(stat: Stat, value: int, stage: int) -> int:
+    """
+    Applies the given stat stage to a raw stat value, rounding down as the games do
+
+    :param stat: The stat the stage applies to (eg. ATTACK, ACCURACY)
+    :param value: The raw stat value
+    :param stage: The stat stage, from -6 to +6
+    :return: The stat value with the stat stage applied
+    :raises StatError: Raises an error if the stat cannot have its value modified by stat stages,
+    or if the stage is out of bounds
+    """
+    numerator, denominator = get_stat_stage_ratio(stat, stage)
+    return value * numerator // denominator
+
+
+def get_stat_stage_multiplier(stat: Stat, stage: int) -> float:
+    """
+    Looks up the multiplier of the given stat stage, for scaling float stat values
+
+    :param stat: The stat the stage applies to (eg. ATTACK, ACCURACY)
+    :param stage: The stat stage, from -6 to +6
+    :return: The multiplier of the stat stage
+    :raises StatError: Raises an error if the stat cannot have its value modified by stat stages,
+    or if the stage is out of bounds
+    """
+    numerator, denominator = get_stat_stage_ratio(stat, stage)
+    return numerator / denominator
+
+
+def apply_stat_stages(values: ArrayLike, stages: ArrayLike, accuracy: bool = False) -> np.ndarray:
+    """
+    Applies stat stages to many raw stat values at once.  The given arrays are broadcast against each other, and the
+    results are identical to calling apply_stat_stage() for each element individually.
+
+    :param values: The raw stat values
+    :param stages: The stat stages, from -6 to +6
+    :param accuracy: If True, the stages are accuracy or evasion stages.  Otherwise, they are stages of any
+    other stat with a numerical value (besides HP).
+    :return: An integer array, in the broadcast shape of the given arrays, of the stat values with the stages applied
+    :raises StatError: Raises an error if any of the stages are out of bounds
+    """
+    table = _get_stat_stage_table(stages, accuracy)
+    return np.asarray(values, dtype=np.int64) * table[..., 0] // table[..., 1]
+
+
+def get_stat_stage_multipliers(stages: ArrayLike, accuracy: bool = False) -> np.ndarray:
+    """
+    Looks up the multipliers of many stat stages at once, for scaling arrays of float stat values.  The results are
+    identical to calling get_stat_stage_multiplier() for each element individually.
+
+    :param stages: The stat stages, from -6 to +6
+    :param accuracy: If True, the stages are accuracy or evasion stages.  Otherwise, they are stages of any
+    other stat with a numerical value (besides HP).
+    :return: A float array, in the shape of the given stages, of the multiplier of each stage
+    :raises StatError: Raises an error if any of the stages are out of bounds
+    """
+    table = _get_stat_stage_table(stages, accuracy)
+    return table[..., 0] / table[..., 1]
+
+
+def _get_stat_stage_table(stages: ArrayLike, accuracy: bool) -> np.ndarray:
+    stages = np.asarray(stages, dtype=np.int64)
+    _check_batch_bounds(stages, STAT_STAGE_MIN, STAT_STAGE_MAX, "Invalid stat modifier")
+    return (_ACCURACY_STAGE_TABLE if accuracy else _STAT_STAGE_TABLE)[stages - STAT_STAGE_MIN]
+
+
+# The integer ratios of each stat stage, indexed by the stage minus STAT_STAGE_MIN
+_STAT_STAGE_TABLE = np.array(STAT_STAGE_RATIOS, dtype=np.int64)
+_ACCURACY_STAGE_TABLE = np.array(ACCURACY_STAGE_RATIOS, dtype=np.int64)
+
+
+#
+
+
 def get_base_stat_from_value(stat: Stat, ev: int, iv: int, level: int, nature: Nature,
-                             value: int) -> Iterable[int]:
+                             value: int) -> range:
     """
     With the given numerical stat value, reverse engineer the possible base stat values of the Pokémon based
     on the other given stat information.
@@ -75,28 +273,18 @@ def get_base_stat_from_value(stat: Stat, ev: int, iv: int, level: int, nature: N
     :param level: The level of the Pokémon
     :param nature: The stat-modifying nature of the Pokémon
     :param value: The final numerical value of the stat to reverse-engineer
-    :return: A lazy generator for all of the possible base stat values based on the given stat information
+    :return: The contiguous range of all of the possible base stat values based on the given stat information
     """
-    bases = set()
-
-    ev = ev // 4
-
-    for y in _get_internal_formula_value(stat, level, nature, value):
-        lower_bound = math.ceil((-iv - ev + ((100 / level) * y)) / 2)
-        upper_bound = math.ceil((-iv - ev + ((100 / level) * (y + 1))) / 2)
-        lower_bound = max(1, lower_bound)
-        upper_bound = min(256, upper_bound)
-
-        for b in range(lower_bound, upper_bound):
-            if b not in bases:
-                bases.add(b)
-                yield b
+    sums = get_internal_sum_range(stat, level, nature, value)
+    remainder = iv + ev // 4
+    return range(max(1, _ceil_div(sums.start - remainder, 2)),
+                 min(255, (sums.stop - 1 - remainder) // 2) + 1)
 
 
 #
 
 
-def get_evs_from_value(stat: Stat, base: int, iv: int, level: int, nature: Nature, value: int) -> Iterable[int]:
+def get_evs_from_value(stat: Stat, base: int, iv: int, level: int, nature: Nature, value: int) -> range:
     """
     With the given numerical stat value, reverse engineer the possible EV values of the Pokémon based
     on the other given stat information.
@@ -107,26 +295,19 @@ def get_evs_from_value(stat: Stat, base: int, iv: int, level: int, nature: Natur
     :param level: The level of the Pokémon
     :param nature: The stat-modifying nature of the Pokémon
     :param value: The final numerical value of the stat to reverse-engineer
-    :return: A lazy generator for all of the possible EV values based on the given stat information
+    :return: The range (in steps of 4) of all of the possible EV values based on the given stat information
     """
-    evs = set()
-
-    for y in _get_internal_formula_value(stat, level, nature, value):
-        lower_bound = math.ceil(-(2 * base) - iv + ((100 / level) * y))
-        upper_bound = math.ceil(-(2 * base) - iv + ((100 / level) * (y + 1)))
-        lower_bound = max(0, lower_bound)
-        upper_bound = min((EV_MAX // 4) + 1, upper_bound)
-
-        for ev in range(lower_bound, upper_bound):
-            if ev not in evs:
-                evs.add(ev * 4)
-                yield ev * 4
+    sums = get_internal_sum_range(stat, level, nature, value)
+    remainder = 2 * base + iv
+    lower_bound = max(0, sums.start - remainder)
+    upper_bound = min(EV_MAX // 4, sums.stop - 1 - remainder)
+    return range(lower_bound * 4, (upper_bound + 1) * 4, 4)
 
 
 #
 
 
-def get_ivs_from_value(stat: Stat, base: int, ev: int, level: int, nature: Nature, value: int) -> Iterable[int]:
+def get_ivs_from_value(stat: Stat, base: int, ev: int, level: int, nature: Nature, value: int) -> range:
     """
     With the given numerical stat value, reverse engineer the possible IV values of the Pokémon based
     on the other given stat information.
@@ -137,44 +318,63 @@ def get_ivs_from_value(stat: Stat, base: int, ev: int, level: int, nature: Natur
     :param level: The level of the Pokémon
     :param nature: The stat-modifying nature of the Pokémon
     :param value: The final numerical value of the stat to reverse-engineer
-    :return: A lazy generator for all of the possible IV values based on the given stat information
+    :return: The contiguous range of all of the possible IV values based on the given stat information
     """
-    ivs = set()
-
-    ev = ev // 4
-
-    for y in _get_internal_formula_value(stat, level, nature, value):
-        lower_bound = math.ceil(-(2 * base) - ev + ((100 / level) * y))
-        upper_bound = math.ceil(-(2 * base) - ev + ((100 / level) * (y + 1)))
-        lower_bound = max(0, lower_bound)
-        upper_bound = min(IV_MAX + 1, upper_bound)
-
-        for iv in range(lower_bound, upper_bound):
-            if iv not in ivs:
-                ivs.add(iv)
-                yield iv
+    sums = get_internal_sum_range(stat, level, nature, value)
+    remainder = 2 * base + ev // 4
+    return range(max(0, sums.start - remainder),
+                 min(IV_MAX, sums.stop - 1 - remainder) + 1)
 
 
 #
 
 
-def _get_internal_formula_value(stat: Stat, level: int, nature: Nature, value: int) -> Iterable[int]:
+def _get_internal_formula_value(stat: Stat, level: int, nature: Nature, value: int) -> range:
     """
     Calculation to determine the possible values of the inner floor portion of the stat formula after flooring,
     based on the given level and nature, for the given numerical stat value.  This means that this internal formula
     portion (which incorporates based stats, EVs, and IVs) must floor down to one of the returned values.
     This may be used to further narrow down the possible values for those internal formula stats.
 
-    This executes lazily.
+    This is calculated purely with integer arithmetic, with the nature modifier expressed in tenths.
     """
     StatError.check_number_stat(stat)
     flat_mod = (level + 10) if stat == Stat.HP else 5
-    nature_mod = nature.get_modifier(stat)
+    tenths = nature.get_modifier_tenths(stat)
+
+    # floor((y + flat_mod) * tenths / 10) == value  <=>  10 * value <= (y + flat_mod) * tenths < 10 * (value + 1)
+    lower_bound = _ceil_div(10 * value, tenths) - flat_mod
+    upper_bound = _ceil_div(10 * (value + 1), tenths) - flat_mod
+
+    return range(max(0, lower_bound), max(0, upper_bound))
+
 
-    lower_bound = math.ceil((value / nature_mod) - flat_mod)
-    upper_bound = math.ceil(((value + 1) / nature_mod) - flat_mod)
+def get_internal_sum_range(stat: Stat, level: int, nature: Nature, value: int) -> range:
+    """
+    Calculation to determine the possible values of (2 * base) + IV + (EV // 4) that result in the given
+    numerical stat value, based on the given level and nature.  Since the stat formula is monotonic in this sum,
+    these values always form a single contiguous range.  Any of the base stat, IV and EVs can then be solved for
+    by subtracting the others from this range.
+
+    :param stat: The stat the value is of (eg. ATTACK, HP)
+    :param level: The level of the Pokémon
+    :param nature: The stat-modifying nature of the Pokémon
+    :param value: The final numerical value of the stat
+    :return: The contiguous range of all of the possible internal sums, which is empty if no sum results in the
+    given stat value
+    :raises StatError: Raises an error if the specified stat does not have a numerical value
+    """
+    internal = _get_internal_formula_value(stat, level, nature, value)
+    if len(internal) == 0:
+        return range(0)
+
+    # (s * level) // 100 == y  <=>  100 * y <= s * level < 100 * (y + 1)
+    return range(_ceil_div(100 * internal.start, level),
+                 _ceil_div(100 * internal.stop, level))
 
-    yield from range(lower_bound, upper_bound)
+
+def _ceil_div(numerator: int, denominator: int) -> int:
+    return -(-numerator // denominator)
 
 
 #
@@ -206,3 +406,60 @@ def get_stat_range(stat: Stat, base: int, level: int) -> Tuple[int, int]:
                            iv=IV_MAX,
                            level=level,
                            nature=Nature.build_boosting(stat)))
+
+
+#
+
+
+class StatRanges(NamedTuple):
+    """
+    The theoretical minimum and maximum values of every stat of many Pokémon at every level.  The arrays are indexed
+    by [Pokémon, stat, level - 1], with the Pokémon in the order of data and the stats in the order of
+    ORDERED_NUMBER_STATS.
+    """
+    data: list[PokemonData]
+    positions: dict[PokemonData, int]
+    minimums: np.ndarray
+    maximums: np.ndarray
+
+    def get_range(self, data: PokemonData, stat: Stat, level: int) -> Tuple[int, int]:
+        """
+        Looks up the same values as get_stat_range() for the given Pokémon's base stat.
+
+        :raises KeyError: Raises an error if the given Pokémon is not included in these ranges
+        """
+        position = self.positions[data]
+        index = ORDERED_NUMBER_STATS.index(stat)
+        return int(self.minimums[position, index, level - 1]), int(self.maximums[position, index, level - 1])
+
+
+def get_stat_ranges(data: PokemonDataMap) -> StatRanges:
+    """
+    Calculates the theoretical minimum and maximum values of every stat of every Pokémon in the given collection at
+    every level, as with get_stat_range().  The results are cached on the collection until more data is added to it.
+
+    :param data: The Pokémon to calculate the stat ranges of
+    :return: The minimum and maximum stat values
+    """
+    return data.get_cached(_STAT_RANGES_KEY, lambda: build_stat_ranges(data))
+
+
+def build_stat_ranges(data: Iterable[PokemonData]) -> StatRanges:
+    """
+    Calculates the theoretical minimum and maximum values of every stat of every given Pokémon at every level,
+    without caching them.  See get_stat_ranges().
+    """
+    data = list(data)
+    bases = np.array([d.stats.values for d in data], dtype=np.int64).reshape(-1, len(ORDERED_NUMBER_STATS))
+    levels = np.arange(1, 101)
+    shape = (len(data), len(ORDERED_NUMBER_STATS), len(levels))
+    minimums, maximums = np.empty(shape, dtype=np.int64), np.empty(shape, dtype=np.int64)
+    for i, stat in enumerate(ORDERED_NUMBER_STATS):
+        minimums[:, i] = get_stat_values_batch(stat, bases[:, i, np.newaxis], 0, 0, levels, 0.9)
+        maximums[:, i] = get_stat_values_batch(stat, bases[:, i, np.newaxis], EV_MAX, IV_MAX, levels, 1.1)
+    minimums.flags.writeable = False
+    maximums.flags.writeable = False
+    return StatRanges(data, {d: i for i, d in enumerate(data)}, minimums, maximums)
+
+
+_STAT_RANGES_KEY = "stat_ranges"
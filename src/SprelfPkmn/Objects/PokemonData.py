@@ -9,11 +9,16 @@ from SprelfPkmn.Objects.Variant import Variant
 from SprelfPkmn.Objects.Dex import DexEntryCollection, Dex
 from SprelfPkmn.Objects.MiscInfo import MiscInfo
 
-from typing import Iterable, Iterator
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Callable, Hashable, TypeVar, NamedTuple, Sequence
 
 from SprelfJSON import JSONModel
 
 
+_T = TypeVar("_T")
+_K = TypeVar("_K", bound=Hashable)
+
+
 class PokemonData(JSONModel):
     """
     Represents the baseline collection of attributes that defines a particular species and variant of a Pokémon.
@@ -69,6 +74,40 @@ class PokemonQueryable(Iterable[PokemonData]):
         return PokemonQueryable(x for x in self._items
                 if x.stats.get_stat(s) == val)
 
+    def stat_range(self, s: Stat, low: int | None = None, high: int | None = None) -> PokemonQueryable:
+        """
+        Filters by base stats between the given bounds (inclusive), in ascending order of the base stat.
+        """
+        return PokemonQueryable(sorted((x for x in self._items if _in_range(x.stats.get_stat(s), low, high)),
+                                       key=lambda x: x.stats.get_stat(s)))
+
+    def stat_at_least(self, s: Stat, val: int) -> PokemonQueryable:
+        return self.stat_range(s, low=val)
+
+    def stat_at_most(self, s: Stat, val: int) -> PokemonQueryable:
+        return self.stat_range(s, high=val)
+
+    def top_stat(self, s: Stat, k: int) -> PokemonQueryable:
+        """
+        The k Pokémon with the highest of the given base stat, in descending order of the base stat.  Pokémon with
+        equal base stats are in the reverse of their original order.
+        """
+        return PokemonQueryable(sorted(self._items, key=lambda x: x.stats.get_stat(s))[::-1][:max(k, 0)])
+
+    def total_range(self, low: int | None = None, high: int | None = None) -> PokemonQueryable:
+        """
+        Filters by base stat totals between the given bounds (inclusive), in ascending order of the total.
+        """
+        return PokemonQueryable(sorted((x for x in self._items if _in_range(x.stats.total(), low, high)),
+                                       key=lambda x: x.stats.total()))
+
+    def top_total(self, k: int) -> PokemonQueryable:
+        """
+        The k Pokémon with the highest base stat totals, in descending order of the total.  Pokémon with equal
+        totals are in the reverse of their original order.
+        """
+        return PokemonQueryable(sorted(self._items, key=lambda x: x.stats.total())[::-1][:max(k, 0)])
+
     def ability(self, ability: str) -> PokemonQueryable:
         return PokemonQueryable(x for x in self._items
                     if ability in x.abilities)
@@ -94,6 +133,34 @@ class PokemonQueryable(Iterable[PokemonData]):
         return PokemonQueryable(x for x in self._items
                                 if x.variant.is_mega() == b)
 
+    def is_regional(self, b: bool = True) -> PokemonQueryable:
+        return PokemonQueryable(x for x in self._items
+                                if x.variant.is_regional() == b)
+
+    def is_gender(self, b: bool = True) -> PokemonQueryable:
+        return PokemonQueryable(x for x in self._items
+                                if x.variant.is_gender() == b)
+
+    def is_form(self, b: bool = True) -> PokemonQueryable:
+        return PokemonQueryable(x for x in self._items
+                                if x.variant.is_form() == b)
+
+    def defense(self, resists: Iterable[Type] = (), weak_to: Iterable[Type] = (), immune_to: Iterable[Type] = (),
+                not_weak_to: Iterable[Type] = ()) -> PokemonQueryable:
+        """
+        Filters by how much damage Pokémon take from attacks of the given types.  Resistances do not include
+        immunities.
+
+        :param resists: Types that the Pokémon must resist (take between 0x and 1x damage from)
+        :param weak_to: Types that the Pokémon must be weak to (take more than 1x damage from)
+        :param immune_to: Types that the Pokémon must be immune to
+        :param not_weak_to: Types that the Pokémon must not be weak to
+        """
+        conditions = _get_defense_conditions(resists, weak_to, immune_to, not_weak_to)
+        return PokemonQueryable(x for x in self._items
+                                if all(condition(Type.get_damage_multiplier(t, x.typing))
+                                       for t, condition in conditions))
+
 
 class PokemonDataMap(PokemonQueryable):
     """
@@ -108,67 +175,549 @@ class PokemonDataMap(PokemonQueryable):
         self.typing_map: dict[Type, list[PokemonData]] = dict()
         self.stats_map: dict[Stat, dict[int, list[PokemonData]]] = \
             {s: dict() for s in NUMBER_STATS}
+        # Pokémon sorted by each base stat, and by base stat total
+        self.sorted_stats_map: dict[Stat, _SortedIndex] = {s: _SortedIndex() for s in NUMBER_STATS}
+        self.sorted_total_index: _SortedIndex = _SortedIndex()
         self.ability_map: dict[str, list[PokemonData]] = dict()
         self.nat_dex_map: dict[int, list[PokemonData]] = dict()
         self.ev_yield_map: dict[Stat, dict[int, list[PokemonData]]] = \
             {s: dict() for s in NUMBER_STATS}
         self.dex_map: dict[Dex, list[PokemonData]] = dict()
-        for d in self._items:
-            self._index_item(d)
+        # Each distinct typing is given an ordinal, with its multipliers against each attacking type (in the order
+        # of TYPE_ORDINALS), and bitsets of typing ordinals for each attacking type and multiplier
+        self.typing_ordinals: dict[Typing, int] = dict()
+        self.distinct_typing_map: list[list[PokemonData]] = []
+        self.distinct_typing_bitmaps: list[int] = []
+        self.defense_profiles: list[tuple[float, ...]] = []
+        self.defense_map: dict[Type, dict[float, int]] = {t: dict() for t in Type}
+        # Each Pokémon is given a dense ordinal (its position in the collection), and each indexed value has a bitmap
+        # with the bits of the ordinals of the Pokémon with that value set, so that indexes can be combined with
+        # bitwise operations.  See from_bitmap() and to_bitmap().
+        self.ordinals: dict[PokemonData, int] = dict()
+        self.name_bitmaps: dict[str, int] = dict()
+        self.typing_bitmaps: dict[Type, int] = dict()
+        self.ability_bitmaps: dict[str, int] = dict()
+        self.nat_dex_bitmaps: dict[int, int] = dict()
+        self.dex_bitmaps: dict[Dex, int] = dict()
+        self.ev_yield_bitmaps: dict[Stat, dict[int, int]] = {s: dict() for s in NUMBER_STATS}
+        self.single_ev_yield_bitmap: int = 0  # Pokémon that yield EVs in only one stat
+        self.variant_bitmaps: dict[str, int] = {flag: 0 for flag in _VARIANT_FLAGS}
+        # Derived data computed over the whole collection, which is discarded whenever data is added
+        self.cache: dict[Hashable, object] = dict()
+        for ordinal, d in enumerate(self._items):
+            self._index_item(d, ordinal)
+
+    def __len__(self) -> int:
+        return len(self._items)
 
     def add_data(self, d: PokemonData):
         self._items.append(d)
-        self._index_item(d)
+        self._index_item(d, len(self._items) - 1)
+        self.cache.clear()
+
+    def get_cached(self, key: Hashable, build: Callable[[], _T]) -> _T:
+        """
+        Gets derived data computed over the whole collection, building it only if it has not been built since data
+        was last added.
+
+        :param key: The key that identifies the derived data
+        :param build: A function that builds the derived data
+        :return: The derived data
+        """
+        if key not in self.cache:
+            self.cache[key] = build()
+        return self.cache[key]
 
     def add_all_data(self, data: Iterable[PokemonData]):
         for d in data:
             self.add_data(d)
 
-    def _index_item(self, d: PokemonData):
+    @property
+    def full_bitmap(self) -> int:
+        """
+        The bitmap of every Pokémon in this collection
+        """
+        return (1 << len(self._items)) - 1
+
+    def from_bitmap(self, mask: int) -> PokemonQueryable:
+        """
+        Gets the Pokémon with the given bitmap of ordinals, in the order of the collection
+        """
+        return PokemonQueryable(self._from_bitmap(mask))
+
+    def to_bitmap(self, data: Iterable[PokemonData]) -> int:
+        """
+        Gets the bitmap of the ordinals of the given Pokémon, which must be in this collection
+        """
+        mask = 0
+        for d in data:
+            mask |= 1 << self.ordinals[d]
+        return mask
+
+    def _from_bitmap(self, mask: int) -> list[PokemonData]:
+        return [self._items[ordinal] for ordinal in _iter_bits(mask)]
+
+    def _index_item(self, d: PokemonData, ordinal: int):
+        bit = 1 << ordinal
+        self.ordinals[d] = ordinal
         self.name_map.setdefault(d.name.base_name(), []).append(d)
+        _set_bit(self.name_bitmaps, d.name.base_name(), bit)
         self.name_id_map[d.name_id] = d
         for t in d.typing:
             self.typing_map.setdefault(t, []).append(d)
+            _set_bit(self.typing_bitmaps, t, bit)
         for stat, value in d.stats:
             self.stats_map[stat].setdefault(value, []).append(d)
+            self.sorted_stats_map[stat].add(value, d)
+        self.sorted_total_index.add(d.stats.total(), d)
         for ability in d.abilities:
             self.ability_map.setdefault(ability.name, []).append(d)
+            _set_bit(self.ability_bitmaps, ability.name, bit)
         for dex in d.dex_entries:
             self.dex_map.setdefault(dex.dex, []).append(d)
+            _set_bit(self.dex_bitmaps, dex.dex, bit)
             if dex.dex == Dex.NATIONAL:
                 self.nat_dex_map.setdefault(dex.number, []).append(d)
+                _set_bit(self.nat_dex_bitmaps, dex.number, bit)
         if d.misc_info.ev_yield:
             for stat, val in d.misc_info.ev_yield.yields.items():
                 self.ev_yield_map[stat].setdefault(val, []).append(d)
+                _set_bit(self.ev_yield_bitmaps[stat], val, bit)
+            if len(d.misc_info.ev_yield.yields) == 1:
+                self.single_ev_yield_bitmap |= bit
+        for flag, is_flag in _VARIANT_FLAGS.items():
+            if is_flag(d.variant):
+                self.variant_bitmaps[flag] |= bit
+        self._index_typing(d, bit)
+
+    def _index_typing(self, d: PokemonData, bit: int):
+        if d.typing not in self.typing_ordinals:
+            ordinal = len(self.distinct_typing_map)
+            self.typing_ordinals[d.typing] = ordinal
+            self.distinct_typing_map.append([])
+            self.distinct_typing_bitmaps.append(0)
+            profile = tuple(Type.get_damage_multiplier(t, d.typing) for t in Type)
+            self.defense_profiles.append(profile)
+            for t, multiplier in zip(Type, profile):
+                self.defense_map[t][multiplier] = self.defense_map[t].get(multiplier, 0) | (1 << ordinal)
+        self.distinct_typing_map[self.typing_ordinals[d.typing]].append(d)
+        self.distinct_typing_bitmaps[self.typing_ordinals[d.typing]] |= bit
+
+    def query(self) -> PokemonQuery:
+        """
+        Starts a query over all of the Pokémon in this collection, which can be narrowed down by chaining filters
+        """
+        return PokemonQuery(self, ())
+
+    def name(self, name: str) -> PokemonQuery:
+        return self.query().name(name)
+
+    def typing(self, t: Type) -> PokemonQuery:
+        return self.query().typing(t)
+
+    def stat(self, s: Stat, val: int) -> PokemonQuery:
+        return self.query().stat(s, val)
+
+    def stat_range(self, s: Stat, low: int | None = None, high: int | None = None) -> PokemonQuery:
+        return self.query().stat_range(s, low, high)
+
+    def top_stat(self, s: Stat, k: int) -> PokemonQueryable:
+        return PokemonQueryable(self.sorted_stats_map[s].top(k))
+
+    def total_range(self, low: int | None = None, high: int | None = None) -> PokemonQuery:
+        return self.query().total_range(low, high)
+
+    def top_total(self, k: int) -> PokemonQueryable:
+        return PokemonQueryable(self.sorted_total_index.top(k))
+
+    def ability(self, ability: str) -> PokemonQuery:
+        return self.query().ability(ability)
+
+    def nat_dex_number(self, number: int) -> PokemonQuery:
+        return self.query().nat_dex_number(number)
 
-    def name(self, name: str) -> PokemonQueryable:
-        return PokemonQueryable(self.name_map.get(name, []))
+    def name_id(self, name_id: str) -> PokemonData | None:
+        return self.name_id_map.get(name_id, None)
 
-    def typing(self, t: Type) -> PokemonQueryable:
-        return PokemonQueryable(self.typing_map.get(t, []))
+    def ev_yield(self, stat: Stat, value: int | None = None, strict: bool = False) -> PokemonQuery:
+        return self.query().ev_yield(stat, value, strict)
 
-    def stat(self, s: Stat, val: int) -> PokemonQueryable:
-        return PokemonQueryable(self.stats_map[s].get(val, []))
+    def dex(self, dex: Dex) -> PokemonQuery:
+        return self.query().dex(dex)
 
-    def ability(self, ability: str) -> PokemonQueryable:
-        return PokemonQueryable(self.ability_map.get(ability, []))
+    def is_mega(self, b: bool = True) -> PokemonQuery:
+        return self.query().is_mega(b)
 
-    def nat_dex_number(self, number: int) -> PokemonQueryable:
-        return PokemonQueryable(self.nat_dex_map.get(number, []))
+    def is_regional(self, b: bool = True) -> PokemonQuery:
+        return self.query().is_regional(b)
 
-    def name_id(self, name_id: str) -> PokemonData | None:
-        return self.name_id_map.get(name_id, None)
+    def is_gender(self, b: bool = True) -> PokemonQuery:
+        return self.query().is_gender(b)
 
-    def ev_yield(self, stat: Stat, value: int | None = None, strict: bool = False) \
-            -> PokemonQueryable:
+    def is_form(self, b: bool = True) -> PokemonQuery:
+        return self.query().is_form(b)
+
+    def defense(self, resists: Iterable[Type] = (), weak_to: Iterable[Type] = (), immune_to: Iterable[Type] = (),
+                not_weak_to: Iterable[Type] = ()) -> PokemonQuery:
+        return self.query().defense(resists, weak_to, immune_to, not_weak_to)
+
+    # Query filters, each with either an index lookup and the cardinality of that lookup, or a bitmap index (if
+    # there is an index for it)
+
+    @staticmethod
+    def _bitmap_filter(description: str, bitmap: Callable[[], int],
+                       matches: Callable[[PokemonData], bool]) -> _QueryFilter:
+        return _QueryFilter(description, None, None, matches, bitmap)
+
+    def _name_filter(self, name: str) -> _QueryFilter:
+        return self._bitmap_filter(f"name = {name}", lambda: self.name_bitmaps.get(name, 0),
+                                   lambda x: x.name.base_name() == name)
+
+    def _typing_filter(self, t: Type) -> _QueryFilter:
+        return self._bitmap_filter(f"typing = {t.name}", lambda: self.typing_bitmaps.get(t, 0),
+                                   lambda x: t in x.typing)
+
+    def _stat_filter(self, s: Stat, val: int) -> _QueryFilter:
+        return _QueryFilter(f"{s.name} = {val}", lambda: self.stats_map[s].get(val, []),
+                            lambda: len(self.stats_map[s].get(val, [])),
+                            lambda x: x.stats.get_stat(s) == val)
+
+    def _stat_range_filter(self, s: Stat, low: int | None, high: int | None) -> _QueryFilter:
+        return _QueryFilter(f"{s.name} in [{low}, {high}]", lambda: self.sorted_stats_map[s].range(low, high),
+                            lambda: self.sorted_stats_map[s].count_range(low, high),
+                            lambda x: _in_range(x.stats.get_stat(s), low, high))
+
+    def _total_range_filter(self, low: int | None, high: int | None) -> _QueryFilter:
+        return _QueryFilter(f"total in [{low}, {high}]", lambda: self.sorted_total_index.range(low, high),
+                            lambda: self.sorted_total_index.count_range(low, high),
+                            lambda x: _in_range(x.stats.total(), low, high))
+
+    def _ability_filter(self, ability: str) -> _QueryFilter:
+        return self._bitmap_filter(f"ability = {ability}", lambda: self.ability_bitmaps.get(ability, 0),
+                                   lambda x: ability in x.abilities)
+
+    def _nat_dex_number_filter(self, number: int) -> _QueryFilter:
+        return self._bitmap_filter(f"national dex number = {number}", lambda: self.nat_dex_bitmaps.get(number, 0),
+                                   lambda x: x.dex_entries.get_dex_num(Dex.NATIONAL) == number)
+
+    def _ev_yield_filter(self, stat: Stat, value: int | None, strict: bool) -> _QueryFilter:
         values = (value,) if value else (1, 2, 3)
-        return PokemonQueryable(pd for val in values
-                                if val in self.ev_yield_map[stat]
-                                for pd in self.ev_yield_map[stat][val] if not strict or
-                                len(pd.misc_info.ev_yield.yields) == 1)
 
-    def dex(self, dex: Dex) -> PokemonQueryable:
-        return PokemonQueryable(self.dex_map.get(dex, []))
+        def _get_bitmap() -> int:
+            mask = 0
+            for val in values:
+                mask |= self.ev_yield_bitmaps[stat].get(val, 0)
+            return mask & self.single_ev_yield_bitmap if strict else mask
+
+        return self._bitmap_filter(f"{stat.name} EV yield in {list(values)}{' (strict)' if strict else ''}",
+                                   _get_bitmap,
+                                   lambda x: x.misc_info.ev_yield and
+                                   any(x.misc_info.ev_yield.get(stat) == val
+                                       and (not strict or len(x.misc_info.ev_yield.yields) == 1)
+                                       for val in values))
+
+    def _dex_filter(self, dex: Dex) -> _QueryFilter:
+        return self._bitmap_filter(f"dex = {dex.name}", lambda: self.dex_bitmaps.get(dex, 0),
+                                   lambda x: x.dex_entries.get_dex_num(dex) is not None)
+
+    def _variant_filter(self, flag: str, b: bool) -> _QueryFilter:
+        is_flag = _VARIANT_FLAGS[flag]
+        return self._bitmap_filter(f"is {flag} = {b}",
+                                   lambda: self.variant_bitmaps[flag] if b
+                                   else self.full_bitmap & ~self.variant_bitmaps[flag],
+                                   lambda x: is_flag(x.variant) == b)
+
+    def _defense_filter(self, resists: Iterable[Type], weak_to: Iterable[Type], immune_to: Iterable[Type],
+                        not_weak_to: Iterable[Type]) -> _QueryFilter:
+        resists, weak_to, immune_to, not_weak_to = (tuple(types) for types in (resists, weak_to, immune_to,
+                                                                               not_weak_to))
+        conditions = _get_defense_conditions(resists, weak_to, immune_to, not_weak_to)
+
+        def _get_bitmap() -> int:
+            typings = (1 << len(self.distinct_typing_map)) - 1
+            for t, condition in conditions:
+                for multiplier, multiplier_typings in self.defense_map[t].items():
+                    if not condition(multiplier):
+                        typings &= ~multiplier_typings
+            mask = 0
+            for ordinal in _iter_bits(typings):
+                mask |= self.distinct_typing_bitmaps[ordinal]
+            return mask
+
+        description = ", ".join(f"{label} {[t.name for t in types]}"
+                                for label, types in (("resists", resists), ("weak to", weak_to),
+                                                     ("immune to", immune_to), ("not weak to", not_weak_to))
+                                if types)
+        return self._bitmap_filter(f"defense: {description}", _get_bitmap,
+                                   lambda x: all(condition(Type.get_damage_multiplier(t, x.typing))
+                                                 for t, condition in conditions))
+
+
+#
+
+
+class _QueryFilter(NamedTuple):
+    """
+    A single filter of a query.  Filters with an index can look up exactly the Pokémon that match them, and count
+    them without looking them up.  Filters with a bitmap index instead get the bitmap of the ordinals of the
+    Pokémon that match them.  All filters can check individual Pokémon.
+    """
+    description: str
+    lookup: Callable[[], Sequence[PokemonData]] | None
+    estimate: Callable[[], int] | None
+    matches: Callable[[PokemonData], bool]
+    bitmap: Callable[[], int] | None = None
+
+
+class QueryPlan(NamedTuple):
+    """
+    The order in which the filters of a query are run.  The Pokémon looked up by the first indexed filter (or all
+    Pokémon, if no filter has an index) are intersected with those looked up by the other indexed filters, and the
+    remaining filters are then checked on each of the Pokémon left.  Estimates are the number of Pokémon matching
+    each indexed filter.
+
+    The bitmaps of the bitmap indexes are each built once when planning, and are intersected into a single bitmap
+    (or None, if no filter has a bitmap index) before any Pokémon are looked up.
+    """
+    indexed: list[tuple[_QueryFilter, int]]
+    residual: list[_QueryFilter]
+    total: int
+    bitmap: int | None = None
+
+    def __str__(self) -> str:
+        if not self.indexed:
+            lines = [f"Scan all ({self.total})"]
+        else:
+            first, estimate = self.indexed[0]
+            lines = [f"Index lookup: {first.description} ({estimate})"]
+            lines += [f"Intersect index: {f.description} ({e})" for f, e in self.indexed[1:]]
+        lines += [f"Filter: {f.description}" for f in self.residual]
+        return "\n".join(lines)
+
+
+class PokemonQuery(PokemonQueryable):
+    """
+    A lazily run query over an indexed collection of Pokémon.  Chained filters are collected rather than run one
+    after the other, and when the query is iterated, the filters are run in an order chosen by how many Pokémon
+    each of their indexes would look up.  See explain().
+
+    Pokémon are returned in the order of the index that the query starts from (eg. ascending order of the base stat
+    for stat_range()), or in the order of the collection if no filter has an index.
+    """
+
+    # An index is only intersected if it looks up at most this many times as many Pokémon as are left, as checking
+    # each remaining Pokémon directly is cheaper than looking up a much larger index.  Bitmap indexes are always
+    # intersected, as they do not need to be looked up to be intersected.
+    INTERSECT_RATIO = 4
+
+    def __init__(self, data_map: PokemonDataMap, filters: tuple[_QueryFilter, ...]):
+        self._data_map = data_map
+        self._filters = filters
+
+    @property
+    def _items(self) -> list[PokemonData]:
+        return self._run(self.plan())
+
+    def _where(self, query_filter: _QueryFilter) -> PokemonQuery:
+        return PokemonQuery(self._data_map, self._filters + (query_filter,))
+
+    def plan(self) -> QueryPlan:
+        """
+        Chooses the order to run the filters of this query in.  The indexed filter that looks up the fewest Pokémon
+        is run first.
+        """
+        indexed = []
+        residual = []
+        bitmap = None
+        for f in self._filters:
+            if f.bitmap is not None:
+                mask = f.bitmap()
+                bitmap = mask if bitmap is None else bitmap & mask
+                indexed.append((f, mask.bit_count()))
+            elif f.lookup is not None:
+                indexed.append((f, f.estimate()))
+            else:
+                residual.append(f)
+        indexed.sort(key=lambda fe: fe[1])
+        if not indexed:
+            return QueryPlan([], residual, len(self._data_map))
+
+        chosen = [indexed[0]]
+        remaining = indexed[0][1]
+        for f, estimate in indexed[1:]:
+            if f.bitmap is not None or estimate <= remaining * self.INTERSECT_RATIO:
+                chosen.append((f, estimate))
+                remaining = min(remaining, estimate)
+            else:
+                residual.append(f)
+        return QueryPlan(chosen, residual, len(self._data_map), bitmap)
+
+    def explain(self) -> str:
+        """
+        Describes the order that the filters of this query are run in, along with the number of Pokémon each index
+        would look up.
+        """
+        return str(self.plan())
+
+    def bitmap(self) -> int:
+        """
+        Gets the bitmap of the ordinals of the Pokémon that match this query, which can be combined with the bitmaps
+        of other queries over the same collection with bitwise operations (eg. & for both, | for either, and
+        & ~ for one but not the other).  See PokemonDataMap.from_bitmap().
+        """
+        plan = self.plan()
+        if plan.bitmap is not None and not plan.residual and all(f.bitmap is not None for f, _ in plan.indexed):
+            return plan.bitmap
+        return self._data_map.to_bitmap(self._run(plan))
+
+    def _run(self, plan: QueryPlan) -> list[PokemonData]:
+        if not plan.indexed:
+            results = list(self._data_map._items)
+        else:
+            first = plan.indexed[0][0]
+            if first.bitmap is not None:
+                results = self._data_map._from_bitmap(plan.bitmap)
+            else:
+                results = list(first.lookup())
+                if plan.bitmap is not None:
+                    ordinals = self._data_map.ordinals
+                    results = [pd for pd in results if plan.bitmap >> ordinals[pd] & 1]
+            for f, _ in plan.indexed[1:]:
+                if not results:
+                    break
+                if f.bitmap is None:
+                    found = set(f.lookup())
+                    results = [pd for pd in results if pd in found]
+        for f in plan.residual:
+            results = [pd for pd in results if f.matches(pd)]
+        return results
+
+    def name(self, name: str) -> PokemonQuery:
+        return self._where(self._data_map._name_filter(name))
+
+    def typing(self, t: Type) -> PokemonQuery:
+        return self._where(self._data_map._typing_filter(t))
+
+    def stat(self, s: Stat, val: int) -> PokemonQuery:
+        return self._where(self._data_map._stat_filter(s, val))
+
+    def stat_range(self, s: Stat, low: int | None = None, high: int | None = None) -> PokemonQuery:
+        return self._where(self._data_map._stat_range_filter(s, low, high))
+
+    def stat_at_least(self, s: Stat, val: int) -> PokemonQuery:
+        return self.stat_range(s, low=val)
+
+    def stat_at_most(self, s: Stat, val: int) -> PokemonQuery:
+        return self.stat_range(s, high=val)
+
+    def total_range(self, low: int | None = None, high: int | None = None) -> PokemonQuery:
+        return self._where(self._data_map._total_range_filter(low, high))
+
+    def ability(self, ability: str) -> PokemonQuery:
+        return self._where(self._data_map._ability_filter(ability))
+
+    def nat_dex_number(self, number: int) -> PokemonQuery:
+        return self._where(self._data_map._nat_dex_number_filter(number))
+
+    def ev_yield(self, stat: Stat, value: int | None = None, strict: bool = False) -> PokemonQuery:
+        return self._where(self._data_map._ev_yield_filter(stat, value, strict))
+
+    def dex(self, dex: Dex) -> PokemonQuery:
+        return self._where(self._data_map._dex_filter(dex))
+
+    def is_mega(self, b: bool = True) -> PokemonQuery:
+        return self._where(self._data_map._variant_filter("mega", b))
+
+    def is_regional(self, b: bool = True) -> PokemonQuery:
+        return self._where(self._data_map._variant_filter("regional", b))
+
+    def is_gender(self, b: bool = True) -> PokemonQuery:
+        return self._where(self._data_map._variant_filter("gender", b))
+
+    def is_form(self, b: bool = True) -> PokemonQuery:
+        return self._where(self._data_map._variant_filter("form", b))
+
+    def defense(self, resists: Iterable[Type] = (), weak_to: Iterable[Type] = (), immune_to: Iterable[Type] = (),
+                not_weak_to: Iterable[Type] = ()) -> PokemonQuery:
+        return self._where(self._data_map._defense_filter(resists, weak_to, immune_to, not_weak_to))
+
+
+#
+
+
+class _SortedIndex:
+    """
+    Pokémon sorted by an integer key, such as a base stat.  Pokémon with equal keys are kept in the order they
+    were added.
+    """
+    __slots__ = ("keys", "items")
+
+    def __init__(self):
+        self.keys: list[int] = []
+        self.items: list[PokemonData] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: int, item: PokemonData):
+        index = bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.items.insert(index, item)
+
+    def range(self, low: int | None = None, high: int | None = None) -> list[PokemonData]:
+        """
+        The Pokémon with keys between the given bounds (inclusive), in ascending order of their keys
+        """
+        start = bisect_left(self.keys, low) if low is not None else 0
+        end = bisect_right(self.keys, high) if high is not None else len(self.keys)
+        return self.items[start:end]
+
+    def count_range(self, low: int | None = None, high: int | None = None) -> int:
+        start = bisect_left(self.keys, low) if low is not None else 0
+        end = bisect_right(self.keys, high) if high is not None else len(self.keys)
+        return max(end - start, 0)
+
+    def top(self, k: int) -> list[PokemonData]:
+        """
+        The k Pokémon with the highest keys, in descending order of their keys
+        """
+        return self.items[max(len(self.items) - k, 0):][::-1] if k > 0 else []
+
+
+def _in_range(value: int, low: int | None, high: int | None) -> bool:
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _get_defense_conditions(resists: Iterable[Type], weak_to: Iterable[Type], immune_to: Iterable[Type],
+                            not_weak_to: Iterable[Type]) -> list[tuple[Type, Callable[[float], bool]]]:
+    return [(t, condition)
+            for types, condition in ((resists, lambda m: 0 < m < 1),
+                                     (weak_to, lambda m: m > 1),
+                                     (immune_to, lambda m: m == 0),
+                                     (not_weak_to, lambda m: m <= 1))
+            for t in types]
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    # Scanning the binary string is linear in the size of the mask, where clearing one bit at a time is not
+    bits = bin(mask)[:1:-1]
+    index = bits.find("1")
+    while index >= 0:
+        yield index
+        index = bits.find("1", index + 1)
+
+
+def _set_bit(bitmaps: dict[_K, int], key: _K, bit: int):
+    bitmaps[key] = bitmaps.get(key, 0) | bit
+
+
+# The variant flags that are indexed by bitmaps
+_VARIANT_FLAGS: dict[str, Callable[[Variant], bool]] = {
+    "mega": Variant.is_mega,
+    "regional": Variant.is_regional,
+    "gender": Variant.is_gender,
+    "form": Variant.is_form
+}
 
 
 #
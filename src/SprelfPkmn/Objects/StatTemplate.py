@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from SprelfJSON import JSONModel
 
-from SprelfPkmn.Objects.Stats import Stat, Nature, StatError
+from SprelfPkmn.Objects.Stats import Stat, Nature, StatError, EV_MAX, IV_MAX, NATURE_MAP
 
-from typing import Iterable
+from typing import Iterable, Callable
 
 
 class StatTemplate(JSONModel):
@@ -60,22 +60,25 @@ class StatTemplate(JSONModel):
                self.stat == o.stat and \
                self.base == o.base and \
                self.ev == o.ev and \
-               self.iv == o.ev and \
+               self.iv == o.iv and \
                self.level == o.level and \
                self.nature == o.nature
 
     def __hash__(self) -> int:
-        return hash((self.stat, frozenset(self.base), frozenset(self.ev), frozenset(self.iv),
-                     frozenset(self.level), frozenset(self.nature)))
+        return hash((self.stat,) + tuple(tuple(values) if values is not None else None
+                                         for values in (self.base, self.ev, self.iv, self.level, self.nature)))
 
     def __str__(self) -> str:
+        def _join(values: list | None, fmt: Callable = str) -> str | None:
+            return ", ".join(fmt(v) for v in values) if values is not None else None
+
         return " | ".join("%s = %s" % (k, v) for k, v in
                           (("stat", self.stat),
-                           ("base", ", ".join(str(b) for b in self.base)),
-                           ("ev", ", ".join(str(e) for e in self.ev)),
-                           ("iv", ", ".join(str(i) for i in self.iv)),
-                           ("level", ", ".join(str(level) for level in self.level)),
-                           ("nature", ", ".join(n.get_mod_as_string(self.stat) for n in self.nature)))
+                           ("base", _join(self.base)),
+                           ("ev", _join(self.ev)),
+                           ("iv", _join(self.iv)),
+                           ("level", _join(self.level)),
+                           ("nature", _join(self.nature, lambda n: n.get_mod_as_string(self.stat))))
                           if v is not None)
 
     def __repr__(self) -> str:
@@ -86,4 +89,170 @@ class StatTemplate(JSONModel):
         A stat template is considered complete when it has exactly one option for every stat information type
         (EVs, IVs, etc.), and thus represents exactly one combination.
         """
-        return all(len(x) == 1 for x in (self.base, self.ev, self.iv, self.level, self.nature))
+        return all(x is not None and len(x) == 1 for x in (self.base, self.ev, self.iv, self.level, self.nature))
+
+    def to_compact(self) -> CompactStatTemplate:
+        """
+        Converts this stat template into its compact, bitmask-backed representation.  Unrestricted stat information
+        types are represented by their full domains.
+        """
+        return CompactStatTemplate.of(self)
+
+
+#
+
+
+def _to_mask(values: Iterable[int]) -> int:
+    mask = 0
+    for v in values:
+        mask |= 1 << v
+    return mask
+
+
+def _from_mask(mask: int) -> list[int]:
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+FULL_BASE_DOMAIN = _to_mask(range(1, 256))
+FULL_EV_DOMAIN = _to_mask(range(0, EV_MAX // 4 + 1))
+FULL_IV_DOMAIN = _to_mask(range(0, IV_MAX + 1))
+FULL_LEVEL_DOMAIN = _to_mask(range(1, 101))
+FULL_NATURE_DOMAIN = _to_mask(range(0, len(NATURE_MAP)))
+
+
+class CompactStatTemplate:
+    """
+    A compact representation of a StatTemplate, where each set of stat information options is stored as an integer
+    bitmask.  Bit N of each domain represents the following value:
+
+    - base: A base stat value of N (1-255)
+    - ev: An EV value of N * 4 (0-63)
+    - iv: An IV value of N (0-31)
+    - level: A level of N (1-100)
+    - nature: The nature with ordinal N (0-24)
+
+    Unlike in StatTemplate, unrestricted domains are represented by the full domain rather than None.  These are
+    cheap to store, hash and compare, and support set operations between templates of the same stat.
+    """
+    __slots__ = ("stat", "base", "ev", "iv", "level", "nature")
+
+    def __init__(self, stat: Stat,
+                 base: int = FULL_BASE_DOMAIN,
+                 ev: int = FULL_EV_DOMAIN,
+                 iv: int = FULL_IV_DOMAIN,
+                 level: int = FULL_LEVEL_DOMAIN,
+                 nature: int = FULL_NATURE_DOMAIN):
+        StatError.check_number_stat(stat)
+        self.stat = stat
+        self.base = base & FULL_BASE_DOMAIN
+        self.ev = ev & FULL_EV_DOMAIN
+        self.iv = iv & FULL_IV_DOMAIN
+        self.level = level & FULL_LEVEL_DOMAIN
+        self.nature = nature & FULL_NATURE_DOMAIN
+
+    @classmethod
+    def of(cls, template: StatTemplate) -> CompactStatTemplate:
+        return cls(stat=template.stat,
+                   base=_to_mask(template.base) if template.base is not None else FULL_BASE_DOMAIN,
+                   ev=_to_mask(e // 4 for e in template.ev) if template.ev is not None else FULL_EV_DOMAIN,
+                   iv=_to_mask(template.iv) if template.iv is not None else FULL_IV_DOMAIN,
+                   level=_to_mask(template.level) if template.level is not None else FULL_LEVEL_DOMAIN,
+                   nature=_to_mask(n.ordinal for n in template.nature) if template.nature is not None
+                   else FULL_NATURE_DOMAIN)
+
+    def to_template(self) -> StatTemplate:
+        """
+        Converts this back into a StatTemplate.  Full domains are represented as unrestricted.
+        """
+        return StatTemplate(stat=self.stat,
+                            base=_from_mask(self.base) if self.base != FULL_BASE_DOMAIN else None,
+                            ev=[e * 4 for e in _from_mask(self.ev)] if self.ev != FULL_EV_DOMAIN else None,
+                            iv=_from_mask(self.iv) if self.iv != FULL_IV_DOMAIN else None,
+                            level=_from_mask(self.level) if self.level != FULL_LEVEL_DOMAIN else None,
+                            nature=[Nature.from_ordinal(n) for n in _from_mask(self.nature)]
+                            if self.nature != FULL_NATURE_DOMAIN else None)
+
+    def __eq__(self, o: object) -> bool:
+        return isinstance(o, CompactStatTemplate) and self._as_tuple() == o._as_tuple()
+
+    def __hash__(self) -> int:
+        return hash(self._as_tuple())
+
+    def __str__(self) -> str:
+        return str(self.to_template())
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def __len__(self) -> int:
+        return self.cardinality()
+
+    def __and__(self, o: CompactStatTemplate) -> CompactStatTemplate:
+        return self.intersect(o)
+
+    def __or__(self, o: CompactStatTemplate) -> CompactStatTemplate:
+        return self.union(o)
+
+    def cardinality(self) -> int:
+        """
+        The number of complete stat combinations represented by this template
+        """
+        return self.base.bit_count() * self.ev.bit_count() * self.iv.bit_count() * \
+            self.level.bit_count() * self.nature.bit_count()
+
+    def is_empty(self) -> bool:
+        return not (self.base and self.ev and self.iv and self.level and self.nature)
+
+    def is_complete(self) -> bool:
+        return self.cardinality() == 1
+
+    def intersect(self, o: CompactStatTemplate) -> CompactStatTemplate:
+        """
+        The stat combinations that are represented by both this template and the given template
+        """
+        self._check_same_stat(o)
+        return CompactStatTemplate(self.stat, self.base & o.base, self.ev & o.ev, self.iv & o.iv,
+                                   self.level & o.level, self.nature & o.nature)
+
+    def union(self, o: CompactStatTemplate) -> CompactStatTemplate:
+        """
+        The smallest template that represents every stat combination of both this template and the given template.
+        Since each domain is combined independently, this may include combinations that neither template has.
+        """
+        self._check_same_stat(o)
+        return CompactStatTemplate(self.stat, self.base | o.base, self.ev | o.ev, self.iv | o.iv,
+                                   self.level | o.level, self.nature | o.nature)
+
+    def difference(self, o: CompactStatTemplate) -> list[CompactStatTemplate]:
+        """
+        The stat combinations that are represented by this template but not by the given template.  This can't
+        generally be represented by a single template, so it is given as a list of non-overlapping templates.
+        """
+        self._check_same_stat(o)
+        result: list[CompactStatTemplate] = []
+        # Each piece keeps the overlapping values of the previous domains, and excludes the given template's
+        # values from the next domain, so that the pieces never overlap
+        current = self._as_tuple()[1:]
+        other = o._as_tuple()[1:]
+        for i in range(len(current)):
+            piece = current[:i] + (current[i] & ~other[i],) + current[i + 1:]
+            if all(piece):
+                result.append(CompactStatTemplate(self.stat, *piece))
+            current = current[:i] + (current[i] & other[i],) + current[i + 1:]
+            if not current[i]:
+                break
+        return result
+
+    def issubset(self, o: CompactStatTemplate) -> bool:
+        return self.is_empty() or (self.stat == o.stat and
+                                   all(a & ~b == 0 for a, b in zip(self._as_tuple()[1:], o._as_tuple()[1:])))
+
+    def isdisjoint(self, o: CompactStatTemplate) -> bool:
+        return self.stat != o.stat or self.intersect(o).is_empty()
+
+    def _as_tuple(self) -> tuple:
+        return self.stat, self.base, self.ev, self.iv, self.level, self.nature
+
+    def _check_same_stat(self, o: CompactStatTemplate):
+        if self.stat != o.stat:
+            raise StatError(f"Cannot combine stat templates for different stats: {self.stat}, {o.stat}")
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 from enum import Enum
 from abc import ABCMeta
-from typing import Iterable, Iterator
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, Sequence
 
 from SprelfJSON import JSONModel, JSONConvertible, JSONObject
 
+import numpy as np
+from numpy.typing import ArrayLike
+
+import warnings
+
 
 class Stat(Enum):
     ATTACK = "ATTACK"
@@ -21,6 +27,11 @@ class Stat(Enum):
 
 
 NUMBER_STATS = {Stat.ATTACK, Stat.DEFENSE, Stat.SP_ATTACK, Stat.SP_DEFENSE, Stat.SPEED, Stat.HP}
+ORDERED_NUMBER_STATS = (Stat.ATTACK, Stat.DEFENSE, Stat.SP_ATTACK, Stat.SP_DEFENSE, Stat.SPEED, Stat.HP)
+
+# Each stat's index in ORDERED_NUMBER_STATS (or after it, for non-numerical stats)
+STAT_INDEXES: dict[Stat, int] = {s: i for i, s in enumerate(ORDERED_NUMBER_STATS +
+                                                            tuple(s for s in Stat if s not in NUMBER_STATS))}
 
 
 class StatError(Exception):
@@ -32,6 +43,11 @@ class StatError(Exception):
 
 
 class BaseStats(JSONConvertible, Iterable[tuple[Stat, int]]):
+    """
+    The base stats of a Pokémon.  Base stats are immutable, and are stored as a tuple in the order of
+    ORDERED_NUMBER_STATS.
+    """
+    __slots__ = ("_values", "_hash")
 
     def __init__(self, attack: int,
                  defense: int,
@@ -39,42 +55,49 @@ class BaseStats(JSONConvertible, Iterable[tuple[Stat, int]]):
                  special_defense: int,
                  speed: int,
                  hp: int):
-        self.stats: dict[Stat, int] = {
-            Stat.ATTACK: attack,
-            Stat.DEFENSE: defense,
-            Stat.SP_ATTACK: special_attack,
-            Stat.SP_DEFENSE: special_defense,
-            Stat.SPEED: speed,
-            Stat.HP: hp
-        }
+        self._values: tuple[int, ...] = (attack, defense, special_attack, special_defense, speed, hp)
+        self._hash = hash(self._values)
 
     def __str__(self) -> str:
-        return " | ".join(f"{stat}: {value}" for stat, value in self.stats.items())
+        return " | ".join(f"{stat}: {value}" for stat, value in self)
 
     def __repr__(self) -> str:
         return str(self)
 
     def __iter__(self) -> Iterator[tuple[Stat, int]]:
-        return iter((s, v) for s, v in self.stats.items())
+        return zip(ORDERED_NUMBER_STATS, self._values)
 
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, BaseStats) and all(self.stats[s] == o.stats[s] for s in self.stats.keys())
+        return self is o or (isinstance(o, BaseStats) and self._values == o._values)
 
     def __ne__(self, o: object) -> bool:
         return not (self == o)
 
     def __hash__(self) -> int:
-        return hash((self.stats[Stat.HP], self.stats[Stat.ATTACK], self.stats[Stat.DEFENSE],
-                     self.stats[Stat.SP_ATTACK], self.stats[Stat.SP_DEFENSE], self.stats[Stat.SPEED]))
+        return self._hash
+
+    def __reduce__(self):
+        return BaseStats, self._values
+
+    @property
+    def stats(self) -> dict[Stat, int]:
+        return dict(self)
+
+    @property
+    def values(self) -> tuple[int, ...]:
+        """
+        The base stat values, in the order of ORDERED_NUMBER_STATS
+        """
+        return self._values
 
     def total(self) -> int:
-        return sum(self.stats.values())
+        return sum(self._values)
 
     def get_stat(self, stat: Stat) -> int:
-        try:
-            return self.stats[stat]
-        except KeyError:
+        index = STAT_INDEXES[stat]
+        if index >= len(self._values):
             raise StatError(f"Base stats do no have the requested stat: {stat}")
+        return self._values[index]
 
     @classmethod
     def from_json(cls, obj: dict, **kwargs) -> BaseStats:
@@ -92,13 +115,28 @@ class BaseStats(JSONConvertible, Iterable[tuple[Stat, int]]):
 #
 
 
+# Stat stages range from -6 to +6, except for the critical hit stage, which ranges from 0 to +3
+STAT_STAGE_MIN = -6
+STAT_STAGE_MAX = 6
+CRITICAL_STAGE_MAX = 3
+
+# The multiplier of each stat stage as an integer ratio, indexed by the stage minus STAT_STAGE_MIN.  Accuracy and
+# evasion stages are in thirds, while all other stats are in halves.
+STAT_STAGE_RATIOS: tuple[tuple[int, int], ...] = tuple((2 + s, 2) if s >= 0 else (2, 2 - s)
+                                                       for s in range(STAT_STAGE_MIN, STAT_STAGE_MAX + 1))
+ACCURACY_STAGE_RATIOS: tuple[tuple[int, int], ...] = tuple((3 + s, 3) if s >= 0 else (3, 3 - s)
+                                                           for s in range(STAT_STAGE_MIN, STAT_STAGE_MAX + 1))
+# The chance of a critical hit at each critical hit stage, as an integer ratio
+CRITICAL_STAGE_RATIOS: tuple[tuple[int, int], ...] = ((1, 24), (1, 8), (1, 2), (1, 1))
+
+
 class StatModifier(JSONModel):
     stat: Stat
     modifier: int
 
     def __init__(self, stat: Stat, modifier: int, adjust_to_cap: bool = False):
-        mod_min = -6 if stat != Stat.CRITICAL else 0
-        mod_max = 6 if stat != Stat.CRITICAL else 3
+        mod_min = STAT_STAGE_MIN if stat != Stat.CRITICAL else 0
+        mod_max = STAT_STAGE_MAX if stat != Stat.CRITICAL else CRITICAL_STAGE_MAX
         if stat == stat.HP or (not adjust_to_cap and not (mod_min <= modifier <= mod_max)):
             raise StatError(f"Invalid stat modifier: {stat} | {modifier}")
         modifier = mod_min if modifier < mod_min else mod_max if modifier > mod_max else modifier
@@ -110,19 +148,47 @@ class StatModifier(JSONModel):
     def __hash__(self) -> int:
         return hash((self.stat, self.modifier))
 
+    @property
+    def ratio(self) -> tuple[int, int]:
+        """
+        The multiplier of this stat modifier as an integer ratio
+
+        :raises StatError: Raises an error for the critical hit stage, which does not modify a stat value
+        """
+        return get_stat_stage_ratio(self.stat, self.modifier)
+
     @property
     def multiplier(self) -> float:
-        if self.stat not in NUMBER_STATS:
-            raise NotImplemented()
-        if self.modifier >= 0:
-            return (2 + self.modifier) / 2
-        else:
-            return 2 / (2 + self.modifier)
+        numerator, denominator = self.ratio
+        return numerator / denominator
+
+
+def get_stat_stage_ratio(stat: Stat, stage: int) -> tuple[int, int]:
+    """
+    Looks up the multiplier of the given stat stage as an integer ratio.  The critical hit stage does not have a
+    multiplier; see CRITICAL_STAGE_RATIOS for the chance of a critical hit at each stage instead.
+
+    :param stat: The stat the stage applies to
+    :param stage: The stat stage
+    :return: A tuple of the numerator and denominator of the multiplier
+    :raises StatError: Raises an error if the stat cannot have its value modified by stat stages, or if the stage
+    is out of bounds
+    """
+    if stat == Stat.CRITICAL:
+        raise StatError(f"Stat '{stat}' does not modify a stat value.")
+    if stat == Stat.HP:
+        raise StatError(f"Stat '{stat}' does not have stat stages.")
+    if not STAT_STAGE_MIN <= stage <= STAT_STAGE_MAX:
+        raise StatError(f"Invalid stat modifier: {stat} | {stage}")
+    if stat == Stat.ACCURACY or stat == Stat.EVASION:
+        return ACCURACY_STAGE_RATIOS[stage - STAT_STAGE_MIN]
+    return STAT_STAGE_RATIOS[stage - STAT_STAGE_MIN]
 
 
 #
 
 EV_MAX = 252
+EV_TOTAL_MAX = 510
 
 
 class EV(JSONModel):
@@ -194,6 +260,8 @@ NATURE_MAP = {
 }
 
 NATURE_MAP_REVERSED: dict[str, tuple[Stat, Stat]] = {v.upper(): k for k, v in NATURE_MAP.items()}
+NATURE_ORDINALS: dict[tuple[Stat, Stat], int] = {k: i for i, k in enumerate(NATURE_MAP.keys())}
+NATURE_ORDINALS_REVERSED: tuple[tuple[Stat, Stat], ...] = tuple(NATURE_MAP.keys())
 
 
 class _NatureMeta(ABCMeta):
@@ -223,26 +291,53 @@ class _NatureMeta(ABCMeta):
     Naive: Nature
     Serious: Nature
 
-    def __getattribute__(self, item):
+    def __getattr__(self, item):
+        # Natures are looked up by name in any capitalization (eg. Nature.Adamant or Nature.adamant)
         if isinstance(item, str) and item.upper() in NATURE_MAP_REVERSED:
             return Nature(*NATURE_MAP_REVERSED[item.upper()])
-        return super().__getattribute__(item)
+        raise AttributeError(f"type object '{self.__name__}' has no attribute '{item}'")
 
 
 class Nature(JSONConvertible, metaclass=_NatureMeta):
+    """
+    A stat-modifying nature.  There are only 25 natures, each of which is a single shared object, so constructing
+    a nature simply looks it up.  Each nature has precomputed modifiers for each stat (in the order of
+    ORDERED_NUMBER_STATS), and an ordinal for indexing into arrays (eg. NATURE_MODIFIERS).
+    """
+    __slots__ = ("_plus_stat", "_minus_stat", "_name", "_ordinal", "_modifiers", "_modifier_tenths", "_hash")
+
+    def __new__(cls, plus_stat: Stat, minus_stat: Stat):
+        nature = _NATURE_REGISTRY.get((plus_stat, minus_stat), None)
+        if nature is None:
+            for s in (plus_stat, minus_stat):
+                if s not in NUMBER_STATS or s == Stat.HP:
+                    raise StatError(f"Invalid stat for nature: '{s}'")
+            nature = _NATURE_REGISTRY[(plus_stat, minus_stat)] = cls._build(plus_stat, minus_stat)
+        return nature
 
-    def __init__(self, plus_stat: Stat, minus_stat: Stat):
-        for s in (plus_stat, minus_stat):
-            if s not in NUMBER_STATS or s == Stat.HP:
-                raise StatError(f"Invalid stat for nature: '{s}'")
-        self._plus_stat = plus_stat
-        self._minus_stat = minus_stat
+    @classmethod
+    def _build(cls, plus_stat: Stat, minus_stat: Stat) -> Nature:
+        nature = super().__new__(cls)
+        nature._plus_stat = plus_stat
+        nature._minus_stat = minus_stat
+        nature._name = NATURE_MAP[(plus_stat, minus_stat)]
+        nature._ordinal = NATURE_ORDINALS[(plus_stat, minus_stat)]
+        nature._modifier_tenths = tuple(11 if stat == plus_stat != minus_stat else
+                                        9 if stat == minus_stat != plus_stat else 10
+                                        for stat in ORDERED_NUMBER_STATS)
+        nature._modifiers = tuple({11: 1.1, 9: 0.9, 10: 1}[t] for t in nature._modifier_tenths)
+        nature._hash = hash((plus_stat, minus_stat))
+        return nature
+
+    def __reduce__(self):
+        return Nature, (self._plus_stat, self._minus_stat)
 
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, Nature) and self._plus_stat == o._plus_stat and self._minus_stat == o._minus_stat
+        return self is o or \
+            (isinstance(o, Nature) and self._plus_stat == o._plus_stat and self._minus_stat == o._minus_stat)
 
     def __hash__(self) -> int:
-        return hash((self._plus_stat, self._minus_stat))
+        return self._hash
 
     def __str__(self) -> str:
         return f"{self.name}: +{self._plus_stat}, -{self._minus_stat}"
@@ -252,15 +347,33 @@ class Nature(JSONConvertible, metaclass=_NatureMeta):
 
     @property
     def name(self) -> str:
-        return NATURE_MAP[(self._plus_stat, self._minus_stat)]
+        return self._name
+
+    @property
+    def ordinal(self) -> int:
+        return self._ordinal
+
+    @property
+    def modifiers(self) -> tuple[float, ...]:
+        """
+        The modifier this nature applies to each stat, in the order of ORDERED_NUMBER_STATS
+        """
+        return self._modifiers
+
+    @property
+    def modifier_tenths(self) -> tuple[int, ...]:
+        """
+        The modifier this nature applies to each stat as integer tenths, in the order of ORDERED_NUMBER_STATS
+        """
+        return self._modifier_tenths
 
     def get_modifier(self, stat: Stat) -> float:
-        if self.is_boosting(stat):
-            return 1.1
-        elif self.is_hindering(stat):
-            return 0.9
-        else:
-            return 1
+        index = STAT_INDEXES[stat]
+        return self._modifiers[index] if index < len(self._modifiers) else 1
+
+    def get_modifier_tenths(self, stat: Stat) -> int:
+        index = STAT_INDEXES[stat]
+        return self._modifier_tenths[index] if index < len(self._modifier_tenths) else 10
 
     def is_boosting(self, stat: Stat) -> bool:
         return self._plus_stat == stat and self._minus_stat != stat
@@ -292,6 +405,10 @@ class Nature(JSONConvertible, metaclass=_NatureMeta):
     def build_neutral(cls) -> Nature:
         return Nature(Stat.ATTACK, Stat.ATTACK)
 
+    @classmethod
+    def from_ordinal(cls, ordinal: int) -> Nature:
+        return NATURES[ordinal]
+
     @classmethod
     def from_json(cls, obj: dict, **kwargs) -> Nature:
         return Nature(plus_stat=Stat(obj["plus"]),
@@ -305,16 +422,54 @@ class Nature(JSONConvertible, metaclass=_NatureMeta):
         }
 
 
+_NATURE_REGISTRY: dict[tuple[Stat, Stat], Nature] = dict()
+
+NATURES: tuple[Nature, ...] = tuple(Nature(*k) for k in NATURE_ORDINALS_REVERSED)
+
+# The modifiers of each nature (by ordinal) to each stat (in the order of ORDERED_NUMBER_STATS)
+NATURE_MODIFIERS: np.ndarray = np.array([n.modifiers for n in NATURES], dtype=np.float64)
+NATURE_MODIFIERS.flags.writeable = False
+NATURE_MODIFIER_TENTHS: np.ndarray = np.array([n.modifier_tenths for n in NATURES], dtype=np.int64)
+NATURE_MODIFIER_TENTHS.flags.writeable = False
+
+
 #
 
 
-class Stats(JSONModel):
-    base: BaseStats
-    evs: dict[Stat, int]
-    ivs: dict[Stat, int]
-    level: int
-    nature: Nature
-    modifiers: dict[Stat, int] = {}
+class Stats(JSONConvertible):
+    """
+    The complete stat information of a single Pokémon.  EVs and IVs are stored as tuples in the order of
+    ORDERED_NUMBER_STATS, and stat modifiers as a tuple indexed in the order of ORDERED_NUMBER_STATS followed by the
+    non-numerical stats.
+
+    Stats are meant to be immutable, so that they can be used as cache and dictionary keys, and the hash is
+    cached.  with_ev(), with_iv() and with_modifiers() return changed copies.  The deprecated set_ev(), set_iv() and
+    add_modifiers() still change stats in place, which must not be done to stats that are being used as keys.
+    """
+    __slots__ = ("_base", "_evs", "_ivs", "_level", "_nature", "_modifiers", "_hash")
+
+    def __init__(self, base: BaseStats,
+                 evs: Mapping[Stat, int],
+                 ivs: Mapping[Stat, int],
+                 level: int,
+                 nature: Nature,
+                 modifiers: Mapping[Stat, int] | None = None):
+        """
+        :param base: The base stats
+        :param evs: The EVs invested into each stat.  Stats that are not given have no EVs.
+        :param ivs: The IVs of each stat.  Stats that are not given have max IVs.
+        :param level: The level of the Pokémon
+        :param nature: The nature of the Pokémon
+        :param modifiers: Optional.  The stat modifiers currently applied to each stat.
+        """
+        self._base = base
+        self._evs: tuple[int, ...] = tuple(evs.get(stat, 0) for stat in ORDERED_NUMBER_STATS)
+        self._ivs: tuple[int, ...] = tuple(ivs.get(stat, IV_MAX) for stat in ORDERED_NUMBER_STATS)
+        self._level = level
+        self._nature = nature
+        self._modifiers: tuple[int, ...] = _EMPTY_MODIFIERS if not modifiers else \
+            tuple(modifiers.get(stat, 0) for stat in _MODIFIER_STATS)
+        self._hash: int | None = None
 
     @classmethod
     def of(cls, base: BaseStats,
@@ -324,30 +479,130 @@ class Stats(JSONModel):
            level: int,
            modifiers: Iterable[StatModifier] | None = None):
         return Stats(base=base,
-                     evs={**{stat: 0 for stat in NUMBER_STATS},
-                          **{ev.stat: ev.value for ev in evs}},
-                     ivs={**{stat: IV_MAX for stat in NUMBER_STATS},
-                          **{iv.stat: iv.value for iv in ivs}},
+                     evs={ev.stat: ev.value for ev in evs},
+                     ivs={iv.stat: iv.value for iv in ivs},
                      nature=nature,
                      level=level,
                      modifiers={m.stat: m.modifier for m in (modifiers or [])})
 
+    @classmethod
+    def from_values(cls, base: BaseStats,
+                    evs: Sequence[int],
+                    ivs: Sequence[int],
+                    level: int,
+                    nature: Nature,
+                    modifiers: Sequence[int] | None = None,
+                    validate: bool = True) -> Stats:
+        """
+        Builds stats directly from packed EV, IV and stat modifier values, without building an EV, IV or
+        StatModifier for each stat.
+
+        :param base: The base stats
+        :param evs: The EVs of each stat, in the order of ORDERED_NUMBER_STATS
+        :param ivs: The IVs of each stat, in the order of ORDERED_NUMBER_STATS
+        :param level: The level of the Pokémon
+        :param nature: The nature of the Pokémon
+        :param modifiers: Optional.  The stat modifiers of each stat, in the order of ORDERED_NUMBER_STATS followed
+        by ACCURACY, EVASION and CRITICAL.
+        :param validate: If True, the values are checked in the same way as EV, IV and StatModifier check them.
+        If False, the values are trusted as-is (eg. when they were already validated with from_arrays()).
+        :return: The built stats
+        :raises StatError: Raises an error if validating and any of the values are invalid
+        """
+        evs, ivs = tuple(evs), tuple(ivs)
+        modifiers = _EMPTY_MODIFIERS if modifiers is None else tuple(modifiers)
+        if validate:
+            _check_stat_values(evs, ivs, modifiers)
+        stats = object.__new__(cls)
+        stats._base = base
+        stats._evs = evs
+        stats._ivs = ivs
+        stats._level = level
+        stats._nature = nature
+        stats._modifiers = modifiers
+        stats._hash = None
+        return stats
+
+    @classmethod
+    def from_arrays(cls, base: BaseStats,
+                    evs: ArrayLike,
+                    ivs: ArrayLike,
+                    level: int | ArrayLike,
+                    nature: Nature | Sequence[Nature],
+                    modifiers: ArrayLike | None = None,
+                    validate: bool = True) -> list[Stats]:
+        """
+        Builds many stats at once from arrays of packed EV, IV and stat modifier values, validating all of them
+        together.  This is intended for generating large numbers of candidate spreads.
+
+        :param base: The base stats shared by all of the stats
+        :param evs: An array of shape (N, 6) of the EVs of each stat, in the order of ORDERED_NUMBER_STATS
+        :param ivs: An array of shape (N, 6) of the IVs of each stat, in the order of ORDERED_NUMBER_STATS
+        :param level: The level of the Pokémon, either for all of the stats or for each of them
+        :param nature: The nature of the Pokémon, either for all of the stats or for each of them
+        :param modifiers: Optional.  An array of shape (N, 9) of the stat modifiers of each stat, in the order of
+        ORDERED_NUMBER_STATS followed by ACCURACY, EVASION and CRITICAL.
+        :param validate: If True, all of the values are checked at once in the same way as EV, IV and StatModifier
+        check them.  If False, the values are trusted as-is.
+        :return: The built stats, one for each row of the arrays
+        :raises StatError: Raises an error if validating and any of the values are invalid
+        """
+        evs = np.asarray(evs, dtype=np.int64).reshape(-1, len(ORDERED_NUMBER_STATS))
+        ivs = np.asarray(ivs, dtype=np.int64).reshape(-1, len(ORDERED_NUMBER_STATS))
+        n = len(evs)
+        modifiers = np.zeros((n, len(_MODIFIER_STATS)), dtype=np.int64) if modifiers is None else \
+            np.asarray(modifiers, dtype=np.int64).reshape(-1, len(_MODIFIER_STATS))
+        if len(ivs) != n or len(modifiers) != n:
+            raise StatError(f"Mismatched number of EVs ({n}), IVs ({len(ivs)}) and modifiers ({len(modifiers)})")
+        if validate:
+            _check_stat_arrays(evs, ivs, modifiers)
+        levels = np.broadcast_to(np.asarray(level), (n,)).tolist()
+        natures = [nature] * n if isinstance(nature, Nature) else list(nature)
+        if len(natures) != n:
+            raise StatError(f"Mismatched number of EVs ({n}) and natures ({len(natures)})")
+        return [cls.from_values(base, ev_values, iv_values, lvl, nat, modifier_values, validate=False)
+                for ev_values, iv_values, lvl, nat, modifier_values
+                in zip(map(tuple, evs.tolist()), map(tuple, ivs.tolist()), levels, natures,
+                       map(tuple, modifiers.tolist()))]
+
+    @classmethod
+    def from_json(cls, obj: dict, **kwargs) -> Stats:
+        return Stats(base=BaseStats.from_json(obj["base"]),
+                     evs={Stat(k): v for k, v in obj["evs"].items()},
+                     ivs={Stat(k): v for k, v in obj["ivs"].items()},
+                     level=obj["level"],
+                     nature=Nature.from_json(obj["nature"]),
+                     modifiers={Stat(k): v for k, v in obj.get("modifiers", {}).items()})
+
+    def to_json(self) -> JSONObject:
+        output = {
+            "base": self._base.to_json(),
+            "evs": {stat.name: ev for stat, ev in zip(ORDERED_NUMBER_STATS, self._evs)},
+            "ivs": {stat.name: iv for stat, iv in zip(ORDERED_NUMBER_STATS, self._ivs)},
+            "level": self._level,
+            "nature": self._nature.to_json()
+        }
+        if self._modifiers != _EMPTY_MODIFIERS:
+            output["modifiers"] = {stat.name: m for stat, m in self.modifiers.items()}
+        return output
+
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, Stats) and \
-            self.base == o.base and \
-            self.evs == o.evs and \
-            self.ivs == o.ivs and \
-            self.level == o.level and \
-            self.nature == o.nature and \
-            self.modifiers == o.modifiers
+        return self is o or (isinstance(o, Stats) and
+                             self._evs == o._evs and
+                             self._ivs == o._ivs and
+                             self._level == o._level and
+                             self._nature == o._nature and
+                             self._modifiers == o._modifiers and
+                             self._base == o._base)
 
     def __hash__(self) -> int:
-        return hash((self.base,
-                     tuple((s, self.evs[s]) for s in NUMBER_STATS),
-                     tuple((s, self.ivs[s]) for s in NUMBER_STATS),
-                     self.level,
-                     self.nature,
-                     tuple((s, self.modifiers.get(s, None)) for s in Stat)))
+        if self._hash is None:
+            self._hash = hash((self._base, self._evs, self._ivs, self._level, self._nature, self._modifiers))
+        return self._hash
+
+    def __reduce__(self):
+        return Stats.from_values, (self._base, self._evs, self._ivs, self._level, self._nature, self._modifiers,
+                                   False)
 
     def __str__(self) -> str:
         return f"{self.base} | " \
@@ -360,32 +615,180 @@ class Stats(JSONModel):
     def __repr__(self) -> str:
         return str(self)
 
+    @property
+    def base(self) -> BaseStats:
+        return self._base
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @property
+    def nature(self) -> Nature:
+        return self._nature
+
+    @property
+    def evs(self) -> Mapping[Stat, int]:
+        """
+        A read-only view of the EVs of each stat.  Use with_ev() to change them.
+        """
+        return MappingProxyType(dict(zip(ORDERED_NUMBER_STATS, self._evs)))
+
+    @property
+    def ivs(self) -> Mapping[Stat, int]:
+        """
+        A read-only view of the IVs of each stat.  Use with_iv() to change them.
+        """
+        return MappingProxyType(dict(zip(ORDERED_NUMBER_STATS, self._ivs)))
+
+    @property
+    def modifiers(self) -> Mapping[Stat, int]:
+        """
+        A read-only view of the non-zero stat modifiers of each stat.  Use with_modifiers() to change them.
+        """
+        return MappingProxyType({stat: m for stat, m in zip(_MODIFIER_STATS, self._modifiers) if m != 0})
+
     def get_iv(self, stat: Stat) -> int:
-        StatError.check_number_stat(stat)
-        return self.ivs[stat]
+        index = STAT_INDEXES[stat]
+        if index >= len(self._ivs):
+            raise StatError(f"Stat '{stat}' does not have a numerical value.")
+        return self._ivs[index]
+
+    def with_iv(self, iv: IV) -> Stats:
+        """
+        Gets a copy of these stats with the given IV
+        """
+        return self._copy(ivs=_replace(self._ivs, STAT_INDEXES[iv.stat], iv.value))
 
     def set_iv(self, iv: IV):
-        self.ivs[iv.stat] = iv.value
+        """
+        Deprecated.  Changes the given IV in place.  Use with_iv() instead.
+        """
+        _warn_mutation("set_iv", "with_iv")
+        self._ivs = _replace(self._ivs, STAT_INDEXES[iv.stat], iv.value)
+        self._hash = None
 
     def get_ev(self, stat: Stat) -> int:
-        StatError.check_number_stat(stat)
-        return self.evs[stat]
+        index = STAT_INDEXES[stat]
+        if index >= len(self._evs):
+            raise StatError(f"Stat '{stat}' does not have a numerical value.")
+        return self._evs[index]
 
-    def set_ev(self, ev: EV):
-        self.ivs[ev.stat] = ev.value
+    def with_ev(self, ev: EV) -> Stats:
+        """
+        Gets a copy of these stats with the given EV
+        """
+        return self._copy(evs=_replace(self._evs, STAT_INDEXES[ev.stat], ev.value))
 
-    def get_modifier(self, stat: Stat, minimum: int | None = None, maximum: int | None = None) -> StatModifier:
-        m = self.modifiers.get(stat, 0)
+    def set_ev(self, ev: EV):
+        """
+        Deprecated.  Changes the given EV in place.  Use with_ev() instead.
+        """
+        _warn_mutation("set_ev", "with_ev")
+        self._evs = _replace(self._evs, STAT_INDEXES[ev.stat], ev.value)
+        self._hash = None
+
+    def get_stage(self, stat: Stat, minimum: int | None = None, maximum: int | None = None) -> int:
+        """
+        Gets the stat stage currently applied to the given stat, without building a StatModifier.
+
+        :param stat: The stat to get the stage of
+        :param minimum: Optional.  The stage is raised to this value if below it (eg. 0 for a critical hit's attack)
+        :param maximum: Optional.  The stage is lowered to this value if above it (eg. 0 for a critical hit's defense)
+        :return: The stat stage
+        """
+        m = self._modifiers[STAT_INDEXES[stat]]
         if minimum is not None and m < minimum:
-            return StatModifier(stat, minimum)
+            return minimum
         elif maximum is not None and m > maximum:
-            return StatModifier(stat, maximum)
-        return StatModifier(stat, m)
+            return maximum
+        return m
+
+    def get_modifier(self, stat: Stat, minimum: int | None = None, maximum: int | None = None) -> StatModifier:
+        return StatModifier(stat, self.get_stage(stat, minimum, maximum))
+
+    def with_modifiers(self, *stat_mods: StatModifier) -> Stats:
+        """
+        Gets a copy of these stats with the given stat modifiers added onto the current ones, capped to their
+        bounds
+        """
+        return self._copy(modifiers=self._add_modifiers(stat_mods))
 
     def add_modifiers(self, *stat_mods: StatModifier):
+        """
+        Deprecated.  Adds the given stat modifiers in place.  Use with_modifiers() instead.
+        """
+        _warn_mutation("add_modifiers", "with_modifiers")
+        self._modifiers = self._add_modifiers(stat_mods)
+        self._hash = None
+
+    def _add_modifiers(self, stat_mods: Iterable[StatModifier]) -> tuple[int, ...]:
+        modifiers = self._modifiers
         for stat_mod in stat_mods:
-            self.modifiers[stat_mod.stat] = \
-                StatModifier(stat_mod.stat,
-                             (self.modifiers[stat_mod.stat]
-                              if stat_mod.stat in self.modifiers else 0) + stat_mod.modifier,
-                             adjust_to_cap=True).modifier
+            index = STAT_INDEXES[stat_mod.stat]
+            modifiers = _replace(modifiers, index,
+                                 StatModifier(stat_mod.stat, modifiers[index] + stat_mod.modifier,
+                                              adjust_to_cap=True).modifier)
+        return modifiers
+
+    def _copy(self, evs: tuple[int, ...] | None = None, ivs: tuple[int, ...] | None = None,
+              modifiers: tuple[int, ...] | None = None) -> Stats:
+        return Stats.from_values(self._base, evs if evs is not None else self._evs,
+                                 ivs if ivs is not None else self._ivs, self._level, self._nature,
+                                 modifiers if modifiers is not None else self._modifiers, validate=False)
+
+
+# Stat modifiers are indexed in the same order as the stats' indexes
+_MODIFIER_STATS: tuple[Stat, ...] = ORDERED_NUMBER_STATS + tuple(s for s in Stat if s not in NUMBER_STATS)
+_EMPTY_MODIFIERS: tuple[int, ...] = (0,) * len(_MODIFIER_STATS)
+
+
+# The bounds of the stat modifier of each stat, in the same order as _MODIFIER_STATS
+_MODIFIER_MINIMUMS: np.ndarray = np.array([0 if s in (Stat.HP, Stat.CRITICAL) else STAT_STAGE_MIN
+                                           for s in _MODIFIER_STATS], dtype=np.int64)
+_MODIFIER_MAXIMUMS: np.ndarray = np.array([0 if s == Stat.HP else CRITICAL_STAGE_MAX if s == Stat.CRITICAL
+                                           else STAT_STAGE_MAX for s in _MODIFIER_STATS], dtype=np.int64)
+
+
+def _check_stat_values(evs: tuple[int, ...], ivs: tuple[int, ...], modifiers: tuple[int, ...]):
+    if len(evs) != len(ORDERED_NUMBER_STATS) or len(ivs) != len(ORDERED_NUMBER_STATS):
+        raise StatError(f"EVs and IVs must have one value for each of {len(ORDERED_NUMBER_STATS)} stats")
+    if len(modifiers) != len(_MODIFIER_STATS):
+        raise StatError(f"Stat modifiers must have one value for each of {len(_MODIFIER_STATS)} stats")
+    for ev in evs:
+        if ev % 4 != 0 or not 0 <= ev <= EV_MAX:
+            raise StatError(f"Invalid EV value: {ev}")
+    for iv in ivs:
+        if not 0 <= iv <= IV_MAX:
+            raise StatError(f"Invalid IV value: {iv}")
+    if modifiers is not _EMPTY_MODIFIERS:
+        for stat, m, minimum, maximum in zip(_MODIFIER_STATS, modifiers, _MODIFIER_MINIMUMS.tolist(),
+                                             _MODIFIER_MAXIMUMS.tolist()):
+            if not minimum <= m <= maximum:
+                raise StatError(f"Invalid stat modifier: {stat} | {m}")
+
+
+def _check_stat_arrays(evs: np.ndarray, ivs: np.ndarray, modifiers: np.ndarray):
+    if evs.shape[-1] != len(ORDERED_NUMBER_STATS) or ivs.shape[-1] != len(ORDERED_NUMBER_STATS):
+        raise StatError(f"EVs and IVs must have one value for each of {len(ORDERED_NUMBER_STATS)} stats")
+    if modifiers.shape[-1] != len(_MODIFIER_STATS):
+        raise StatError(f"Stat modifiers must have one value for each of {len(_MODIFIER_STATS)} stats")
+    invalid = (evs < 0) | (evs > EV_MAX) | (evs % 4 != 0)
+    if invalid.any():
+        raise StatError(f"Invalid EV value: {evs[invalid][0]}")
+    invalid = (ivs < 0) | (ivs > IV_MAX)
+    if invalid.any():
+        raise StatError(f"Invalid IV value: {ivs[invalid][0]}")
+    invalid = (modifiers < _MODIFIER_MINIMUMS) | (modifiers > _MODIFIER_MAXIMUMS)
+    if invalid.any():
+        row, index = np.argwhere(invalid)[0]
+        raise StatError(f"Invalid stat modifier: {_MODIFIER_STATS[index]} | {modifiers[row, index]}")
+
+
+def _replace(values: tuple[int, ...], index: int, value: int) -> tuple[int, ...]:
+    return values[:index] + (value,) + values[index + 1:]
+
+
+def _warn_mutation(method: str, replacement: str):
+    warnings.warn(f"Stats.{method}() changes stats in place, which breaks any cache or dictionary keyed by them; "
+                  f"use Stats.{replacement}() instead", DeprecationWarning, stacklevel=3)
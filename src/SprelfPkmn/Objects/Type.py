@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, NamedTuple
+from typing import Iterable, Iterator, NamedTuple, Annotated
 from enum import Enum
 
-from SprelfJSON import JSONModel
+from SprelfJSON import JSONModel, DefaultFactory
+
+import numpy as np
 
 
 class Type(Enum):
@@ -26,8 +28,16 @@ class Type(Enum):
     STEEL = "STEEL"
     BUG = "BUG"
 
+    @property
+    def ordinal(self) -> int:
+        return TYPE_ORDINALS[self]
+
     @classmethod
     def get_damage_multiplier(cls, attacking: Type | Typing, defending: Typing) -> float:
+        if isinstance(attacking, Type) and not defending.extra:
+            secondary = NO_SECONDARY if defending.secondary is None else TYPE_ORDINALS[defending.secondary]
+            return _TYPING_EFFECTIVENESS_LOOKUP[TYPE_ORDINALS[attacking]][TYPE_ORDINALS[defending.primary]][secondary]
+
         if isinstance(attacking, Type):
             attacking = [attacking]
 
@@ -35,15 +45,33 @@ class Type(Enum):
         value = (1, 1)
         for atk_type in attacking:
             for def_type in defending:
-                if def_type in ATTACK_EFFECTIVENESS[atk_type].super:
-                    value = (value[0] * 2, value[1])
-                elif def_type in ATTACK_EFFECTIVENESS[atk_type].not_very:
-                    value = (value[0], value[1] * 2)
-                elif def_type in ATTACK_EFFECTIVENESS[atk_type].immune:
-                    value = (value[0] * 0, value[1])
+                code = int(TYPE_CHART[TYPE_ORDINALS[atk_type], TYPE_ORDINALS[def_type]])
+                value = (value[0] * code, value[1] * TYPE_CHART_SCALE)
 
         return value[0] / value[1]
 
+    @classmethod
+    def get_damage_multipliers(cls, attacking: Type, defending: Iterable[Typing]) -> np.ndarray:
+        """
+        Calculates the damage multipliers of the given attacking type against each of the given typings at once.
+
+        :param attacking: The attacking type
+        :param defending: The typings to calculate the damage multipliers against
+        :return: A float array with one damage multiplier per given typing
+        """
+        defending = list(defending)
+        primaries = np.fromiter((TYPE_ORDINALS[t.primary] for t in defending), dtype=np.intp,
+                                count=len(defending))
+        secondaries = np.fromiter((NO_SECONDARY if t.secondary is None else TYPE_ORDINALS[t.secondary]
+                                   for t in defending), dtype=np.intp, count=len(defending))
+        multipliers = TYPING_EFFECTIVENESS_MULTIPLIERS[TYPE_ORDINALS[attacking], primaries, secondaries]
+
+        # Extra types are rare, so they are applied separately
+        for i, typing in enumerate(defending):
+            for extra in typing.extra:
+                multipliers[i] *= TYPE_CHART[TYPE_ORDINALS[attacking], TYPE_ORDINALS[extra]] / TYPE_CHART_SCALE
+        return multipliers
+
 
 #
 
@@ -98,6 +126,37 @@ DEFENSE_EFFECTIVENESS: dict[Type, TypeEffectivenessRecord] = {
     for d_type in Type
 }
 
+_TYPING_REGISTRY: dict[tuple[Type, Type | None, tuple[Type, ...]], Typing] = dict()
+
+TYPE_ORDINALS: dict[Type, int] = {t: i for i, t in enumerate(Type)}
+TYPE_ORDINALS_REVERSED: tuple[Type, ...] = tuple(Type)
+
+# Effectiveness of each attacking type (rows) against each defending type (columns), in units of 1/2, so that
+# immune, not very effective, neutral and super effective are 0, 1, 2 and 4 respectively
+TYPE_CHART_SCALE = 2
+TYPE_CHART: np.ndarray = np.full((len(Type), len(Type)), TYPE_CHART_SCALE, dtype=np.uint8)
+for _a_type, _ter in ATTACK_EFFECTIVENESS.items():
+    for _codes, _d_types in ((TYPE_CHART_SCALE * 2, _ter.super), (TYPE_CHART_SCALE // 2, _ter.not_very),
+                             (0, _ter.immune)):
+        for _d_type in _d_types:
+            TYPE_CHART[TYPE_ORDINALS[_a_type], TYPE_ORDINALS[_d_type]] = _codes
+TYPE_CHART.flags.writeable = False
+
+# Effectiveness of each attacking type against every typing, indexed by [attacking][primary][secondary], in units
+# of 1/4.  Mono-typings use NO_SECONDARY as their secondary index.  A typing whose secondary type repeats its
+# primary type applies that type twice, the same as any other dual typing.
+NO_SECONDARY = len(Type)
+TYPING_EFFECTIVENESS_SCALE = TYPE_CHART_SCALE ** 2
+TYPING_EFFECTIVENESS: np.ndarray = np.concatenate((TYPE_CHART[:, :, np.newaxis] * TYPE_CHART[:, np.newaxis, :],
+                                                   TYPE_CHART[:, :, np.newaxis] * TYPE_CHART_SCALE), axis=2)
+TYPING_EFFECTIVENESS.flags.writeable = False
+TYPING_EFFECTIVENESS_MULTIPLIERS: np.ndarray = TYPING_EFFECTIVENESS / TYPING_EFFECTIVENESS_SCALE
+TYPING_EFFECTIVENESS_MULTIPLIERS.flags.writeable = False
+# Nested tuples are faster than NumPy for looking up single values
+_TYPING_EFFECTIVENESS_LOOKUP: tuple[tuple[tuple[float, ...], ...], ...] = \
+    tuple(tuple(tuple(row) for row in table) for table in TYPING_EFFECTIVENESS_MULTIPLIERS.tolist())
+del _a_type, _ter, _codes, _d_types, _d_type
+
 
 #
 
@@ -106,39 +165,85 @@ class Typing(JSONModel, Iterable[Type]):
     """
     Describes the typing of a particular Pokémon, including its primary and secondary typing and any other extra
     typing it may have gained (eg. through Trick-or-Treat).
+
+    Typings are immutable, including their extra types, which are stored as a tuple.  Those created through of()
+    or parsed from JSON are interned, so that identical typings share a single object.  Typings constructed directly
+    are not interned (see intern()), though they are still equal to, and hash the same as, the interned typing.
+    Each typing carries a bitmask of its types, by type ordinal, so that membership checks are simple bit
+    operations.
     """
     primary: Type
     secondary: Type | None = None
-    extra: list[Type] = []
+    extra: Annotated[tuple[Type, ...], DefaultFactory(tuple)]
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        types = (self.primary,) + ((self.secondary,) if self.secondary else ()) + self.extra
+        mask = 0
+        for t in types:
+            mask |= 1 << t.ordinal
+        key = (self.primary, self.secondary, self.extra)
+        for k, v in (("_types", types), ("_mask", mask), ("_key", key), ("_hash", hash(key))):
+            object.__setattr__(self, k, v)
 
     @classmethod
-    def of(cls, primary: Type, secondary: Type | None = None, extra: Iterable[Type] | None = None):
-        return cls(primary=primary, secondary=secondary, extra=list(extra) if extra else [])
+    def of(cls, primary: Type, secondary: Type | None = None, extra: Iterable[Type] | None = None) -> Typing:
+        key = (primary, secondary, tuple(extra) if extra else ())
+        typing = _TYPING_REGISTRY.get(key, None)
+        if typing is None:
+            typing = cls.intern(cls(primary=primary, secondary=secondary, extra=key[2]))
+        return typing
+
+    @classmethod
+    def from_json(cls, o: dict, **kwargs) -> Typing:
+        return cls.intern(super().from_json(o, **kwargs))
+
+    @classmethod
+    def intern(cls, typing: Typing) -> Typing:
+        """
+        Retrieves the shared object for the given typing, registering the given typing as that object if there
+        isn't one yet.
+        """
+        return _TYPING_REGISTRY.setdefault(typing._key, typing)
+
+    def __setattr__(self, key: str, value):
+        if "_hash" in self.__dict__:
+            raise AttributeError(f"Cannot modify attribute '{key}' of immutable typing {self}")
+        super().__setattr__(key, value)
+
+    def __reduce__(self):
+        return Typing.of, (self.primary, self.secondary, self.extra)
 
     def __str__(self) -> str:
-        return " / ".join(t.name for t in ([self.primary, self.secondary] + self.extra) if t)
+        return " / ".join(t.name for t in self._types)
 
     def __repr__(self) -> str:
         return str(self)
 
     def __iter__(self) -> Iterator[Type]:
-        return iter(t for t in self.as_tuple() if t)
+        return iter(self._types)
 
     def __contains__(self, t: Type) -> bool:
-        return t in self.as_tuple()
+        return isinstance(t, Type) and self._mask >> TYPE_ORDINALS[t] & 1 == 1
 
     def __eq__(self, o: object) -> bool:
-        return isinstance(o, Typing) and self.primary == o.primary and self.secondary == o.secondary and \
-            self.extra == o.extra
+        return self is o or (isinstance(o, Typing) and self._key == o._key)
 
     def __hash__(self) -> int:
-        return hash((self.primary, self.secondary, tuple(self.extra)))
+        return self._hash
+
+    @property
+    def mask(self) -> int:
+        """
+        A bitmask of the types in this typing, where bit N is set for the type with ordinal N
+        """
+        return self._mask
 
     def has_type(self, t: Type) -> bool:
-        return self.primary == t or self.secondary == t or t in self.extra
+        return self._mask >> TYPE_ORDINALS[t] & 1 == 1
 
     def as_tuple(self) -> tuple[Type, ...]:
-        return (self.primary,) + ((self.secondary,) if self.secondary else ()) + tuple(self.extra)
+        return self._types
 
     def is_mono_type(self):
         return self.secondary is None
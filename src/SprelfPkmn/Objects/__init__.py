@@ -3,10 +3,11 @@ from SprelfPkmn.Objects.Name import Name, VariantName, PrefixVariantName, Suffix
 from SprelfPkmn.Objects.Variant import Variant, Gender, MegaType, Region
 from SprelfPkmn.Objects.Type import Type, Typing
 from SprelfPkmn.Objects.Stats import Stat, Stats, StatModifier, BaseStats, EV, IV, Nature, \
-    NUMBER_STATS, EV_MAX, IV_MAX, StatError
+    NUMBER_STATS, ORDERED_NUMBER_STATS, STAT_INDEXES, EV_MAX, EV_TOTAL_MAX, IV_MAX, StatError, NATURES, \
+    STAT_STAGE_MIN, STAT_STAGE_MAX, CRITICAL_STAGE_MAX
 from SprelfPkmn.Objects.Ability import Ability, AbilityList
-from SprelfPkmn.Objects.PokemonData import PokemonData, PokemonDataMap, Pokemon
+from SprelfPkmn.Objects.PokemonData import PokemonData, PokemonDataMap, Pokemon, PokemonQuery
 from SprelfPkmn.Objects.Move import Move, MoveList, DamagingMove, MoveSet, StatusMove, MoveProperties
 from SprelfPkmn.Objects.MiscInfo import *
 from SprelfPkmn.Objects.Dex import DexEntryCollection, DexEntry, Dex
-from SprelfPkmn.Objects.StatTemplate import StatTemplate
+from SprelfPkmn.Objects.StatTemplate import StatTemplate, CompactStatTemplate
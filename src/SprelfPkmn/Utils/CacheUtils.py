@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, NamedTuple, TypeVar
+
+V = TypeVar('V')
+
+
+#
+
+
+class CacheInfo(NamedTuple):
+    """
+    A snapshot of the counters of an LRUCache
+    """
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(Generic[V]):
+    """
+    A bounded cache of calculated values, keyed by hashable keys, that evicts the least recently used values once
+    full.  Counts hits, misses and evictions.  None cannot be cached, as it is used to signify a miss.
+    """
+    __slots__ = ("max_size", "hits", "misses", "evictions", "_values")
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: The maximum number of values to keep
+        :raises ValueError: Raises an error if the maximum size is not positive
+        """
+        if max_size < 1:
+            raise ValueError(f"Invalid cache size: {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._values: OrderedDict[Hashable, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable) -> V | None:
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._values.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all of the cached values and resets the counters
+        """
+        self._values.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self._values), self.max_size)
@@ -1,2 +1,2 @@
-from SprelfPkmn.Utils import FormatUtils, DictUtils, ShowdownUtils
+from SprelfPkmn.Utils import FormatUtils, DictUtils, ShowdownUtils, CacheUtils
 from SprelfPkmn.Utils.ShowdownUtils import format_name as format_showdown_name
\ No newline at end of file
@@ -1,10 +1,25 @@
 from unittest import TestCase
 
 from SprelfPkmn.Calculations.Stats import *
-from SprelfPkmn.Calculations.StatTemplates import get_combinations_for_value
+from SprelfPkmn.Calculations.StatTemplates import get_combinations_for_value, get_combination_ranges_for_value, \
+    count_combinations_for_value, StatCombinationRange
+from SprelfPkmn.Calculations.Spreads import infer_spreads, SpreadSolution, SpreadInference
+from SprelfPkmn.Calculations.StatTable import StatTable
 from SprelfPkmn.Calculations.Damage import *
+from SprelfPkmn.Calculations.DamageDistribution import get_damage_distribution, get_ko_chance, \
+    CRITICAL_HIT_CHANCE, get_critical_hit_chance, enable_damage_distribution_cache, \
+    get_damage_distribution_cache_info, DEFAULT_DISTRIBUTION_CACHE_SIZE
+from SprelfPkmn.Calculations.Matchups import build_matchup_matrix, build_default_pokemon, MatchupMatrix
+from SprelfPkmn.Calculations.SpeedTiers import SpeedTierIndex, SpeedModifiers, SpreadPreset, PRESET_SPREADS
+from SprelfPkmn.Utils.CacheUtils import CacheInfo
+
+from Fixtures import make_pokemon_data
 
 import itertools
+import math
+import os
+import random
+import tempfile
 
 
 class TestCalculations(TestCase):
@@ -67,6 +82,205 @@ class TestCalculations(TestCase):
 
     #
 
+    def test_stat_calc_batch(self):
+        natures = [Nature.build_hindering(Stat.ATTACK), Nature.build_neutral(), Nature.build_boosting(Stat.ATTACK)]
+        bases, evs, ivs, levels, nature_idx = (a.ravel() for a in np.meshgrid(
+            [1, 45, 130, 255], [0, 4, 190, EV_MAX], [0, 17, IV_MAX], [1, 50, 78, 100], [0, 1, 2]))
+        for stat in (Stat.ATTACK, Stat.HP):
+            nature_mods = get_nature_modifiers(stat, natures)[nature_idx]
+            expected = [get_stat_value(stat, int(b), int(e), int(i), int(lv), natures[n])
+                        for b, e, i, lv, n in zip(bases, evs, ivs, levels, nature_idx)]
+            self.assertListEqual(expected,
+                                 get_stat_values_batch(stat, bases, evs, ivs, levels, nature_mods).tolist())
+
+        self.assertListEqual([[105, 112], [125, 132]],
+                             get_stat_values_batch(Stat.ATTACK, [[100], [120]], 0, [0, 15], 50, 1).tolist())
+
+        for bad_args in ((0, 0, 0, 50, 1), (100, 256, 0, 50, 1), (100, 0, 32, 50, 1),
+                         (100, 0, 0, 0, 1), (100, 0, 0, 50, 1.2)):
+            with self.assertRaises(StatError):
+                get_stat_values_batch(Stat.ATTACK, *bad_args)
+
+    #
+
+    def test_stat_inverse(self):
+        natures = [Nature.build_hindering(Stat.ATTACK), Nature.build_neutral(), Nature.build_boosting(Stat.ATTACK)]
+        for stat, level, nature, base, ev, iv in itertools.product((Stat.ATTACK, Stat.HP), (1, 37, 50, 100),
+                                                                   natures, (1, 80, 255), (0, 84, EV_MAX), (0, 31)):
+            for value in range(get_stat_value(stat, base, ev, iv, level, nature) - 1,
+                               get_stat_value(stat, base, ev, iv, level, nature) + 2):
+                self.assertListEqual([b for b in range(1, 256)
+                                      if get_stat_value(stat, b, ev, iv, level, nature) == value],
+                                     list(get_base_stat_from_value(stat, ev, iv, level, nature, value)))
+                self.assertListEqual([e for e in range(0, EV_MAX + 1, 4)
+                                      if get_stat_value(stat, base, e, iv, level, nature) == value],
+                                     list(get_evs_from_value(stat, base, iv, level, nature, value)))
+                self.assertListEqual([i for i in range(0, IV_MAX + 1)
+                                      if get_stat_value(stat, base, ev, i, level, nature) == value],
+                                     list(get_ivs_from_value(stat, base, ev, level, nature, value)))
+
+        self.assertEqual(range(0), get_ivs_from_value(Stat.ATTACK, 100, 0, 50, Nature.build_neutral(), 1000))
+
+    #
+
+    def test_stat_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.npy")
+            StatTable.build(path)
+            table = StatTable.load(path)
+
+            natures = [Nature.build_hindering(Stat.SPEED), Nature.build_neutral(), Nature.build_boosting(Stat.SPEED)]
+            for stat, level, nature, base, ev, iv in itertools.product((Stat.SPEED, Stat.HP), (1, 50, 78, 100),
+                                                                       natures, (1, 80, 255), (0, 84, EV_MAX),
+                                                                       (0, 31)):
+                value = get_stat_value(stat, base, ev, iv, level, nature)
+                self.assertEqual(value, table.get_stat_value(stat, base, ev, iv, level, nature))
+                for v in (value - 1, value, value + 1):
+                    self.assertEqual(get_base_stat_from_value(stat, ev, iv, level, nature, v),
+                                     table.get_base_stat_from_value(stat, ev, iv, level, nature, v))
+                    self.assertEqual(get_evs_from_value(stat, base, iv, level, nature, v),
+                                     table.get_evs_from_value(stat, base, iv, level, nature, v))
+                    self.assertEqual(get_ivs_from_value(stat, base, ev, level, nature, v),
+                                     table.get_ivs_from_value(stat, base, ev, level, nature, v))
+
+            self.assertListEqual(get_stat_values_batch(Stat.ATTACK, [[100], [120]], 252, 31, 50, [0.9, 1.1]).tolist(),
+                                 table.get_stat_values(Stat.ATTACK, [[100], [120]], 252, 31, 50, [9, 11]).tolist())
+            self.assertRaises(StatError, lambda: table.get_stat_value(Stat.HP, 100, 0, 31, 0, Nature.Adamant))
+            self.assertRaises(StatError, lambda: table.get_stat_values(Stat.HP, 100, 0, 31, [50, 101], 10))
+            self.assertRaises(StatError, lambda: table.get_evs_from_value(Stat.HP, 100, 31, 0, Nature.Adamant, 200))
+            del table
+
+    def test_stat_cache(self):
+        self.assertIsNone(get_stat_cache_info())
+        enable_stat_cache(max_size=2)
+        try:
+            for stat, base in ((Stat.ATTACK, 100), (Stat.ATTACK, 100), (Stat.HP, 100), (Stat.SPEED, 80),
+                               (Stat.ATTACK, 100), (Stat.SPEED, 80)):
+                self.assertEqual(get_stat_value(stat, base, 252, 31, 50, Nature.Adamant, use_cache=False),
+                                 get_stat_value(stat, base, 252, 31, 50, Nature.Adamant))
+            self.assertEqual(CacheInfo(hits=2, misses=4, evictions=2, size=2, max_size=2), get_stat_cache_info())
+            self.assertEqual(1 / 3, get_stat_cache_info().hit_rate())
+
+            # Invalid stat information is never cached
+            self.assertRaises(StatError, lambda: get_stat_value(Stat.ATTACK, 100, 256, 31, 50, Nature.Adamant))
+            self.assertRaises(StatError, lambda: get_stat_value(Stat.ATTACK, 100, 256, 31, 50, Nature.Adamant))
+            self.assertEqual(6, get_stat_cache_info().misses)
+
+            clear_stat_cache()
+            self.assertEqual(CacheInfo(0, 0, 0, 0, 2), get_stat_cache_info())
+            self.assertRaises(ValueError, lambda: enable_stat_cache(max_size=0))
+        finally:
+            disable_stat_cache()
+        self.assertIsNone(get_stat_cache_info())
+
+    def test_stat_stages(self):
+        self.assertEqual(100, apply_stat_stage(Stat.ATTACK, 100, 0))
+        self.assertEqual(150, apply_stat_stage(Stat.ATTACK, 100, 1))
+        self.assertEqual(400, apply_stat_stage(Stat.ATTACK, 100, 6))
+        self.assertEqual(66, apply_stat_stage(Stat.ATTACK, 100, -1))
+        self.assertEqual(50, apply_stat_stage(Stat.SPEED, 100, -2))
+        self.assertEqual(25, apply_stat_stage(Stat.SPEED, 100, -6))
+        self.assertEqual(133, apply_stat_stage(Stat.ACCURACY, 100, 1))
+        self.assertEqual(33, apply_stat_stage(Stat.EVASION, 100, -6))
+        self.assertRaises(StatError, lambda: apply_stat_stage(Stat.ATTACK, 100, 7))
+        self.assertRaises(StatError, lambda: apply_stat_stage(Stat.HP, 100, 1))
+        self.assertRaises(StatError, lambda: apply_stat_stage(Stat.CRITICAL, 100, 1))
+
+        stages = list(range(STAT_STAGE_MIN, STAT_STAGE_MAX + 1))
+        for stat in (Stat.DEFENSE, Stat.ACCURACY):
+            accuracy = stat == Stat.ACCURACY
+            self.assertListEqual([apply_stat_stage(stat, 123, s) for s in stages],
+                                 apply_stat_stages(123, stages, accuracy=accuracy).tolist())
+            self.assertListEqual([get_stat_stage_multiplier(stat, s) for s in stages],
+                                 get_stat_stage_multipliers(stages, accuracy=accuracy).tolist())
+            self.assertListEqual([StatModifier(stat, s).multiplier for s in stages],
+                                 get_stat_stage_multipliers(stages, accuracy=accuracy).tolist())
+        self.assertEqual(0.5, StatModifier(Stat.ATTACK, -2).multiplier)
+        self.assertRaises(StatError, lambda: StatModifier(Stat.CRITICAL, 0).multiplier)
+        self.assertEqual([1 / 24, 1 / 8, 1 / 2, 1], [get_critical_hit_chance(s) for s in range(4)])
+        self.assertRaises(StatError, lambda: get_critical_hit_chance(4))
+        self.assertRaises(StatError, lambda: apply_stat_stages([100, 100], [0, -7]))
+
+    #
+
+    def test_spread_inference(self):
+        # Example from https://bulbapedia.bulbagarden.net/wiki/Statistic#Determination_of_stats
+        base = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        values = {Stat.HP: 289, Stat.ATTACK: 278, Stat.DEFENSE: 193,
+                  Stat.SP_ATTACK: 135, Stat.SP_DEFENSE: 171, Stat.SPEED: 171}
+
+        solution_sets = {s.nature.name: s for s in infer_spreads(values, level=78, base=base)}
+        self.assertIn(SpreadSolution(nature=Nature.Adamant,
+                                     evs=(188, 88, 48, 84, 20, 72),
+                                     ivs=(12, 30, 16, 23, 5, 24)), solution_sets["Adamant"])
+        self.assertIn(24, solution_sets["Adamant"].get_ivs(Stat.HP))
+        self.assertIn(72, solution_sets["Adamant"].get_evs(Stat.HP))
+        self.assertNotIn("Modest", solution_sets)
+
+        # Maxed out Garchomp at level 100 only has a few EVs left over to hide elsewhere
+        values = {Stat.HP: 357, Stat.ATTACK: 394, Stat.DEFENSE: 226,
+                  Stat.SP_ATTACK: 176, Stat.SP_DEFENSE: 206, Stat.SPEED: 303}
+        solution_sets = list(infer_spreads(values, level=100, base=base))
+        self.assertListEqual(["Adamant"], [s.nature.name for s in solution_sets])
+        solutions = list(solution_sets[0])
+        self.assertEqual(len(solutions), solution_sets[0].count())
+        self.assertIn(SpreadSolution(nature=Nature.Adamant,
+                                     evs=(EV_MAX, 0, 0, 0, EV_MAX, 0),
+                                     ivs=(IV_MAX,) * 6), solutions)
+        for solution in solutions:
+            self.assertLessEqual(sum(solution.evs), EV_TOTAL_MAX)
+            self.assertEqual((EV_MAX, EV_MAX), (solution.get_ev(Stat.ATTACK), solution.get_ev(Stat.SPEED)))
+            stats = solution.to_stats(base, 100)
+            for stat, value in values.items():
+                self.assertEqual(value, get_stat_value_from_info(stats, stat))
+        self.assertListEqual([s.to_stats(base, 100) for s in solutions], solution_sets[0].to_stats(base, 100))
+        self.assertEqual(0, len(list(infer_spreads(values, level=100, base=base, ev_total=500))))
+        # Without the base stats, every spread that fits them still fits
+        unknown_base = {s.nature.name: s for s in infer_spreads(values, level=100)}
+        self.assertTrue(all(solution in unknown_base["Adamant"] for solution in solutions))
+        self.assertIn("Jolly", unknown_base)
+
+        with self.assertRaises(StatError):
+            list(infer_spreads({Stat.HP: 357}, level=100, base=base))
+
+    #
+
+    def test_spread_inference_incremental(self):
+        base = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        ivs = {Stat.HP: 24, Stat.ATTACK: 12, Stat.DEFENSE: 30, Stat.SP_ATTACK: 16, Stat.SP_DEFENSE: 23, Stat.SPEED: 5}
+        evs = {Stat.HP: 72, Stat.ATTACK: 188, Stat.DEFENSE: 88, Stat.SP_ATTACK: 48, Stat.SP_DEFENSE: 84, Stat.SPEED: 20}
+
+        inference = SpreadInference(base)
+        previous = {stat: len(inference.get_ivs(stat)) * len(inference.get_evs(stat)) for stat in ORDERED_NUMBER_STATS}
+        for level in (30, 78, 100):
+            for stat in ORDERED_NUMBER_STATS:
+                inference.observe(stat, get_stat_value(stat, base.get_stat(stat), evs[stat], ivs[stat], level,
+                                                       Nature.Adamant), level)
+            self.assertTrue(inference.is_consistent())
+            self.assertIn(Nature.Adamant, inference.get_natures())
+            for stat in ORDERED_NUMBER_STATS:
+                self.assertIn(ivs[stat], inference.get_ivs(stat))
+                self.assertIn(evs[stat], inference.get_evs(stat))
+                current = len(inference.get_ivs(stat)) * len(inference.get_evs(stat))
+                self.assertLessEqual(current, previous[stat])
+                previous[stat] = current
+        self.assertListEqual([Nature.Adamant], inference.get_natures())
+        template = inference.to_stat_template(Stat.ATTACK)
+        self.assertListEqual([130], template.base)
+        self.assertIn(12, template.iv)
+
+        # Gaining a known number of EVs keeps the inference consistent with the new observation
+        inference.gain_evs(Stat.SPEED, 40)
+        inference.observe(Stat.SPEED, get_stat_value(Stat.SPEED, 102, 60, 5, 100, Nature.Adamant), 100)
+        self.assertTrue(inference.is_consistent())
+        self.assertIn(60, inference.get_evs(Stat.SPEED))
+        self.assertNotIn(20, inference.get_evs(Stat.SPEED))
+
+        # An observation that contradicts the previous ones leaves no possibilities
+        inference.observe(Stat.ATTACK, 999, 100)
+        self.assertFalse(inference.is_consistent())
+        self.assertListEqual([], inference.get_natures())
+
     #
 
     def test_stat_templates(self):
@@ -105,6 +319,59 @@ class TestCalculations(TestCase):
         self.assertEqual(0, len(list(results)))
         self.assertTrue(all(r.is_complete() for r in results))
 
+    def test_stat_template_ranges(self):
+        bases, evs, ivs = np.meshgrid(np.arange(1, 256), np.arange(0, EV_MAX + 1, 4), np.arange(0, IV_MAX + 1))
+        for stat, value in ((Stat.ATTACK, 150), (Stat.HP, 200)):
+            natures = {Nature.build_boosting(stat), Nature.build_neutral(), Nature.build_hindering(stat)}
+            expected = sum(int((get_stat_values_batch(stat, bases, evs, ivs, level, n.get_modifier(stat)) == value)
+                               .sum()) for level in (50, 100) for n in natures)
+            template = StatTemplate(stat=stat)
+            self.assertEqual(expected, count_combinations_for_value(template, value))
+            ranges = list(get_combination_ranges_for_value(template, value))
+            self.assertEqual(expected, sum(r.num_combinations() for r in ranges))
+            for r in ranges[:50]:
+                self.assertTrue(all(get_stat_value(stat, t.base[0], t.ev[0], t.iv[0], t.level[0], t.nature[0]) == value
+                                    for t in r.combinations()))
+
+        template = StatTemplate(stat=Stat.ATTACK, base=[100, 130], iv=range(0, 32, 2), level=50,
+                                nature=Nature.build_neutral())
+        ranges = list(get_combination_ranges_for_value(template, 150))
+        self.assertSetEqual({(b, e, i) for b, e, i in itertools.product((100, 130), range(0, EV_MAX + 1, 4),
+                                                                        range(0, 32, 2))
+                             if get_stat_value(Stat.ATTACK, b, e, i, 50, Nature.build_neutral()) == 150},
+                            {(b, e, i) for r in ranges for b, e, i in itertools.product(r.base, r.ev, r.iv)})
+        self.assertTrue(all(r.num_combinations() == 2 for r in ranges))
+        self.assertEqual(0, count_combinations_for_value(StatTemplate(stat=Stat.HP), 1000))
+
+    def test_stat_template_ranges_parallel(self):
+        for template, value in ((StatTemplate(stat=Stat.ATTACK), 150),
+                                (StatTemplate(stat=Stat.HP, iv=IV_MAX, level=[50, 100]), 200),
+                                (StatTemplate(stat=Stat.HP), 1000)):
+            serial = [c for r in get_combination_ranges_for_value(template, value)
+                      for c in itertools.product(r.base, r.ev, r.iv, (r.level,), (r.nature,))]
+            parallel = [c for r in get_combination_ranges_for_value(template, value, max_workers=4)
+                        for c in itertools.product(r.base, r.ev, r.iv, (r.level,), (r.nature,))]
+            self.assertSetEqual(set(serial), set(parallel))
+            self.assertEqual(len(set(parallel)), len(parallel))
+            self.assertListEqual(list(get_combination_ranges_for_value(template, value, max_workers=4)),
+                                 list(get_combination_ranges_for_value(template, value, max_workers=4)))
+            self.assertEqual(count_combinations_for_value(template, value),
+                             count_combinations_for_value(template, value, max_workers=2))
+
+        # Stopping early, either by breaking out of the loop or by closing the generator, only shuts down the pool
+        def _flatten(r: StatCombinationRange) -> list[tuple]:
+            return list(itertools.product(r.base, r.ev, r.iv, (r.level,), (r.nature,)))
+
+        template = StatTemplate(stat=Stat.ATTACK)
+        first = _flatten(next(iter(get_combination_ranges_for_value(template, 150))))
+        for combination_range in get_combination_ranges_for_value(template, 150, max_workers=2):
+            self.assertListEqual(first, _flatten(combination_range))
+            break
+        ranges = get_combination_ranges_for_value(template, 150, max_workers=2)
+        self.assertListEqual(first, _flatten(next(ranges)))
+        ranges.close()
+        self.assertRaises(StopIteration, lambda: next(ranges))
+
     def test_damage(self):
 
         base_stats = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
@@ -159,14 +426,227 @@ class TestCalculations(TestCase):
         self.assertListEqual([31, 31, 32, 32, 32, 33, 33, 34, 34, 34, 35, 35, 35, 36, 36, 37],
                              list(calculate_damage(attacker, defender, move)))
 
-        attacker.stats.add_modifiers(StatModifier(Stat.ATTACK, 2))
+        attacker.stats = attacker.stats.with_modifiers(StatModifier(Stat.ATTACK, 2))
         move = DamagingMove(name="Earthquake", type=Type.GROUND, base_power=100, offense_stat=Stat.ATTACK,
                             defense_stat=Stat.DEFENSE)
         self.assertListEqual([162, 165, 166, 168, 169, 172, 174, 175, 178, 180, 181, 183, 186, 187, 189, 192],
                              list(calculate_damage(attacker, defender, move)))
 
-        defender.stats.add_modifiers(StatModifier(Stat.DEFENSE, 4))
+        defender.stats = defender.stats.with_modifiers(StatModifier(Stat.DEFENSE, 4))
         self.assertListEqual([55, 55, 57, 57, 58, 58, 60, 60, 60, 61, 61, 63, 63, 64, 64, 66],
                              list(calculate_damage(attacker, defender, move)))
         # self.assertListEqual([],
         #                      list(calculate_damage(attacker, defender, move, critical=True)))
+
+    def test_damage_distribution(self):
+        base_stats = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        garchomp = make_pokemon_data("Garchomp", typing=Typing.of(Type.DRAGON, Type.GROUND), stats=base_stats,
+                                     ability="Rough Skin")
+        attacker, defender = (Pokemon(data=garchomp, moveset=MoveSet(), ability=Ability(name="Rough skin"), item="",
+                                      stats=Stats.of(base=base_stats,
+                                                     evs=[EV(stat, 0) for stat in NUMBER_STATS],
+                                                     ivs=[IV(stat, 31) for stat in NUMBER_STATS],
+                                                     nature=Nature.Adamant, level=50, modifiers=[]))
+                              for _ in range(2))
+        move = DamagingMove(name="Dragon Claw", type=Type.DRAGON, base_power=80, offense_stat=Stat.ATTACK)
+        hp = get_stat_value_from_info(defender.stats, Stat.HP)
+
+        rolls = list(calculate_damage(attacker, defender, move))
+        critical_rolls = list(calculate_damage(attacker, defender, move, critical=True))
+        outcomes = [(r, (1 - CRITICAL_HIT_CHANCE) / 16) for r in rolls] + \
+                   [(r, CRITICAL_HIT_CHANCE / 16) for r in critical_rolls]
+        for hits in (1, 2, 3):
+            expected = sum(math.prod(p for _, p in combo) for combo in itertools.product(outcomes, repeat=hits)
+                           if sum(r for r, _ in combo) >= hp)
+            self.assertAlmostEqual(expected, get_ko_chance(attacker, defender, move, hits=hits))
+        self.assertAlmostEqual(sum(r >= 140 for r in rolls) / 16,
+                               get_ko_chance(attacker, defender, move, critical_chance=0, hp=140))
+
+        distribution = get_damage_distribution(attacker, defender, move)
+        self.assertIs(distribution, get_damage_distribution(attacker, defender, move))
+        self.assertEqual((min(rolls), max(critical_rolls)), (distribution.min_damage, distribution.max_damage))
+        self.assertAlmostEqual(1, float(distribution.repeat(4).probabilities.sum()))
+        self.assertEqual(4 * min(rolls), distribution.repeat(4).min_damage)
+
+        attacker.stats = attacker.stats.with_modifiers(StatModifier(Stat.ATTACK, 2))
+        self.assertIsNot(distribution, get_damage_distribution(attacker, defender, move))
+        self.assertEqual(1.0, get_ko_chance(attacker, defender, move, hits=2))
+
+        # The cache is bounded, evicting the least recently used distributions
+        enable_damage_distribution_cache(max_size=1)
+        try:
+            boosted = get_damage_distribution(attacker, defender, move)
+            self.assertIs(boosted, get_damage_distribution(attacker, defender, move))
+            get_damage_distribution(attacker, defender, move, critical_chance=0)
+            self.assertIsNot(boosted, get_damage_distribution(attacker, defender, move))
+            self.assertEqual(CacheInfo(hits=1, misses=3, evictions=2, size=1, max_size=1),
+                             get_damage_distribution_cache_info())
+            self.assertRaises(ValueError, lambda: enable_damage_distribution_cache(max_size=0))
+        finally:
+            enable_damage_distribution_cache(DEFAULT_DISTRIBUTION_CACHE_SIZE)
+
+    def test_damage_fixed_point(self):
+        self.assertEqual(0, poke_round(1, 2048))
+        self.assertEqual(4, poke_round(3, STAB_MODIFIER))
+        self.assertEqual(9216, chain_modifiers([STAB_MODIFIER, STAB_MODIFIER]))
+        self.assertEqual(MODIFIER_SCALE, chain_modifiers([]))
+
+        base_stats = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        garchomp = make_pokemon_data("Garchomp", typing=Typing.of(Type.DRAGON, Type.GROUND), stats=base_stats,
+                                     ability="Rough Skin")
+        attacker, defender = (Pokemon(data=garchomp, moveset=MoveSet(), ability=Ability(name="Rough skin"), item="",
+                                      stats=Stats.of(base=base_stats,
+                                                     evs=[EV(stat, 0) for stat in NUMBER_STATS],
+                                                     ivs=[IV(stat, 31) for stat in NUMBER_STATS],
+                                                     nature=Nature.Adamant, level=50, modifiers=[]))
+                              for _ in range(2))
+
+        for move in (DamagingMove(name="Earthquake", type=Type.GROUND, base_power=100, offense_stat=Stat.ATTACK),
+                     DamagingMove(name="Dragon Claw", type=Type.DRAGON, base_power=80, offense_stat=Stat.ATTACK),
+                     DamagingMove(name="Poison Jab", type=Type.POISON, base_power=80, offense_stat=Stat.ATTACK),
+                     DamagingMove(name="Thunder Punch", type=Type.ELECTRIC, base_power=75, offense_stat=Stat.ATTACK),
+                     DamagingMove(name="Ice Beam", type=Type.ICE, base_power=90, offense_stat=Stat.SP_ATTACK)):
+            self.assertListEqual(list(calculate_damage(attacker, defender, move)),
+                                 list(calculate_damage_fixed_point(attacker, defender, move)))
+
+        move = DamagingMove(name="Earthquake", type=Type.GROUND, base_power=100, offense_stat=Stat.ATTACK)
+        damage = list(calculate_damage_fixed_point(attacker, defender, move,
+                                                   modifiers=[DamageModifier(type=DamageModifierType.WEATHER,
+                                                                             value=1.5),
+                                                              DamageModifier(type=DamageModifierType.STATUS,
+                                                                             value=0.5)]))
+        self.assertEqual((61, 72), (damage[0], damage[-1]))
+
+    def test_damage_batch(self):
+        rng = random.Random(9)
+
+        def _build_pokemon(typing: Typing) -> Pokemon:
+            base_stats = BaseStats(**{k: rng.randint(20, 200) for k in ("attack", "defense", "special_attack",
+                                                                       "special_defense", "speed", "hp")})
+            data = make_pokemon_data("Test", typing=typing, stats=base_stats)
+            return Pokemon(data=data, moveset=MoveSet(), ability=Ability(name="Test"), item="",
+                           stats=Stats.of(base=base_stats,
+                                          evs=[EV(stat, rng.randint(0, 63) * 4) for stat in NUMBER_STATS],
+                                          ivs=[IV(stat, rng.randint(0, IV_MAX)) for stat in NUMBER_STATS],
+                                          nature=rng.choice([Nature.Adamant, Nature.Modest, Nature.Bold]),
+                                          level=rng.choice([5, 50, 78, 100]),
+                                          modifiers=[StatModifier(stat, rng.randint(0, 6))
+                                                     for stat in (Stat.ATTACK, Stat.DEFENSE, Stat.SP_ATTACK,
+                                                                  Stat.SP_DEFENSE)]))
+
+        pokemon = [_build_pokemon(Typing.of(t1, t2 if t2 != t1 else None))
+                   for t1, t2 in zip(rng.choices(list(Type), k=12), rng.choices(list(Type), k=12))]
+        moves = [DamagingMove(name="Test", type=t, base_power=rng.choice([20, 60, 80, 120, 150]),
+                              offense_stat=rng.choice([Stat.ATTACK, Stat.SP_ATTACK, Stat.DEFENSE]))
+                 for t in rng.choices(list(Type), k=12)]
+
+        attacks = [(rng.choice(pokemon), rng.choice(pokemon), rng.choice(moves), rng.random() < 0.3)
+                   for _ in range(300)]
+        attackers, defenders, attack_moves, critical = zip(*attacks)
+        results = calculate_damage_batch(attackers, defenders, attack_moves, critical)
+        self.assertEqual((300, 16), results.shape)
+        for (attacker, defender, move, crit), result in zip(attacks, results):
+            self.assertListEqual(list(calculate_damage(attacker, defender, move, critical=crit)), result.tolist())
+
+        self.assertRaises(ValueError, lambda: calculate_damage_batch(attackers, defenders[1:], attack_moves))
+
+    def test_matchup_matrix(self):
+        def _build_data(name: str, typing: Typing, base: int, moves: list[DamagingMove]) -> PokemonData:
+            return make_pokemon_data(name, typing=typing, stats=BaseStats(base, base, base, base, base, base),
+                                     moves=moves)
+
+        earthquake = DamagingMove(name="Earthquake", type=Type.GROUND, base_power=100, offense_stat=Stat.ATTACK)
+        ice_beam = DamagingMove(name="Ice Beam", type=Type.ICE, base_power=90, offense_stat=Stat.SP_ATTACK)
+        thunderbolt = DamagingMove(name="Thunderbolt", type=Type.ELECTRIC, base_power=90, offense_stat=Stat.SP_ATTACK)
+        data = [_build_data("Garchomp", Typing.of(Type.DRAGON, Type.GROUND), 100, [earthquake, ice_beam]),
+                _build_data("Pikachu", Typing.of(Type.ELECTRIC), 60, [thunderbolt]),
+                _build_data("Skarmory", Typing.of(Type.STEEL, Type.FLYING), 80, [earthquake, thunderbolt]),
+                _build_data("Magikarp", Typing.of(Type.WATER), 20, [])]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "matchups")
+            matrix = build_matchup_matrix(data, path, rows_per_task=1)
+            self.assertTrue(matrix.is_complete())
+            self.assertEqual(["garchomp", "pikachu", "skarmory", "magikarp"], matrix.ids)
+
+            matchup = matrix.get_matchup(data[0], "garchomp")
+            self.assertEqual(ice_beam, matchup.get_move(data[0]))
+            attacker, defender = build_default_pokemon(data[0], 50), build_default_pokemon(data[0], 50)
+            damage = list(calculate_damage(attacker, defender, ice_beam))
+            hp = get_stat_value_from_info(defender.stats, Stat.HP)
+            self.assertAlmostEqual(damage[0] / hp * 100, matchup.min_percentage, places=4)
+            self.assertAlmostEqual(damage[-1] / hp * 100, matchup.max_percentage, places=4)
+            self.assertEqual(earthquake, matrix.get_matchup("garchomp", "pikachu").get_move(data[0]))
+            self.assertEqual(thunderbolt, matrix.get_matchup("skarmory", "skarmory").get_move(data[2]))
+            self.assertEqual((-1, 0, 0), matrix.get_matchup("magikarp", "garchomp"))
+            expected = (np.array(matrix.percentages), np.array(matrix.moves))
+            del matrix
+
+            # Resuming only calculates the rows that aren't marked as complete
+            partial = MatchupMatrix.load(path, mode="r+")
+            partial.percentages[1:3] = 0
+            partial.progress[1:3] = False
+            partial.flush()
+            del partial
+            resumed = build_matchup_matrix(data, path, max_workers=2)
+            np.testing.assert_array_equal(expected[0], resumed.percentages)
+            np.testing.assert_array_equal(expected[1], resumed.moves)
+            del resumed
+
+            self.assertRaises(ValueError, lambda: build_matchup_matrix(data[:2], path))
+            rebuilt = build_matchup_matrix(data[:2], path, resume=False)
+            self.assertEqual(["garchomp", "pikachu"], rebuilt.ids)
+            del rebuilt
+
+    def test_speed_tiers(self):
+        speeds = {"Garchomp": 102, "Pikachu": 90, "Skarmory": 70, "Magikarp": 80, "Aerodactyl": 130,
+                  "Ditto": 48, "Latios": 110, "Zapdos": 100, "Mew": 100}
+        data = [make_pokemon_data(name, stats=BaseStats(100, 100, 100, 100, speed, 100))
+                for name, speed in speeds.items()]
+        index = SpeedTierIndex(PokemonDataMap(*data))
+        garchomp = Stats.of(base=data[0].stats, evs=[EV(Stat.SPEED, EV_MAX)], ivs=[], nature=Nature.Jolly, level=50)
+        self.assertEqual(169, get_stat_value_from_info(garchomp, Stat.SPEED))
+
+        for level, preset, modifiers, opponent_modifiers, trick_room in itertools.product(
+                (50, 100), SpreadPreset, (SpeedModifiers(), SpeedModifiers(stage=-1, tailwind=True)),
+                (SpeedModifiers(), SpeedModifiers(stage=1), SpeedModifiers(choice_scarf=True)), (False, True)):
+            ev, iv, nature_mod = PRESET_SPREADS[preset]
+            speed = modifiers.apply(169)
+            opponents = {d.name_id: opponent_modifiers.apply(
+                get_stat_values_batch(Stat.SPEED, d.stats.get_stat(Stat.SPEED), ev, iv, level, nature_mod).item())
+                for d in data}
+            comparison = index.compare_stats(garchomp, level=level, preset=preset, modifiers=modifiers,
+                                             opponent_modifiers=opponent_modifiers, trick_room=trick_room)
+            outsped = [d.name_id for d in comparison.outsped]
+            outspeeding = [d.name_id for d in comparison.outspeeding]
+            self.assertSetEqual({n for n, s in opponents.items() if (s > speed if trick_room else s < speed)},
+                                set(outsped))
+            self.assertSetEqual({n for n, s in opponents.items() if s == speed}, {d.name_id for d in comparison.tied})
+            self.assertSetEqual({n for n, s in opponents.items() if (s < speed if trick_room else s > speed)},
+                                set(outspeeding))
+            for names in (outsped, outspeeding):
+                self.assertListEqual(sorted(names, key=lambda n: opponents[n], reverse=not trick_room), names)
+
+        # Tailwind doubles speed, and Choice Scarf with Tailwind triples it
+        self.assertEqual(338, SpeedModifiers(tailwind=True).apply(169))
+        self.assertEqual(507, SpeedModifiers(tailwind=True, choice_scarf=True).apply(169))
+        self.assertEqual(253, SpeedModifiers(choice_scarf=True).apply(169))
+        self.assertListEqual(["pikachu", "magikarp", "skarmory", "ditto"],
+                             [d.name_id for d in index.compare(150, level=50, preset=SpreadPreset.MAX_NEUTRAL).outsped])
+        self.assertRaises(ValueError, lambda: index.compare(150, level=1))
+
+    def test_stat_ranges(self):
+        data = [make_pokemon_data(name, stats=BaseStats(*base))
+                for name, base in (("Comfey", (52, 90, 82, 110, 100, 51)), ("Blissey", (10, 10, 75, 135, 55, 255)))]
+        data_map = PokemonDataMap(data[0])
+        ranges = get_stat_ranges(data_map)
+        self.assertIs(ranges, get_stat_ranges(data_map))
+        self.assertEqual((1, len(ORDERED_NUMBER_STATS), 100), ranges.minimums.shape)
+        self.assertTupleEqual((111, 158), ranges.get_range(data[0], Stat.HP, 50))
+
+        data_map.add_data(data[1])
+        ranges = get_stat_ranges(data_map)
+        self.assertEqual(2, len(ranges.data))
+        for d, stat, level in itertools.product(data, ORDERED_NUMBER_STATS, range(1, 101)):
+            self.assertTupleEqual(get_stat_range(stat, d.stats.get_stat(stat), level),
+                                  ranges.get_range(d, stat, level))
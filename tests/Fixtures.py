@@ -0,0 +1,36 @@
+from SprelfPkmn.Objects import *
+
+
+def make_pokemon_data(name: str,
+                      typing: Typing | None = None,
+                      stats: BaseStats | None = None,
+                      ability: str = "Test",
+                      variant: Variant | None = None,
+                      moves: list[Move] | None = None,
+                      nat_dex_number: int | None = None,
+                      misc_info: MiscInfo | None = None,
+                      name_id: str | None = None) -> PokemonData:
+    """
+    Builds the data of a Pokémon for tests, with placeholder values for anything that is not given
+
+    :param name: The default name of the Pokémon
+    :param typing: Optional.  Defaults to a mono-Normal typing.
+    :param stats: Optional.  Defaults to 100 in every base stat.
+    :param ability: Optional.  The name of the Pokémon's only ability.
+    :param variant: Optional.  Defaults to the base variant.
+    :param moves: Optional.  The moves the Pokémon is able to learn.  Defaults to none.
+    :param nat_dex_number: Optional.  The Pokémon's national dex number.  Defaults to no dex entries.
+    :param misc_info: Optional.  Defaults to no other information.
+    :param name_id: Optional.  Defaults to the name in lower case.
+    :return: The Pokémon data
+    """
+    return PokemonData(name=Name(default=name),
+                       variant=variant if variant is not None else Variant(),
+                       typing=typing if typing is not None else Typing.of(Type.NORMAL),
+                       stats=stats if stats is not None else BaseStats(100, 100, 100, 100, 100, 100),
+                       abilities=AbilityList(primary=Ability(name=ability)),
+                       move_list=MoveList(moves=moves) if moves else MoveList(),
+                       dex_entries=DexEntryCollection.of(DexEntry(dex=Dex.NATIONAL, number=nat_dex_number))
+                       if nat_dex_number is not None else DexEntryCollection.of(),
+                       misc_info=misc_info if misc_info is not None else MiscInfo(),
+                       name_id=name_id if name_id is not None else name.lower())
@@ -1,7 +1,13 @@
 from unittest import TestCase
+import itertools
+import pickle
 
 from SprelfPkmn.Objects import *
 from SprelfPkmn.Exceptions import *
+from SprelfPkmn.Objects.Type import ATTACK_EFFECTIVENESS, TYPE_ORDINALS_REVERSED
+from SprelfPkmn.Objects.PokemonData import PokemonQueryable
+
+from Fixtures import make_pokemon_data
 
 
 class TestObjects(TestCase):
@@ -116,6 +122,30 @@ class TestObjects(TestCase):
         self.assertDictEqual(dual_json, dual.to_json())
         self.assertDictEqual(dual_json, Typing.from_json(dual.to_json()).to_json())
 
+    def test_typing_interning(self):
+
+        dual = Typing.of(Type.FIRE, Type.WATER)
+        self.assertIs(dual, Typing.of(Type.FIRE, Type.WATER))
+        self.assertIs(dual, Typing.from_json({"primary": "FIRE", "secondary": "WATER"}))
+        self.assertIs(dual, pickle.loads(pickle.dumps(dual)))
+        self.assertIsNot(dual, Typing.of(Type.WATER, Type.FIRE))
+        self.assertIs(dual, Typing.intern(Typing(primary=Type.FIRE, secondary=Type.WATER)))
+        self.assertEqual(hash(dual), hash(Typing(primary=Type.FIRE, secondary=Type.WATER)))
+
+        extra = Typing.of(Type.GRASS, extra=[Type.GHOST])
+        self.assertEqual((1 << Type.GRASS.ordinal) | (1 << Type.GHOST.ordinal), extra.mask)
+        self.assertEqual((Type.GRASS, Type.GHOST), tuple(extra))
+        self.assertTrue(Type.GHOST in extra and extra.has_type(Type.GRASS))
+        self.assertFalse(Type.FIRE in extra or None in extra)
+
+        with self.assertRaises(AttributeError):
+            dual.primary = Type.GRASS
+        with self.assertRaises(AttributeError):
+            Typing.of(Type.GRASS).extra.append(Type.GHOST)
+        self.assertEqual((), Typing.of(Type.GRASS).extra)
+        self.assertIs(extra, Typing.from_json(extra.to_json()))
+        self.assertDictEqual({"primary": "GRASS"}, Typing.of(Type.GRASS).to_json())
+
     def test_stats(self):
 
         # BASE STATS
@@ -275,6 +305,252 @@ class TestObjects(TestCase):
 
     #
 
+    def test_type_effectiveness(self):
+        def _get_expected(attacking: Type, defending: Typing) -> float:
+            value = 1
+            for t in defending:
+                record = ATTACK_EFFECTIVENESS[attacking]
+                value *= 2 if t in record.super else 0.5 if t in record.not_very else 0 if t in record.immune else 1
+            return value
+
+        typings = [Typing.of(p, s if s != p else None) for p in Type for s in Type] + \
+                  [Typing.of(p, p) for p in Type] + \
+                  [Typing.of(Type.GRASS, Type.WATER, [Type.GHOST]), Typing.of(Type.FIRE, None, [Type.GRASS])]
+        for attacking in Type:
+            expected = [_get_expected(attacking, t) for t in typings]
+            self.assertListEqual(expected, [Type.get_damage_multiplier(attacking, t) for t in typings])
+            self.assertListEqual(expected, Type.get_damage_multipliers(attacking, typings).tolist())
+
+        self.assertEqual(4, Type.get_damage_multiplier(Type.ICE, Typing.of(Type.DRAGON, Type.GROUND)))
+        self.assertEqual(0, Type.get_damage_multiplier(Type.ELECTRIC, Typing.of(Type.DRAGON, Type.GROUND)))
+        self.assertEqual(4, Type.get_damage_multiplier(Typing.of(Type.FIGHTING, Type.FLYING), Typing.of(Type.GRASS,
+                                                                                                        Type.DARK)))
+
+        # A duplicated type is applied twice, whichever way the multiplier is calculated
+        doubled = Typing.of(Type.GROUND, Type.GROUND)
+        self.assertEqual(4, Type.get_damage_multiplier(Type.WATER, doubled))
+        self.assertEqual(4, Type.get_damage_multiplier(Typing.of(Type.WATER), doubled))
+        self.assertListEqual([4, 2], Type.get_damage_multipliers(Type.WATER,
+                                                                 [doubled, Typing.of(Type.GROUND)]).tolist())
+        self.assertEqual(Type.BUG, TYPE_ORDINALS_REVERSED[Type.BUG.ordinal])
+
+    def test_pokemon_data_map_defense(self):
+        typings = {"Garchomp": Typing.of(Type.DRAGON, Type.GROUND), "Skarmory": Typing.of(Type.STEEL, Type.FLYING),
+                   "Heatran": Typing.of(Type.FIRE, Type.STEEL), "Rotom": Typing.of(Type.ELECTRIC, Type.WATER),
+                   "Gastrodon": Typing.of(Type.WATER, Type.GROUND), "Charizard": Typing.of(Type.FIRE, Type.FLYING),
+                   "Corviknight": Typing.of(Type.FLYING, Type.STEEL), "Pikachu": Typing.of(Type.ELECTRIC)}
+        data = [make_pokemon_data(name, typing=typing) for name, typing in typings.items()]
+        data_map = PokemonDataMap(*data[:4])
+        data_map.add_all_data(data[4:])
+
+        self.assertEqual(8, len(data_map.defense_profiles))
+        self.assertSetEqual({"skarmory", "corviknight", "charizard"},
+                            {d.name_id for d in data_map.defense(resists=[Type.GRASS], immune_to=[Type.GROUND])})
+        self.assertSetEqual({"gastrodon", "rotom"},
+                            {d.name_id for d in data_map.defense(resists=[Type.FIRE, Type.STEEL],
+                                                                 not_weak_to=[Type.ROCK])})
+        self.assertSetEqual({"gastrodon"}, {d.name_id for d in data_map.defense(weak_to=[Type.GRASS],
+                                                                                immune_to=[Type.ELECTRIC])})
+
+        for resists, weak_to, immune_to, not_weak_to in itertools.product(
+                ([], [Type.FIRE], [Type.GROUND, Type.STEEL]), ([], [Type.WATER], [Type.ICE, Type.FIRE]),
+                ([], [Type.GROUND]), ([], [Type.FIGHTING], [Type.ELECTRIC, Type.GRASS])):
+            self.assertListEqual(sorted(d.name_id for d in PokemonQueryable(data).defense(resists, weak_to, immune_to,
+                                                                                          not_weak_to)),
+                                 sorted(d.name_id for d in data_map.defense(resists, weak_to, immune_to,
+                                                                            not_weak_to)))
+
+    def test_pokemon_data_map_stat_ranges(self):
+        bases = {"Garchomp": (130, 95, 80, 85, 102, 108), "Pikachu": (55, 40, 50, 50, 90, 35),
+                 "Skarmory": (80, 140, 40, 70, 70, 65), "Magikarp": (10, 55, 15, 20, 80, 20),
+                 "Aerodactyl": (105, 65, 60, 75, 130, 80), "Latios": (90, 80, 130, 110, 110, 80),
+                 "Zapdos": (90, 85, 125, 90, 100, 90), "Mew": (100, 100, 100, 100, 100, 100)}
+        data = [make_pokemon_data(name, stats=BaseStats(*base)) for name, base in bases.items()]
+        data_map = PokemonDataMap(*data[:3])
+        data_map.add_all_data(data[3:])
+
+        self.assertListEqual(["zapdos", "mew", "garchomp", "latios", "aerodactyl"],
+                             [d.name_id for d in data_map.stat_at_least(Stat.SPEED, 100)])
+        self.assertListEqual(["aerodactyl", "latios"], [d.name_id for d in data_map.top_stat(Stat.SPEED, 2)])
+        self.assertListEqual(["zapdos", "garchomp", "latios", "mew"],
+                             [d.name_id for d in data_map.total_range(580, 600)])
+        self.assertListEqual([], [d.name_id for d in data_map.stat_range(Stat.SPEED, 120, 110)])
+
+        scan = PokemonQueryable(data)
+        for stat, low, high in itertools.product(NUMBER_STATS, (None, 40, 80, 100), (None, 80, 100, 200)):
+            self.assertListEqual(list(scan.stat_range(stat, low, high)), list(data_map.stat_range(stat, low, high)))
+        for stat, value in itertools.product(NUMBER_STATS, (50, 80, 100)):
+            self.assertListEqual(list(scan.stat_at_least(stat, value)), list(data_map.stat_at_least(stat, value)))
+            self.assertListEqual(list(scan.stat_at_most(stat, value)), list(data_map.stat_at_most(stat, value)))
+        for k in (0, 1, 3, 8, 10):
+            self.assertListEqual(list(scan.top_stat(Stat.SPEED, k)), list(data_map.top_stat(Stat.SPEED, k)))
+            self.assertListEqual(list(scan.top_total(k)), list(data_map.top_total(k)))
+        self.assertListEqual(list(scan.total_range(500)), list(data_map.total_range(500)))
+
+    def test_pokemon_query(self):
+        info = [("Garchomp", Typing.of(Type.DRAGON, Type.GROUND), "Rough Skin", 102, Stat.ATTACK, MegaType.NONE),
+                ("Garchomp", Typing.of(Type.DRAGON, Type.GROUND), "Sand Force", 92, Stat.ATTACK, MegaType.NORMAL),
+                ("Latios", Typing.of(Type.DRAGON, Type.PSYCHIC), "Levitate", 110, Stat.SP_ATTACK, MegaType.NONE),
+                ("Latios", Typing.of(Type.DRAGON, Type.PSYCHIC), "Levitate", 110, Stat.SP_ATTACK, MegaType.NORMAL),
+                ("Flygon", Typing.of(Type.GROUND, Type.DRAGON), "Levitate", 100, Stat.SPEED, MegaType.NONE),
+                ("Rotom", Typing.of(Type.ELECTRIC, Type.WATER), "Levitate", 86, Stat.SPEED, MegaType.NONE),
+                ("Pikachu", Typing.of(Type.ELECTRIC), "Static", 90, Stat.SPEED, MegaType.NONE),
+                ("Dragonite", Typing.of(Type.DRAGON, Type.FLYING), "Multiscale", 80, Stat.ATTACK, MegaType.NONE)]
+        data = [make_pokemon_data(name, typing=typing, stats=BaseStats(100, 100, 100, 100, speed, 100), ability=ability,
+                                  variant=Variant(mega_type=mega), nat_dex_number=i,
+                                  misc_info=MiscInfo(ev_yield=EVYield((ev_stat, 3))), name_id=f"{name.lower()}-{i}")
+                for i, (name, typing, ability, speed, ev_stat, mega) in enumerate(info)]
+        data_map = PokemonDataMap(*data)
+        scan = PokemonQueryable(data)
+
+        query = data_map.typing(Type.DRAGON).ability("Levitate").stat_at_least(Stat.SPEED, 100)
+        self.assertListEqual(["latios-2", "latios-3", "flygon-4"], [d.name_id for d in query])
+        self.assertEqual("Index lookup: ability = Levitate (4)\n"
+                         "Intersect index: SPEED in [100, None] (4)\n"
+                         "Intersect index: typing = DRAGON (6)", query.explain())
+        self.assertListEqual(["latios-2", "flygon-4"], [d.name_id for d in query.is_mega(False)])
+        self.assertEqual("Index lookup: is mega = True (2)", data_map.query().is_mega().explain())
+        self.assertEqual("Scan all (8)", data_map.query().explain())
+        self.assertEqual("Filter: SPEED in [None, None]",
+                         data_map.nat_dex_number(6).stat_range(Stat.SPEED).explain().split("\n")[-1])
+        self.assertListEqual([], list(data_map.nat_dex_number(6).typing(Type.DRAGON)))
+
+        def _check(chain):
+            self.assertSetEqual({d.name_id for d in chain(scan)}, {d.name_id for d in chain(data_map)})
+
+        _check(lambda q: q.typing(Type.DRAGON).is_mega())
+        _check(lambda q: q.is_mega(False).defense(immune_to=[Type.GROUND]).ability("Levitate"))
+        _check(lambda q: q.ev_yield(Stat.SPEED, 3, strict=True).stat_range(Stat.SPEED, 86, 100))
+        _check(lambda q: q.dex(Dex.NATIONAL).stat(Stat.SPEED, 110).total_range(600, 610))
+        _check(lambda q: q.typing(Type.GROUND).typing(Type.DRAGON).ability("Sand Force"))
+        _check(lambda q: q.typing(Type.DRAGON).top_stat(Stat.SPEED, 2))
+        _check(lambda q: q.is_regional(False).is_gender(False).is_form(False).stat_at_most(Stat.SPEED, 100))
+
+    def test_pokemon_data_map_bitmaps(self):
+        info = [("Garchomp", Typing.of(Type.DRAGON, Type.GROUND), "Rough Skin", MegaType.NONE),
+                ("Garchomp", Typing.of(Type.DRAGON, Type.GROUND), "Sand Force", MegaType.NORMAL),
+                ("Flygon", Typing.of(Type.GROUND, Type.DRAGON), "Levitate", MegaType.NONE),
+                ("Rotom", Typing.of(Type.ELECTRIC, Type.WATER), "Levitate", MegaType.NONE),
+                ("Pikachu", Typing.of(Type.ELECTRIC), "Static", MegaType.NONE)]
+        data = [make_pokemon_data(name, typing=typing, ability=ability, variant=Variant(mega_type=mega),
+                                  nat_dex_number=i, name_id=f"{name.lower()}-{i}")
+                for i, (name, typing, ability, mega) in enumerate(info)]
+        data_map = PokemonDataMap(*data[:-1])
+        data_map.add_data(data[-1])
+
+        self.assertDictEqual({d: i for i, d in enumerate(data)}, data_map.ordinals)
+        self.assertEqual(0b00111, data_map.typing_bitmaps[Type.DRAGON])
+        self.assertEqual(0b01100, data_map.ability_bitmaps["Levitate"])
+        self.assertEqual(0b00010, data_map.variant_bitmaps["mega"])
+        self.assertEqual(0b11111, data_map.full_bitmap)
+        self.assertEqual(0b01010, data_map.to_bitmap([data[3], data[1]]))
+        self.assertListEqual([data[1], data[3]], list(data_map.from_bitmap(0b01010)))
+        self.assertListEqual([], list(data_map.from_bitmap(0)))
+
+        # Bitmaps of queries combine with bitwise operations, and the Pokémon are only looked up at the end
+        dragons, levitate = data_map.typing(Type.DRAGON).bitmap(), data_map.ability("Levitate").bitmap()
+        self.assertListEqual(["flygon-2"], [d.name_id for d in data_map.from_bitmap(dragons & levitate)])
+        self.assertListEqual(["garchomp-0", "garchomp-1", "flygon-2", "rotom-3"],
+                             [d.name_id for d in data_map.from_bitmap(dragons | levitate)])
+        self.assertListEqual(["rotom-3", "pikachu-4"],
+                             [d.name_id for d in data_map.from_bitmap(data_map.full_bitmap & ~dragons)])
+        self.assertEqual(0b00101, data_map.typing(Type.DRAGON).is_mega(False).bitmap())
+        self.assertEqual(0b00101, data_map.typing(Type.DRAGON).defense(immune_to=[Type.ELECTRIC]).is_mega(False)
+                         .plan().bitmap)
+        self.assertEqual(0b00001, data_map.typing(Type.DRAGON).stat(Stat.SPEED, 100).name("Garchomp")
+                         .is_mega(False).bitmap())
+        self.assertListEqual(["rotom-3"], [d.name_id for d in data_map.defense(resists=[Type.FIRE])
+                                           .typing(Type.WATER)])
+
+    def test_nature_flyweights(self):
+        self.assertIs(Nature.Adamant, Nature(Stat.ATTACK, Stat.SP_ATTACK))
+        self.assertIs(Nature.Adamant, Nature.adamant)
+        self.assertIs(Nature.Adamant, Nature.from_json(Nature.Adamant.to_json()))
+        self.assertIs(Nature.Adamant, pickle.loads(pickle.dumps(Nature.Adamant)))
+        self.assertIs(Nature.Adamant, NATURES[Nature.Adamant.ordinal])
+        self.assertRaises(StatError, lambda: Nature(Stat.HP, Stat.ATTACK))
+
+        for nature in NATURES:
+            self.assertEqual(nature, Nature.from_ordinal(nature.ordinal))
+            for i, stat in enumerate(ORDERED_NUMBER_STATS):
+                expected = 1.1 if nature.is_boosting(stat) else 0.9 if nature.is_hindering(stat) else 1
+                self.assertEqual(expected, nature.get_modifier(stat))
+                self.assertEqual(expected, nature.modifiers[i])
+                self.assertEqual(round(expected * 10), nature.get_modifier_tenths(stat))
+                self.assertEqual(round(expected * 10), nature.modifier_tenths[i])
+            self.assertEqual(1, nature.get_modifier(Stat.ACCURACY))
+
+    def test_stats_compact(self):
+        base = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        self.assertEqual(base, BaseStats.from_json(base.to_json()))
+        self.assertEqual(hash(base), hash(pickle.loads(pickle.dumps(base))))
+        self.assertEqual(600, base.total())
+        self.assertEqual((130, 95, 80, 85, 102, 108), base.values)
+        self.assertRaises(StatError, lambda: base.get_stat(Stat.ACCURACY))
+
+        stats1 = Stats.of(base=base, evs=[EV(Stat.ATTACK, 252), EV(Stat.SPEED, 252)], ivs=[IV(Stat.SP_ATTACK, 0)],
+                          nature=Nature.Jolly, level=50)
+        stats2 = Stats.from_json(stats1.to_json())
+        self.assertEqual(stats1, stats2)
+        self.assertEqual(hash(stats1), hash(stats2))
+        self.assertEqual(stats1, pickle.loads(pickle.dumps(stats1)))
+        self.assertEqual(252, stats1.get_ev(Stat.SPEED))
+        self.assertEqual(0, stats1.get_ev(Stat.HP))
+        self.assertEqual(0, stats1.get_iv(Stat.SP_ATTACK))
+        self.assertEqual(IV_MAX, stats1.get_iv(Stat.HP))
+        self.assertNotIn("modifiers", stats1.to_json())
+
+        # The dictionary views are read-only, and changes make copies
+        with self.assertRaises(TypeError):
+            stats2.evs[Stat.HP] = 4
+        stats2 = stats1.with_ev(EV(Stat.HP, 4))
+        self.assertEqual((0, 4), (stats1.get_ev(Stat.HP), stats2.get_ev(Stat.HP)))
+        self.assertEqual(IV_MAX, stats2.with_iv(IV(Stat.SP_ATTACK, 31)).get_iv(Stat.HP))
+        self.assertNotEqual(stats1, stats2)
+        self.assertNotEqual(hash(stats1), hash(stats2))
+
+        stats2 = stats2.with_ev(EV(Stat.HP, 0)).with_modifiers(StatModifier(Stat.SPEED, 1),
+                                                               StatModifier(Stat.EVASION, -1))
+        self.assertDictEqual({Stat.SPEED: 1, Stat.EVASION: -1}, dict(stats2.modifiers))
+        self.assertDictEqual({}, dict(stats1.modifiers))
+        self.assertEqual(1, stats2.get_modifier(Stat.SPEED).modifier)
+        self.assertEqual(stats2, Stats.from_json(stats2.to_json()))
+        self.assertEqual(stats2, pickle.loads(pickle.dumps(stats2)))
+        self.assertNotEqual(stats1, stats2)
+
+        # The in-place setters still work, but are deprecated
+        with self.assertWarns(DeprecationWarning):
+            stats2.set_ev(EV(Stat.HP, 4))
+        self.assertEqual(4, stats2.get_ev(Stat.HP))
+
+    def test_stats_bulk(self):
+        base = BaseStats(attack=130, defense=95, special_attack=80, special_defense=85, speed=102, hp=108)
+        stats = Stats.of(base=base, evs=[EV(Stat.ATTACK, 252), EV(Stat.SPEED, 252)], ivs=[IV(Stat.SP_ATTACK, 0)],
+                         nature=Nature.Jolly, level=50, modifiers=[StatModifier(Stat.CRITICAL, 1)])
+        evs = (252, 0, 0, 0, 252, 0)
+        ivs = (31, 31, 0, 31, 31, 31)
+        modifiers = (0, 0, 0, 0, 0, 0, 0, 0, 1)
+        self.assertEqual(stats, Stats.from_values(base, evs, ivs, 50, Nature.Jolly, modifiers))
+        self.assertEqual(hash(stats), hash(Stats.from_values(base, evs, ivs, 50, Nature.Jolly, modifiers)))
+        self.assertEqual(stats, Stats.from_arrays(base, [evs], [ivs], 50, Nature.Jolly, [modifiers])[0])
+
+        many = Stats.from_arrays(base, [evs, (0,) * 6], [ivs, (31,) * 6], [50, 100], [Nature.Jolly, Nature.Hardy])
+        self.assertEqual(2, len(many))
+        self.assertEqual((100, Nature.Hardy, 0, 31), (many[1].level, many[1].nature,
+                                                      many[1].get_ev(Stat.SPEED), many[1].get_iv(Stat.SP_ATTACK)))
+        self.assertDictEqual({}, dict(many[0].modifiers))
+
+        self.assertRaises(StatError, lambda: Stats.from_values(base, (1, 0, 0, 0, 0, 0), ivs, 50, Nature.Jolly))
+        self.assertRaises(StatError, lambda: Stats.from_values(base, evs, (32, 0, 0, 0, 0, 0), 50, Nature.Jolly))
+        self.assertRaises(StatError, lambda: Stats.from_values(base, evs, ivs[:5], 50, Nature.Jolly))
+        self.assertRaises(StatError, lambda: Stats.from_values(base, evs, ivs, 50, Nature.Jolly, (0,) * 8 + (4,)))
+        self.assertRaises(StatError, lambda: Stats.from_arrays(base, [evs, (256,) * 6], [ivs, ivs], 50, Nature.Jolly))
+        self.assertRaises(StatError, lambda: Stats.from_arrays(base, [evs], [ivs], 50, Nature.Jolly,
+                                                               [(0, 0, 0, 0, 0, 1, 0, 0, 0)]))
+        self.assertRaises(StatError, lambda: Stats.from_arrays(base, [evs, evs], [ivs], 50, Nature.Jolly))
+        unchecked = Stats.from_values(base, (1, 0, 0, 0, 0, 0), ivs, 50, Nature.Jolly, validate=False)
+        self.assertEqual(1, unchecked.get_ev(Stat.ATTACK))
+
     def test_stat_template(self):
 
         st1 = StatTemplate(stat=Stat.HP, base=100, ev=0, iv=0, level=50, nature=Nature(Stat.ATTACK, Stat.ATTACK))
@@ -290,6 +566,34 @@ class TestObjects(TestCase):
         self.assertDictEqual(st_json2, st2.to_json())
         self.assertDictEqual(st_json2, StatTemplate.from_json(st_json2).to_json())
 
+    def test_compact_stat_template(self):
+
+        st1 = StatTemplate(stat=Stat.ATTACK, base=[100, 120], ev=[0, 252], level=50,
+                           nature=[Nature.Adamant, Nature.Modest])
+        c1 = st1.to_compact()
+        self.assertEqual(st1, c1.to_template())
+        self.assertEqual(hash(st1), hash(StatTemplate.from_json(st1.to_json())))
+        self.assertEqual(hash(StatTemplate(stat=Stat.SPEED, iv=-1)), hash(StatTemplate(stat=Stat.SPEED, iv=[-1])))
+        self.assertEqual(2 * 2 * 32 * 1 * 2, len(c1))
+
+        c2 = StatTemplate(stat=Stat.ATTACK, base=[120, 130], iv=31).to_compact()
+        both = c1 & c2
+        self.assertEqual(StatTemplate(stat=Stat.ATTACK, base=120, ev=[0, 252], iv=31, level=50,
+                                      nature=[Nature.Adamant, Nature.Modest]), both.to_template())
+        self.assertTrue(both.issubset(c1) and both.issubset(c2))
+        self.assertFalse(c1.issubset(c2))
+        self.assertTrue(c1.issubset(c1 | c2) and c2.issubset(c1 | c2))
+
+        diff = c1.difference(c2)
+        self.assertEqual(len(c1) - len(both), sum(len(d) for d in diff))
+        self.assertTrue(all(d.isdisjoint(c2) and d.issubset(c1) for d in diff))
+        self.assertTrue(all(a.isdisjoint(b) for a, b in itertools.combinations(diff, 2)))
+
+        self.assertEqual([], c1.difference(c1))
+        self.assertTrue(c1.isdisjoint(CompactStatTemplate(stat=Stat.SPEED)))
+        self.assertRaises(StatError, lambda: c1 & CompactStatTemplate(stat=Stat.SPEED))
+        self.assertEqual("stat = Stat.SPEED", str(StatTemplate(stat=Stat.SPEED)))
+
     def test_dex_entries(self):
 
         entry = DexEntry(dex=Dex.GEN_1, number=1)